@@ -96,6 +96,9 @@ class Category(models.Model):
     @property
     def petition_count(self):
         """Count of active petitions in this category"""
+        # Precomputed by querysets annotated with active_petition_count
+        if hasattr(self, 'active_petition_count'):
+            return self.active_petition_count
         return self.petitions.filter(is_active=True).count()
 
 
@@ -0,0 +1,200 @@
+"""
+Keyset (cursor) pagination for list views.
+
+OFFSET pagination reads and discards every row before the requested page
+and counts the whole result set first; on a petition with a million
+signatures the deep pages scan most of the index. Cursor pagination filters
+on the ordering key of the last row shown instead:
+
+    WHERE (created_at, id) < (:created_at, :id)
+    ORDER BY created_at DESC, id DESC LIMIT :per_page + 1
+
+so page N costs the same as page 1. Cursors are signed, opaque tokens
+carried in ``?cursor=``; the total shown is an optional planner estimate.
+"""
+import json
+
+from django.core import signing
+from django.db import connections
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+from django.utils.http import urlencode
+
+CURSOR_PARAM = 'cursor'
+CURSOR_SALT = 'apps.core.pagination.cursor'
+
+
+def estimate_count(queryset):
+    """
+    Estimate the rows of a queryset without counting them.
+
+    Uses the PostgreSQL planner estimate; other databases count exactly.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def _flip(field):
+    return field[1:] if field.startswith('-') else f'-{field}'
+
+
+def _keyset_filter(ordering, values, backwards):
+    """Rows after ``values`` in ``ordering`` (before them if ``backwards``)."""
+    condition = Q()
+    for index, field in enumerate(ordering):
+        name = field.lstrip('-')
+        descending = field.startswith('-') != backwards
+        step = Q(**{f'{name}__{"lt" if descending else "gt"}': values[index]})
+        for previous, value in zip(ordering[:index], values):
+            step &= Q(**{previous.lstrip('-'): value})
+        condition |= step
+    return condition
+
+
+class CursorPage:
+    """A page of a CursorPaginator, with query strings for its neighbours."""
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, params, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.params = params
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def _query(self, cursor=None):
+        params = {key: values for key, values in self.params.lists() if key != CURSOR_PARAM}
+        if cursor:
+            params[CURSOR_PARAM] = cursor
+        return urlencode(params, doseq=True)
+
+    @property
+    def first_query(self):
+        return self._query()
+
+    @property
+    def next_query(self):
+        return self._query(self.next_cursor)
+
+    @property
+    def previous_query(self):
+        return self._query(self.previous_cursor)
+
+
+class CursorPaginator:
+    """
+    Paginate a queryset by keyset on ``ordering``.
+
+    ``ordering`` must end with a unique field (the pk) so every row has a
+    distinct position.
+    """
+
+    def __init__(self, object_list, per_page, ordering, estimate=True):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+        self.estimate = estimate
+
+    @cached_property
+    def count(self):
+        """Estimated number of rows, or None if estimates are off."""
+        return estimate_count(self.object_list) if self.estimate else None
+
+    def _encode(self, row, backwards):
+        values = []
+        for field in self.ordering:
+            value = getattr(row, field.lstrip('-'))
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return signing.dumps({'v': values, 'b': backwards}, salt=CURSOR_SALT, compress=True)
+
+    def _decode(self, cursor):
+        try:
+            data = signing.loads(cursor, salt=CURSOR_SALT)
+            values = [
+                self.object_list.model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, data['v'], strict=True)
+            ]
+        except (signing.BadSignature, KeyError, TypeError, ValueError) as e:
+            raise Http404('Página inválida.') from e
+        return values, bool(data.get('b'))
+
+    def page(self, cursor, params):
+        """
+        Return the page at ``cursor`` (the first page if empty).
+
+        Raises:
+            Http404: If the cursor is invalid or was tampered with
+        """
+        values, backwards = self._decode(cursor) if cursor else (None, False)
+        ordering = [_flip(field) for field in self.ordering] if backwards else list(self.ordering)
+        queryset = self.object_list.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(_keyset_filter(self.ordering, values, backwards))
+
+        rows = list(queryset[:self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, more
+        else:
+            has_next, has_previous = more, values is not None
+        return CursorPage(
+            rows,
+            self,
+            params,
+            next_cursor=self._encode(rows[-1], False) if rows and has_next else None,
+            previous_cursor=self._encode(rows[0], True) if rows and has_previous else None,
+        )
+
+
+class CursorPaginationMixin:
+    """
+    Keyset pagination for a ListView ordered by ``cursor_ordering``.
+
+    Querysets ordered any other way (e.g. by search rank), and requests for
+    an explicit ``?page=N``, keep the regular OFFSET paginator.
+    """
+    cursor_ordering = ('-created_at', '-id')
+    cursor_estimate_count = True
+
+    def use_cursor_pagination(self, queryset):
+        ordering = tuple(queryset.query.order_by)
+        return (
+            bool(ordering)
+            and ordering == self.cursor_ordering[:len(ordering)]
+            and self.page_kwarg not in self.request.GET
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.use_cursor_pagination(queryset):
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(
+            queryset, page_size, self.cursor_ordering, estimate=self.cursor_estimate_count
+        )
+        page = paginator.page(self.request.GET.get(CURSOR_PARAM), self.request.GET)
+        return (paginator, page, page.object_list, page.has_other_pages())
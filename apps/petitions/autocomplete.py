@@ -0,0 +1,158 @@
+"""
+Petition title autocomplete.
+
+Typeahead used to run a full-text SearchQuery with SearchRank ordering on
+every keystroke; full-text search only matches whole words, so short
+prefixes found little and cost a full ranking. Suggestions now match the
+unaccented, lowercased title (Petition.title_normalized):
+
+    1-2 characters   title_normalized LIKE 'ab%'     btree varchar_pattern_ops index
+    3+ characters    title_normalized LIKE '%abc%'   pg_trgm GIN index
+
+titles starting with the query first, then the most signed.
+
+Results are cached per normalized query in two layers: a per-worker LRU of
+the hottest queries (AUTOCOMPLETE_LOCAL_MAX_ENTRIES, AUTOCOMPLETE_LOCAL_TTL
+seconds) in front of the Django cache, keyed by the search catalog version
+(see search_cache) so petition edits show up within the local TTL. A cache
+miss runs the query under a statement timeout of
+PETITION_AUTOCOMPLETE_BUDGET_MS; a query over budget returns no
+suggestions, which are not cached.
+"""
+import hashlib
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Case, IntegerField, Value, When
+from django.urls import reverse
+
+from apps.core.logging_utils import StructuredLogger
+
+logger = StructuredLogger(__name__)
+
+AUTOCOMPLETE_PREFIX = 'petitions:autocomplete'
+AUTOCOMPLETE_MIN_LENGTH = 2
+AUTOCOMPLETE_TRIGRAM_MIN_LENGTH = 3
+AUTOCOMPLETE_MAX_RESULTS = 10
+
+# Per-worker LRU of hot queries
+AUTOCOMPLETE_LOCAL_MAX_ENTRIES = 1024
+AUTOCOMPLETE_LOCAL_TTL = 30  # seconds
+
+_local_lock = threading.Lock()
+_local_results = OrderedDict()
+
+
+def normalize_text(text):
+    """Lowercase ``text``, strip accents and collapse whitespace."""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.lower().split())
+
+
+def _get_local(query):
+    with _local_lock:
+        entry = _local_results.get(query)
+        if entry is None:
+            return None
+        results, expires_at = entry
+        if expires_at <= time.monotonic():
+            del _local_results[query]
+            return None
+        _local_results.move_to_end(query)
+        return results
+
+
+def _put_local(query, results):
+    with _local_lock:
+        _local_results[query] = (results, time.monotonic() + AUTOCOMPLETE_LOCAL_TTL)
+        _local_results.move_to_end(query)
+        while len(_local_results) > AUTOCOMPLETE_LOCAL_MAX_ENTRIES:
+            _local_results.popitem(last=False)
+
+
+def clear_local_cache():
+    """Forget every suggestion held by this process."""
+    with _local_lock:
+        _local_results.clear()
+
+
+def _cache_key(query):
+    from apps.petitions.search_cache import get_catalog_version
+
+    digest = hashlib.md5(query.encode('utf-8')).hexdigest()
+    return f'{AUTOCOMPLETE_PREFIX}:{get_catalog_version()}:{digest}'
+
+
+def _query_suggestions(query):
+    from apps.petitions.models import Petition
+
+    petitions = Petition.objects.filter(is_active=True, status=Petition.STATUS_ACTIVE)
+    if len(query) < AUTOCOMPLETE_TRIGRAM_MIN_LENGTH:
+        petitions = petitions.filter(title_normalized__startswith=query)
+    else:
+        petitions = petitions.filter(title_normalized__contains=query)
+    rows = petitions.annotate(
+        prefix_match=Case(
+            When(title_normalized__startswith=query, then=Value(0)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    ).order_by('prefix_match', '-signature_count').values(
+        'uuid', 'slug', 'title', 'category__name', 'signature_count'
+    )[:AUTOCOMPLETE_MAX_RESULTS]
+
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SET LOCAL statement_timeout = %s',
+                    [f'{settings.PETITION_AUTOCOMPLETE_BUDGET_MS}ms'],
+                )
+        rows = list(rows)
+
+    return [
+        {
+            'id': str(row['uuid']),
+            'title': row['title'],
+            'category': row['category__name'],
+            'signature_count': row['signature_count'],
+            'url': reverse('petitions:detail', kwargs={'uuid': str(row['uuid']), 'slug': row['slug']}),
+        }
+        for row in rows
+    ]
+
+
+def get_suggestions(query):
+    """
+    Active petitions whose title matches ``query``, best matches first.
+
+    Returns:
+        list: Up to AUTOCOMPLETE_MAX_RESULTS dicts (id, title, category,
+        signature_count, url)
+    """
+    query = normalize_text(query)[:200]
+    if len(query) < AUTOCOMPLETE_MIN_LENGTH:
+        return []
+
+    results = _get_local(query)
+    if results is not None:
+        return results
+
+    key = _cache_key(query)
+    results = cache.get(key)
+    if results is None:
+        try:
+            results = _query_suggestions(query)
+        except DatabaseError as e:
+            # Over the latency budget (statement timeout) or unavailable
+            logger.warning('Autocomplete query failed', query_length=len(query), error=str(e))
+            return []
+        cache.set(key, results, settings.PETITION_AUTOCOMPLETE_CACHE_SECONDS)
+    _put_local(query, results)
+    return results
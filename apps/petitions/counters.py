@@ -0,0 +1,247 @@
+"""
+Buffered petition counters.
+
+Views, shares and approved signatures used to run
+``UPDATE ... SET <count> = <count> + 1`` on the request or approval path,
+serializing writes on the rows of popular petitions. They are now
+accumulated in the cache (an atomic INCR on Redis), one counter per
+petition and field:
+
+    petitions:counters:view_count:{pk}
+    petitions:counters:share_count:{pk}
+    petitions:counters:signature_count:{pk}
+
+and periodic tasks fold them into the Petition columns with one UPDATE per
+chunk of petitions: ``flush_petition_counters`` for views and shares,
+``fold_signature_counts`` (more often) for signatures. A flush subtracts
+what it read (DECR) instead of deleting the key, so increments that land
+while it runs are kept for the next one.
+
+Only petitions with pending increments are flushed. The first increment of
+a petition since its last flush appends its pk to a per-field dirty log
+(numbered slots behind an INCR sequence, as the cache API has no sets):
+
+    petitions:counters:view_count:dirty:seq       last slot written
+    petitions:counters:view_count:dirty:read      last slot flushed
+    petitions:counters:view_count:dirty:{n}       pk
+    petitions:counters:view_count:dirty:pk:{pk}   already in the log
+
+The ``dirty:pk`` marker expires, so a pk whose slot was missed (evicted, or
+read before it was written) is logged again by its next increment.
+
+Signature folds lock the petition rows they update and report the count
+before and after, so milestone detection runs once per crossing on the
+aggregated value, away from the approval path.
+
+Pending increments are lost if the cache is flushed or evicts a key before
+a task runs. For views and shares that is an acceptable trade; signature
+counts are recomputed from the approved signatures by
+``reconcile_signature_counts``.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+COUNTERS_PREFIX = 'petitions:counters'
+BUFFERED_FIELDS = ('view_count', 'share_count')
+SIGNATURE_COUNT_FIELD = 'signature_count'
+FLUSH_CHUNK_SIZE = 500
+DIRTY_MARKER_SECONDS = 300
+DIRTY_SLOT_SECONDS = 24 * 60 * 60
+
+
+def _counter_key(field, petition_pk):
+    return f'{COUNTERS_PREFIX}:{field}:{petition_pk}'
+
+
+def _dirty_key(field, suffix):
+    return f'{COUNTERS_PREFIX}:{field}:dirty:{suffix}'
+
+
+def _incr(key, amount):
+    try:
+        return cache.incr(key, amount)
+    except ValueError:
+        # Missing key; add() loses to a concurrent first increment
+        if cache.add(key, amount, None):
+            return amount
+        return cache.incr(key, amount)
+
+
+def _mark_dirty(field, petition_pk):
+    if cache.add(_dirty_key(field, f'pk:{petition_pk}'), 1, DIRTY_MARKER_SECONDS):
+        slot = _incr(_dirty_key(field, 'seq'), 1)
+        cache.set(_dirty_key(field, slot), petition_pk, DIRTY_SLOT_SECONDS)
+
+
+def buffer_increment(field, petition_pk, amount=1):
+    """
+    Add ``amount`` to the pending counter of a petition.
+
+    Returns:
+        int: increments pending for the petition, including this one
+    """
+    pending = _incr(_counter_key(field, petition_pk), amount)
+    _mark_dirty(field, petition_pk)
+    return pending
+
+
+def get_pending(field, petition_pk):
+    """Increments of ``field`` not yet written to the database."""
+    return cache.get(_counter_key(field, petition_pk)) or 0
+
+
+def _dirty_pks(field):
+    """
+    Take the pks logged since the last flush of ``field``.
+
+    Their markers are cleared first, so an increment landing during the
+    flush logs its pk again.
+    """
+    last = cache.get(_dirty_key(field, 'seq')) or 0
+    start = cache.get(_dirty_key(field, 'read')) or 0
+    if last <= start:
+        return set()
+    slots = [_dirty_key(field, slot) for slot in range(start + 1, last + 1)]
+    pks = set(cache.get_many(slots).values())
+    cache.delete_many([_dirty_key(field, f'pk:{pk}') for pk in pks])
+    cache.set(_dirty_key(field, 'read'), last, None)
+    cache.delete_many(slots)
+    return pks
+
+
+def _claim(key, amount):
+    try:
+        cache.decr(key, amount)
+    except ValueError:
+        # Evicted since it was read; the amount read is still applied
+        pass
+
+
+def _flush_chunk(petition_pks, fields, track=None):
+    """
+    Claim the pending increments of ``fields`` and apply them in one UPDATE.
+
+    With ``track``, the rows are locked first and the value of that field
+    before the update is returned as well.
+
+    Returns:
+        tuple: ({field: {pk: amount}}, {pk: value before} or None)
+    """
+    from apps.petitions.models import Petition
+
+    keys = {
+        _counter_key(field, pk): (field, pk)
+        for field in fields
+        for pk in petition_pks
+    }
+    pending = {key: amount for key, amount in cache.get_many(list(keys)).items() if amount}
+    if not pending:
+        return {}, None
+
+    deltas = {}
+    for key, amount in pending.items():
+        _claim(key, amount)
+        field, pk = keys[key]
+        deltas.setdefault(field, {})[pk] = amount
+
+    updates = {
+        field: F(field) + Case(
+            *[When(pk=pk, then=Value(amount)) for pk, amount in by_pk.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        for field, by_pk in deltas.items()
+    }
+    touched = {pk for by_pk in deltas.values() for pk in by_pk}
+    before = None
+    rows = Petition.objects.filter(pk__in=touched)
+    try:
+        if track:
+            with transaction.atomic():
+                before = dict(rows.select_for_update().values_list('pk', track))
+                rows.update(**updates)
+        else:
+            rows.update(**updates)
+    except Exception:
+        # Put the claimed increments back for the next flush
+        for key, amount in pending.items():
+            buffer_increment(*keys[key], amount)
+        raise
+
+    return deltas, before
+
+
+def _chunks(petition_pks, chunk_size):
+    petition_pks = sorted(petition_pks)
+    for start in range(0, len(petition_pks), chunk_size):
+        yield petition_pks[start:start + chunk_size]
+
+
+def flush_counters(chunk_size=FLUSH_CHUNK_SIZE):
+    """
+    Write pending view/share increments to the database.
+
+    Only petitions in the dirty logs are read, with one get_many per chunk.
+
+    Returns:
+        dict: 'petitions' updated and total 'view_count'/'share_count' flushed
+    """
+    totals = {'petitions': 0, **{field: 0 for field in BUFFERED_FIELDS}}
+    petition_pks = set().union(*(_dirty_pks(field) for field in BUFFERED_FIELDS))
+    for chunk in _chunks(petition_pks, chunk_size):
+        deltas, _ = _flush_chunk(chunk, BUFFERED_FIELDS)
+        totals['petitions'] += len({pk for by_pk in deltas.values() for pk in by_pk})
+        for field, by_pk in deltas.items():
+            totals[field] += sum(by_pk.values())
+    return totals
+
+
+def fold_signature_counts(chunk_size=FLUSH_CHUNK_SIZE):
+    """
+    Write pending approved-signature increments to signature_count.
+
+    Returns:
+        dict: {pk: (signature_count before, signature_count after)} of the
+        petitions that changed
+    """
+    changes = {}
+    for chunk in _chunks(_dirty_pks(SIGNATURE_COUNT_FIELD), chunk_size):
+        deltas, before = _flush_chunk(chunk, (SIGNATURE_COUNT_FIELD,), track=SIGNATURE_COUNT_FIELD)
+        for pk, amount in deltas.get(SIGNATURE_COUNT_FIELD, {}).items():
+            if pk in before:
+                changes[pk] = (before[pk], before[pk] + amount)
+    return changes
+
+
+def reconcile_signature_counts():
+    """
+    Recompute signature_count from the approved signatures.
+
+    Repairs counts whose buffered increments were lost with the cache.
+    Increments still pending are left to the fold: a petition is corrected
+    to its approved count minus them, and only if no fold changed it
+    meanwhile.
+
+    Returns:
+        dict: {pk: (signature_count before, signature_count after)} of the
+        petitions corrected
+    """
+    from apps.petitions.models import Petition
+    from apps.signatures.models import Signature
+
+    approved = Signature.objects.filter(
+        petition=OuterRef('pk'),
+        verification_status=Signature.STATUS_APPROVED,
+    ).order_by().values('petition').annotate(total=Count('pk')).values('total')
+    mismatched = Petition.objects.annotate(
+        approved=Coalesce(Subquery(approved, output_field=IntegerField()), 0)
+    ).exclude(signature_count=F('approved')).values_list('pk', 'signature_count', 'approved')
+
+    corrected = {}
+    for pk, count, approved_count in mismatched:
+        expected = max(approved_count - get_pending(SIGNATURE_COUNT_FIELD, pk), 0)
+        if expected != count and Petition.objects.filter(pk=pk, signature_count=count).update(signature_count=expected):
+            corrected[pk] = (count, expected)
+    return corrected
@@ -0,0 +1,114 @@
+"""
+Caching of the public petition detail page.
+
+Every petition has two version stamps in the cache:
+
+    petitions:detail:content_version:{uuid}      bumped by Petition.save (edits, status)
+    petitions:detail:signatures_version:{uuid}   bumped when a signature is approved
+
+The stamps are part of every cache key below, so bumping one invalidates
+the matching entries at once; the old entries simply expire. Stamps are
+random tokens rather than counters, so a stamp lost to eviction never
+comes back to a value an old entry was stored under.
+
+    petitions:detail:petition:{uuid}:{content}                petition with category/creator
+    petitions:detail:page:{uuid}:{content}:{signatures}:...   full page for anonymous visitors
+
+The template caches its fragments with ``{% cache %}`` keyed the same way:
+the petition body and SEO tags on the content stamp, the signature count
+and recent signers on the signatures stamp. An approval during a traffic
+spike therefore re-renders only those two fragments once.
+"""
+import hashlib
+import uuid as uuid_lib
+
+from django.conf import settings
+from django.core.cache import cache
+
+DETAIL_CACHE_PREFIX = 'petitions:detail'
+
+
+def _content_version_key(petition_uuid):
+    return f'{DETAIL_CACHE_PREFIX}:content_version:{petition_uuid}'
+
+
+def _signatures_version_key(petition_uuid):
+    return f'{DETAIL_CACHE_PREFIX}:signatures_version:{petition_uuid}'
+
+
+def _new_stamp():
+    return uuid_lib.uuid4().hex[:12]
+
+
+def get_versions(petition_uuid):
+    """
+    Current (content, signatures) stamps of a petition, created on first use.
+
+    Returns:
+        tuple: (content_version, signatures_version)
+    """
+    keys = [_content_version_key(petition_uuid), _signatures_version_key(petition_uuid)]
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            cache.add(key, _new_stamp(), None)
+            values[key] = cache.get(key)
+    return values[keys[0]], values[keys[1]]
+
+
+def bump_content_version(petition_uuid):
+    """Invalidate every cached rendering of the petition (edit, status change)."""
+    cache.set(_content_version_key(petition_uuid), _new_stamp(), None)
+
+
+def bump_signatures_version(petition_uuid):
+    """Invalidate the signature count and recent signers (signature approved)."""
+    cache.set(_signatures_version_key(petition_uuid), _new_stamp(), None)
+
+
+def _petition_key(petition_uuid, content_version):
+    return f'{DETAIL_CACHE_PREFIX}:petition:{petition_uuid}:{content_version}'
+
+
+def get_cached_petition(petition_uuid, content_version):
+    """
+    The petition with its category and creator, or None if it doesn't exist.
+
+    Counters on the cached instance (signature_count, view_count) may lag;
+    the page reads the live signature count inside its volatile fragments.
+    """
+    from apps.petitions.models import Petition
+
+    key = _petition_key(petition_uuid, content_version)
+    petition = cache.get(key)
+    if petition is None:
+        petition = Petition.objects.select_related('category', 'creator').filter(
+            uuid=petition_uuid
+        ).first()
+        if petition is None:
+            return None
+        cache.set(key, petition, settings.PETITION_DETAIL_CACHE_SECONDS)
+    return petition
+
+
+def page_cache_key(request, petition_uuid, versions):
+    host = hashlib.md5(f'{request.scheme}://{request.get_host()}'.encode('utf-8')).hexdigest()[:8]
+    return f'{DETAIL_CACHE_PREFIX}:page:{petition_uuid}:{versions[0]}:{versions[1]}:{host}'
+
+
+def get_cached_page(page_key, petition_uuid, content_version):
+    """
+    Cached anonymous rendering and the petition it shows, in one cache read.
+
+    Returns:
+        tuple: (content, petition), or (None, None) on a miss
+    """
+    petition_key = _petition_key(petition_uuid, content_version)
+    values = cache.get_many([page_key, petition_key])
+    if page_key not in values or petition_key not in values:
+        return None, None
+    return values[page_key], values[petition_key]
+
+
+def store_page(page_key, content):
+    cache.set(page_key, content, settings.PETITION_DETAIL_CACHE_SECONDS)
@@ -0,0 +1,87 @@
+"""
+Per-petition approved-signature counts by state and city.
+
+The state/city filters of the petition list and the staff statistics of
+the signatures page used to join and group the signatures table on every
+request. PetitionGeoStat keeps one row per (petition, state, city) instead,
+incremented as signatures are approved (Signature.approve and the batch
+verification task) and rebuilt from the approved signatures by
+``rebuild_geo_stats`` (``manage.py rebuild_geo_stats``) when they drift,
+e.g. after signatures are deleted or approved in bulk.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import Trim
+
+
+def _normalize_city(city):
+    return (city or '').strip()
+
+
+def record_approved_signatures(signatures):
+    """
+    Add approved signatures to their petitions' state/city counts.
+
+    One UPDATE per distinct (petition, state, city), creating the row on
+    the first approval from that city.
+    """
+    from apps.petitions.models import PetitionGeoStat
+
+    counts = Counter(
+        (signature.petition_id, signature.state, _normalize_city(signature.city))
+        for signature in signatures
+    )
+    # Sorted, so concurrent batches lock rows in the same order
+    for (petition_id, state, city), amount in sorted(counts.items()):
+        rows = PetitionGeoStat.objects.filter(petition_id=petition_id, state=state, city=city)
+        if rows.update(signature_count=F('signature_count') + amount):
+            continue
+        try:
+            with transaction.atomic():
+                PetitionGeoStat.objects.create(
+                    petition_id=petition_id, state=state, city=city, signature_count=amount
+                )
+        except IntegrityError:
+            # Created by a concurrent approval
+            rows.update(signature_count=F('signature_count') + amount)
+
+
+def rebuild_geo_stats(petition_ids=None):
+    """
+    Recompute the state/city counts from the approved signatures.
+
+    Args:
+        petition_ids: Petitions to rebuild (all if None)
+
+    Returns:
+        int: Rows written
+    """
+    from apps.petitions.models import PetitionGeoStat
+    from apps.signatures.models import Signature
+
+    signatures = Signature.objects.filter(verification_status=Signature.STATUS_APPROVED)
+    stats = PetitionGeoStat.objects.all()
+    if petition_ids is not None:
+        signatures = signatures.filter(petition_id__in=petition_ids)
+        stats = stats.filter(petition_id__in=petition_ids)
+
+    rows = signatures.annotate(city_name=Trim('city')).values(
+        'petition_id', 'state', 'city_name'
+    ).annotate(total=Count('id')).order_by()
+    with transaction.atomic():
+        stats.delete()
+        created = PetitionGeoStat.objects.bulk_create(
+            (
+                PetitionGeoStat(
+                    petition_id=row['petition_id'],
+                    state=row['state'],
+                    city=row['city_name'],
+                    signature_count=row['total'],
+                )
+                for row in rows.iterator()
+            ),
+            batch_size=1000,
+        )
+    return len(created)
@@ -0,0 +1,36 @@
+"""
+Django management command to rebuild the per-petition state/city signature counts.
+Usage: python manage.py rebuild_geo_stats [--petition <uuid> ...]
+"""
+from django.core.management.base import BaseCommand
+from apps.petitions.geo_stats import rebuild_geo_stats
+from apps.petitions.models import Petition
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the state/city signature counts from the approved signatures'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--petition',
+            action='append',
+            dest='petitions',
+            metavar='UUID',
+            help='Only rebuild this petition (can be repeated)',
+        )
+
+    def handle(self, *args, **options):
+        petition_ids = None
+        if options['petitions']:
+            petition_ids = list(
+                Petition.objects.filter(uuid__in=options['petitions']).values_list('pk', flat=True)
+            )
+            self.stdout.write(f'Rebuilding state/city counts for {len(petition_ids)} petition(s)...')
+        else:
+            self.stdout.write('Rebuilding state/city counts for ALL petitions...')
+        
+        rows = rebuild_geo_stats(petition_ids)
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Wrote {rows} state/city count rows!')
+        )
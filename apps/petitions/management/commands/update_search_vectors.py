@@ -1,40 +1,45 @@
 """
-Django management command to update search vectors for all petitions.
-Usage: python manage.py update_search_vectors
+Django management command to rebuild the search vectors of all petitions.
+Usage: python manage.py update_search_vectors [--chunk-size 1000] [--pause 0]
+
+Vectors are kept up to date by a database trigger (see
+apps.petitions.search_index); this is only needed after changing how they
+are computed.
 """
 from django.core.management.base import BaseCommand
-from django.contrib.postgres.search import SearchVector
-from apps.petitions.models import Petition
+from django.db import connection
+
+from apps.petitions.search_index import REBUILD_CHUNK_SIZE, rebuild_search_vectors
 
 
 class Command(BaseCommand):
-    help = 'Update search vectors for all petitions'
+    help = 'Rebuild search vectors for all petitions in small transactions'
 
     def add_arguments(self, parser):
         parser.add_argument(
-            '--all',
-            action='store_true',
-            help='Update all petitions (including inactive)',
+            '--chunk-size',
+            type=int,
+            default=REBUILD_CHUNK_SIZE,
+            help=f'Petition ids updated per transaction (default: {REBUILD_CHUNK_SIZE})',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Seconds to sleep between chunks (default: 0)',
         )
 
     def handle(self, *args, **options):
-        if options['all']:
-            petitions = Petition.objects.all()
-            self.stdout.write('Updating search vectors for ALL petitions...')
-        else:
-            petitions = Petition.objects.filter(is_active=True)
-            self.stdout.write('Updating search vectors for active petitions...')
-        
-        total = petitions.count()
-        self.stdout.write(f'Total petitions to update: {total}')
-        
-        # Update in bulk
-        petitions.update(
-            search_vector=SearchVector('title', weight='A') + 
-                         SearchVector('description', weight='B') +
-                         SearchVector('category__name', weight='C')
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING('Full-text search requires PostgreSQL; nothing to do.'))
+            return
+
+        self.stdout.write('Rebuilding search vectors for ALL petitions...')
+        total = rebuild_search_vectors(
+            chunk_size=options['chunk_size'],
+            pause=options['pause'],
         )
-        
+
         self.stdout.write(
             self.style.SUCCESS(f'✓ Successfully updated {total} petition search vectors!')
         )
@@ -0,0 +1,34 @@
+# Generated by Django 5.1 on 2026-10-16 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('petitions', '0003_petition_pdf_file_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkDownloadChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveIntegerField(help_text='Número sequencial da parte (1, 2, 3...)', verbose_name='Parte')),
+                ('file_path', models.CharField(help_text='Caminho do ZIP no armazenamento (bulk_downloads/)', max_length=500, verbose_name='Arquivo')),
+                ('signature_count', models.PositiveIntegerField(default=0, verbose_name='Assinaturas na parte')),
+                ('size_bytes', models.PositiveBigIntegerField(default=0, verbose_name='Tamanho (bytes)')),
+                ('last_verified_at', models.DateTimeField(verbose_name='Verificação da última assinatura')),
+                ('last_signature_id', models.BigIntegerField(verbose_name='ID da última assinatura')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('petition', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bulk_download_chunks', to='petitions.petition', verbose_name='Petição')),
+            ],
+            options={
+                'verbose_name': 'Parte de pacote de assinaturas',
+                'verbose_name_plural': 'Partes de pacotes de assinaturas',
+                'ordering': ['petition', 'sequence'],
+                'constraints': [models.UniqueConstraint(fields=('petition', 'sequence'), name='unique_bulk_download_chunk_sequence')],
+            },
+        ),
+    ]
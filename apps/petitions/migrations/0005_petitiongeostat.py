@@ -0,0 +1,90 @@
+# Generated by Django 5.1.12 on 2026-10-16 22:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Trim
+
+
+def populate_geo_stats(apps, schema_editor):
+    Signature = apps.get_model("signatures", "Signature")
+    PetitionGeoStat = apps.get_model("petitions", "PetitionGeoStat")
+    rows = (
+        Signature.objects.filter(verification_status="approved")
+        .annotate(city_name=Trim("city"))
+        .values("petition_id", "state", "city_name")
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+    PetitionGeoStat.objects.bulk_create(
+        (
+            PetitionGeoStat(
+                petition_id=row["petition_id"],
+                state=row["state"],
+                city=row["city_name"],
+                signature_count=row["total"],
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("petitions", "0004_bulkdownloadchunk"),
+        ("signatures", "0006_signature_cursor_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PetitionGeoStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("state", models.CharField(max_length=2, verbose_name="Estado")),
+                ("city", models.CharField(max_length=100, verbose_name="Cidade")),
+                (
+                    "signature_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Assinaturas aprovadas"
+                    ),
+                ),
+                (
+                    "petition",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="geo_stats",
+                        to="petitions.petition",
+                        verbose_name="Petição",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Assinaturas por cidade",
+                "verbose_name_plural": "Assinaturas por cidade",
+                "ordering": ["petition", "state", "city"],
+                "indexes": [
+                    models.Index(
+                        fields=["state", "petition"],
+                        name="petitions_p_state_53a5d8_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("petition", "state", "city"),
+                        name="unique_petition_geo_stat",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_geo_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.1.12 on 2026-10-16 22:51
+
+import unicodedata
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+def normalize_titles(apps, schema_editor):
+    Petition = apps.get_model("petitions", "Petition")
+    petitions = []
+    for petition in Petition.objects.only("id", "title").iterator():
+        decomposed = unicodedata.normalize("NFKD", petition.title or "")
+        stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+        petition.title_normalized = " ".join(stripped.lower().split())
+        petitions.append(petition)
+    Petition.objects.bulk_update(petitions, ["title_normalized"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_moderationlog"),
+        ("petitions", "0005_petitiongeostat"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="petition",
+            name="title_normalized",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text="Título sem acentos e em minúsculas, para o autocompletar (gerado automaticamente)",
+                max_length=200,
+                verbose_name="Título normalizado",
+            ),
+        ),
+        migrations.RunPython(normalize_titles, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="petition",
+            index=models.Index(
+                fields=["title_normalized"],
+                name="petition_title_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="petition",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["title_normalized"],
+                name="petition_title_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
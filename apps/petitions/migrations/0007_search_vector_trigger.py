@@ -0,0 +1,88 @@
+from django.db import migrations
+
+# Keep the configuration in sync with apps.petitions.search_index.SEARCH_CONFIG
+CREATE_SQL = """
+CREATE OR REPLACE FUNCTION petition_search_vector(p_title text, p_description text, p_category_id bigint)
+RETURNS tsvector LANGUAGE sql STABLE AS $$
+    SELECT setweight(to_tsvector('portuguese'::regconfig, coalesce(p_title, '')), 'A')
+        || setweight(to_tsvector('portuguese'::regconfig, coalesce(p_description, '')), 'B')
+        || setweight(to_tsvector('portuguese'::regconfig, coalesce(
+               (SELECT name FROM core_category WHERE id = p_category_id), '')), 'C')
+$$;
+
+CREATE OR REPLACE FUNCTION petitions_petition_search_vector_trigger()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND OLD.search_vector IS NOT NULL
+       AND NEW.title IS NOT DISTINCT FROM OLD.title
+       AND NEW.description IS NOT DISTINCT FROM OLD.description
+       AND NEW.category_id IS NOT DISTINCT FROM OLD.category_id THEN
+        -- Django writes every column on save; keep the stored vector
+        NEW.search_vector := OLD.search_vector;
+    ELSE
+        NEW.search_vector := petition_search_vector(NEW.title, NEW.description, NEW.category_id);
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+CREATE TRIGGER petitions_petition_search_vector
+BEFORE INSERT OR UPDATE OF title, description, category_id ON petitions_petition
+FOR EACH ROW EXECUTE FUNCTION petitions_petition_search_vector_trigger();
+
+CREATE OR REPLACE FUNCTION core_category_search_vector_trigger()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF NEW.name IS DISTINCT FROM OLD.name THEN
+        UPDATE petitions_petition
+        SET search_vector = petition_search_vector(title, description, category_id)
+        WHERE category_id = NEW.id;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER core_category_search_vector
+AFTER UPDATE OF name ON core_category
+FOR EACH ROW EXECUTE FUNCTION core_category_search_vector_trigger();
+"""
+
+DROP_SQL = """
+DROP TRIGGER IF EXISTS core_category_search_vector ON core_category;
+DROP FUNCTION IF EXISTS core_category_search_vector_trigger();
+DROP TRIGGER IF EXISTS petitions_petition_search_vector ON petitions_petition;
+DROP FUNCTION IF EXISTS petitions_petition_search_vector_trigger();
+DROP FUNCTION IF EXISTS petition_search_vector(text, text, bigint);
+"""
+
+
+def create_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(CREATE_SQL)
+    # Vectors missing so far; `manage.py update_search_vectors` rebuilds the
+    # rest in small chunks
+    schema_editor.execute(
+        "UPDATE petitions_petition "
+        "SET search_vector = petition_search_vector(title, description, category_id) "
+        "WHERE search_vector IS NULL"
+    )
+
+
+def drop_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_moderationlog"),
+        ("petitions", "0006_petition_title_normalized"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigger, drop_trigger),
+    ]
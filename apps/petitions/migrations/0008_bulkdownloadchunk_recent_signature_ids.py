@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('petitions', '0007_search_vector_trigger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulkdownloadchunk',
+            name='recent_signature_ids',
+            field=models.JSONField(blank=True, default=list, help_text='IDs das assinaturas da parte verificadas na janela antes do cursor', verbose_name='Assinaturas recentes da parte'),
+        ),
+    ]
@@ -8,9 +8,8 @@ from django.conf import settings
 from django.utils import timezone
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.postgres.indexes import GinIndex
-from django.db.models import Value
 from apps.core.logging_utils import StructuredLogger, log_model_event
 
 logger = StructuredLogger(__name__)
@@ -182,7 +181,7 @@ class Petition(models.Model):
         help_text="Notas internas para moderadores"
     )
     
-    # Full-text search
+    # Full-text search, maintained by a database trigger (see search_index)
     search_vector = SearchVectorField(
         null=True,
         blank=True,
@@ -190,6 +189,15 @@ class Petition(models.Model):
         help_text="Campo de busca full-text (gerado automaticamente)"
     )
     
+    # Autocomplete
+    title_normalized = models.CharField(
+        max_length=200,
+        blank=True,
+        editable=False,
+        verbose_name="Título normalizado",
+        help_text="Título sem acentos e em minúsculas, para o autocompletar (gerado automaticamente)"
+    )
+    
     class Meta:
         verbose_name = "Petição"
         verbose_name_plural = "Petições"
@@ -202,6 +210,11 @@ class Petition(models.Model):
             models.Index(fields=['uuid']),
             models.Index(fields=['deadline']),
             GinIndex(fields=['search_vector'], name='petition_search_idx'),
+            # Autocomplete: prefix (LIKE 'abc%') and substring (LIKE '%abc%') matches
+            models.Index(fields=['title_normalized'], name='petition_title_prefix_idx',
+                         opclasses=['varchar_pattern_ops']),
+            GinIndex(fields=['title_normalized'], name='petition_title_trgm_idx',
+                     opclasses=['gin_trgm_ops']),
         ]
         constraints = [
             models.CheckConstraint(
@@ -213,7 +226,24 @@ class Petition(models.Model):
     def __str__(self):
         return self.title
     
+    _loaded_status = None
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'status' in field_names:
+            instance._loaded_status = values[field_names.index('status')]
+        return instance
+    
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        if fields is None or 'status' in fields:
+            self._loaded_status = self.status
+    
     def save(self, *args, **kwargs):
+        from apps.petitions.autocomplete import normalize_text
+        self.title_normalized = normalize_text(self.title)
+        
         # Generate slug from title
         if not self.slug:
             base_slug = slugify(self.title)[:200]
@@ -240,22 +270,14 @@ class Petition(models.Model):
             if self.status == self.STATUS_ACTIVE:
                 self.status = self.STATUS_COMPLETED
         
-        # Update search vector
-        skip_search_update = kwargs.pop('skip_search_update', False)
-        
-        # Track if this is a new instance
+        # Track if this is a new instance; the old status is the one loaded
+        # from the database (see from_db), so saving costs no extra SELECT
         is_new = self.pk is None
-        old_status = None
-        
-        if not is_new:
-            # Get old status before save
-            try:
-                old_instance = Petition.objects.get(pk=self.pk)
-                old_status = old_instance.status
-            except Petition.DoesNotExist:
-                pass
+        old_status = None if is_new else self._loaded_status
         
+        # search_vector is maintained by a database trigger
         super().save(*args, **kwargs)
+        self._loaded_status = self.status
         
         # Log lifecycle events
         if is_new:
@@ -276,25 +298,19 @@ class Petition(models.Model):
                 signature_count=self.signature_count
             )
         
-        if not skip_search_update:
-            self.update_search_vector()
-    
-    def update_search_vector(self):
-        """Update the search vector for full-text search"""
-        # Skip search vector update for SQLite (testing)
-        from django.conf import settings
-        if 'sqlite' in settings.DATABASES['default']['ENGINE']:
-            return
-            
-        # Get category name to avoid join in update query
-        category_name = self.category.name if self.category else ''
+        # Drop cached renderings of the detail page
+        from apps.petitions.detail_cache import bump_content_version
+        bump_content_version(self.uuid)
         
-        self.search_vector = (
-            SearchVector(Value(self.title), weight='A', config='portuguese') + 
-            SearchVector(Value(self.description), weight='B', config='portuguese') +
-            SearchVector(Value(category_name), weight='C', config='portuguese')
-        )
-        Petition.objects.filter(pk=self.pk).update(search_vector=self.search_vector)
+        # Drop cached search results
+        from apps.petitions.search_cache import bump_catalog_version
+        bump_catalog_version()
+        
+        # Keep the homepage active-petition counter and lists current
+        if (old_status == self.STATUS_ACTIVE) != (self.status == self.STATUS_ACTIVE):
+            from apps.petitions.site_stats import adjust_site_stats, invalidate_home_sections
+            adjust_site_stats(petitions=1 if self.status == self.STATUS_ACTIVE else -1)
+            invalidate_home_sections()
     
     def get_absolute_url(self):
         from django.urls import reverse
@@ -398,18 +414,38 @@ class Petition(models.Model):
         # Fallback to stored URL (for backwards compatibility)
         return self.pdf_url
     
-    def increment_signature_count(self):
-        """Safely increment signature count and check for milestones"""
-        old_count = self.signature_count
+    def increment_signature_count(self, amount=1):
+        """
+        Count approved signatures.
+        
+        With SIGNATURE_COUNT_BUFFERED, the increment is buffered in the
+        cache and folded into signature_count by the periodic
+        fold_signature_counts task, which also checks milestones, so
+        approvals never wait on the petition row. The site statistics and
+        the detail page reflect it immediately. Otherwise (no beat outside
+        production) it is folded right away.
         
-        self.__class__.objects.filter(pk=self.pk).update(
-            signature_count=models.F('signature_count') + 1
-        )
-        self.refresh_from_db()
+        Returns:
+            int: approvals not yet written to signature_count, including these
+        """
+        from apps.petitions.counters import buffer_increment
+        from apps.petitions.detail_cache import bump_signatures_version
+        from apps.petitions.site_stats import adjust_site_stats
         
-        # Check if we hit a milestone (25%, 50%, 75%, 100%)
+        pending = buffer_increment('signature_count', self.pk, amount)
+        adjust_site_stats(signatures=amount)
+        bump_signatures_version(self.uuid)
+        if not settings.SIGNATURE_COUNT_BUFFERED:
+            from apps.petitions.tasks import fold_signature_counts
+            fold_signature_counts()
+            self.refresh_from_db(fields=['signature_count'])
+            return 0
+        return pending
+    
+    def check_milestones(self, old_count, new_count):
+        """Notify milestones (25%, 50%, 75%, 100%) crossed going from old_count to new_count"""
         old_progress = int((old_count / self.signature_goal) * 100) if self.signature_goal > 0 else 0
-        new_progress = int((self.signature_count / self.signature_goal) * 100) if self.signature_goal > 0 else 0
+        new_progress = int((new_count / self.signature_goal) * 100) if self.signature_goal > 0 else 0
         
         milestones = [25, 50, 75, 100]
         for milestone in milestones:
@@ -435,7 +471,7 @@ class Petition(models.Model):
                         extra={
                             'petition_id': str(self.uuid),
                             'milestone': f'{milestone}_percent',
-                            'signature_count': self.signature_count,
+                            'signature_count': new_count,
                             'category': self.category.name if self.category else 'uncategorized',
                             'event_type': 'petition_milestone'
                         }
@@ -444,16 +480,24 @@ class Petition(models.Model):
                     pass  # Don't fail if analytics tracking fails
     
     def increment_view_count(self):
-        """Safely increment view count (atomic operation)"""
-        self.__class__.objects.filter(pk=self.pk).update(
-            view_count=models.F('view_count') + 1
-        )
+        """
+        Count a view.
+        
+        Buffered in the cache and written by the flush_petition_counters
+        task, so view_count in the database lags by up to one flush.
+        """
+        from apps.petitions.counters import buffer_increment
+        return buffer_increment('view_count', self.pk)
     
     def increment_share_count(self):
-        """Safely increment share count (atomic operation)"""
-        self.__class__.objects.filter(pk=self.pk).update(
-            share_count=models.F('share_count') + 1
-        )
+        """
+        Count a share (buffered like increment_view_count).
+        
+        Returns:
+            int: shares not yet written to share_count, including this one
+        """
+        from apps.petitions.counters import buffer_increment
+        return buffer_increment('share_count', self.pk)
 
 
 class FlaggedContent(models.Model):
@@ -617,3 +661,127 @@ class FlaggedContent(models.Model):
         self.reviewed_at = timezone.now()
         self.review_notes = notes
         self.save()
+
+
+class BulkDownloadChunk(models.Model):
+    """
+    One uploaded part of a petition's bulk signature package.
+    
+    Each part holds the signatures approved after the previous part, in
+    (verified_at, id) order, so repeat downloads only package new
+    signatures and reuse the parts already in storage. Approvals can
+    commit after a later one was packaged, so the next part looks back a
+    window before the cursor and skips the ids in ``recent_signature_ids``.
+    """
+    
+    petition = models.ForeignKey(
+        'Petition',
+        on_delete=models.CASCADE,
+        related_name='bulk_download_chunks',
+        verbose_name="Petição"
+    )
+    
+    sequence = models.PositiveIntegerField(
+        verbose_name="Parte",
+        help_text="Número sequencial da parte (1, 2, 3...)"
+    )
+    
+    file_path = models.CharField(
+        max_length=500,
+        verbose_name="Arquivo",
+        help_text="Caminho do ZIP no armazenamento (bulk_downloads/)"
+    )
+    
+    signature_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Assinaturas na parte"
+    )
+    
+    size_bytes = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name="Tamanho (bytes)"
+    )
+    
+    # Cursor: last signature included in this part
+    last_verified_at = models.DateTimeField(
+        verbose_name="Verificação da última assinatura"
+    )
+    
+    last_signature_id = models.BigIntegerField(
+        verbose_name="ID da última assinatura"
+    )
+    
+    recent_signature_ids = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name="Assinaturas recentes da parte",
+        help_text="IDs das assinaturas da parte verificadas na janela antes do cursor"
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Criado em"
+    )
+    
+    class Meta:
+        verbose_name = "Parte de pacote de assinaturas"
+        verbose_name_plural = "Partes de pacotes de assinaturas"
+        ordering = ['petition', 'sequence']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['petition', 'sequence'],
+                name='unique_bulk_download_chunk_sequence'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.petition.title} - parte {self.sequence}"
+
+
+class PetitionGeoStat(models.Model):
+    """
+    Approved signatures of a petition from one city.
+    
+    Maintained as signatures are approved (see geo_stats), so the list
+    filters and the signature statistics read these rows instead of
+    grouping the signatures table.
+    """
+    
+    petition = models.ForeignKey(
+        'Petition',
+        on_delete=models.CASCADE,
+        related_name='geo_stats',
+        verbose_name="Petição"
+    )
+    
+    state = models.CharField(
+        max_length=2,
+        verbose_name="Estado"
+    )
+    
+    city = models.CharField(
+        max_length=100,
+        verbose_name="Cidade"
+    )
+    
+    signature_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Assinaturas aprovadas"
+    )
+    
+    class Meta:
+        verbose_name = "Assinaturas por cidade"
+        verbose_name_plural = "Assinaturas por cidade"
+        ordering = ['petition', 'state', 'city']
+        indexes = [
+            models.Index(fields=['state', 'petition']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['petition', 'state', 'city'],
+                name='unique_petition_geo_stat'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.petition_id} - {self.city}/{self.state}: {self.signature_count}"
@@ -0,0 +1,88 @@
+"""
+Caching of petition list search results.
+
+A search (``?q=``) ran the full-text query, a COUNT(*) for the paginator
+and another count for analytics on every hit. The matching petition ids,
+in result order, are now cached together with the total and the number of
+results per category:
+
+    petitions:search:catalog_version                    bumped by Petition.save
+    petitions:search:results:{catalog}:{digest}         {'ids', 'count', 'facets'}
+
+``digest`` hashes the normalized query, filters and sort; every page of a
+search is served from the same entry. The catalog stamp invalidates all
+entries when a petition is created, edited or changes status. Signature
+counts change without a save, so results sorted or filtered by them may
+lag by up to PETITION_SEARCH_CACHE_SECONDS.
+"""
+import hashlib
+import json
+import uuid as uuid_lib
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+SEARCH_CACHE_PREFIX = 'petitions:search'
+CATALOG_VERSION_KEY = f'{SEARCH_CACHE_PREFIX}:catalog_version'
+# Result ids kept per search; deeper pages of broader searches are not served
+SEARCH_CACHE_MAX_RESULTS = 1000
+
+
+def get_catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, uuid_lib.uuid4().hex[:12], None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidate every cached search (petition created, edited or closed)."""
+    cache.set(CATALOG_VERSION_KEY, uuid_lib.uuid4().hex[:12], None)
+
+
+def normalize_search(cleaned_data):
+    """Search form data reduced to what changes the results."""
+    categories = cleaned_data.get('categories') or []
+    return {
+        'q': ' '.join((cleaned_data.get('q') or '').lower().split()),
+        'categories': sorted(category.pk for category in categories),
+        'status': cleaned_data.get('status') or '',
+        'min_signatures': cleaned_data.get('min_signatures'),
+        'state': cleaned_data.get('state') or '',
+        'city': (cleaned_data.get('city') or '').strip().lower(),
+        'sort': cleaned_data.get('sort') or '',
+    }
+
+
+def search_cache_key(cleaned_data):
+    normalized = json.dumps(normalize_search(cleaned_data), sort_keys=True)
+    digest = hashlib.md5(normalized.encode('utf-8')).hexdigest()
+    return f'{SEARCH_CACHE_PREFIX}:results:{get_catalog_version()}:{digest}'
+
+
+def get_search_results(cleaned_data, queryset):
+    """
+    Ids, total and category counts of a search, from the cache if possible.
+
+    ``queryset`` is only evaluated on a miss, with one query (plus a
+    COUNT(*) for searches matching more than SEARCH_CACHE_MAX_RESULTS).
+
+    Returns:
+        dict: 'ids' (result order), 'count' and 'facets' ({category_id: n}
+        among the ids)
+    """
+    key = search_cache_key(cleaned_data)
+    results = cache.get(key)
+    if results is None:
+        rows = list(queryset.values_list('pk', 'category_id')[:SEARCH_CACHE_MAX_RESULTS + 1])
+        truncated = len(rows) > SEARCH_CACHE_MAX_RESULTS
+        rows = rows[:SEARCH_CACHE_MAX_RESULTS]
+        results = {
+            'ids': [pk for pk, _ in rows],
+            'count': queryset.count() if truncated else len(rows),
+            'facets': dict(Counter(category_id for _, category_id in rows if category_id)),
+        }
+        cache.set(key, results, settings.PETITION_SEARCH_CACHE_SECONDS)
+    return results
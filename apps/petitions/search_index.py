@@ -0,0 +1,66 @@
+"""
+Full-text search vector of petitions, maintained by PostgreSQL.
+
+Petition.save used to rebuild the vector in Python and write it with a
+second UPDATE on every save (status changes, moderation notes and view
+bookkeeping included). A BEFORE INSERT OR UPDATE OF title, description,
+category_id trigger (migration 0007_search_vector_trigger) now computes it
+in the same statement, only when the indexed text changes:
+
+    title          weight A
+    description    weight B
+    category name  weight C    (renaming a category refreshes its petitions)
+
+all with the SEARCH_CONFIG text search configuration used by the list
+search. ``rebuild_search_vectors`` (``manage.py update_search_vectors``)
+recomputes every vector in primary key ranges, one short transaction per
+chunk, e.g. after the configuration changes.
+"""
+import time
+
+from django.db import connection, transaction
+from django.db.models import Max, Min
+
+from apps.core.logging_utils import StructuredLogger
+
+logger = StructuredLogger(__name__)
+
+SEARCH_CONFIG = 'portuguese'
+REBUILD_CHUNK_SIZE = 1000
+
+
+def rebuild_search_vectors(chunk_size=REBUILD_CHUNK_SIZE, pause=0):
+    """
+    Recompute the search vector of every petition.
+
+    Args:
+        chunk_size: Primary key range updated per transaction
+        pause: Seconds to sleep between chunks
+
+    Returns:
+        int: Petitions updated (0 when the database is not PostgreSQL)
+    """
+    from apps.petitions.models import Petition
+
+    if connection.vendor != 'postgresql':
+        return 0
+
+    bounds = Petition.objects.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return 0
+
+    sql = (
+        f'UPDATE {Petition._meta.db_table} '
+        'SET search_vector = petition_search_vector(title, description, category_id) '
+        'WHERE id >= %s AND id < %s'
+    )
+    updated = 0
+    for start in range(bounds['low'], bounds['high'] + 1, chunk_size):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, [start, start + chunk_size])
+            updated += cursor.rowcount
+        if pause:
+            time.sleep(pause)
+
+    logger.info('Search vectors rebuilt', petitions=updated, chunk_size=chunk_size)
+    return updated
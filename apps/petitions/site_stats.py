@@ -0,0 +1,115 @@
+"""
+Site-wide statistics and homepage sections, served from the cache.
+
+The homepage shows the number of active petitions and of verified
+signatures. Both are cache counters kept up to date incrementally:
+
+    petitions:site_stats:total_petitions    active petitions
+    petitions:site_stats:total_signatures   sum of Petition.signature_count
+
+Petition.increment_signature_count and status transitions in Petition.save
+adjust them; refresh_site_stats() recomputes both with one aggregate query.
+It runs when a counter is missing (first request, cache eviction) and
+periodically (``refresh_site_stats`` task) to fold in changes made behind
+the model's back (bulk updates, deletions).
+
+The featured/recent/category lists are cached as a whole for
+HOME_PAGE_CACHE_SECONDS and dropped when a petition enters or leaves the
+active status, so a homepage hit is one cache read and rendering the cached
+lists runs no further queries.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+SITE_STATS_PREFIX = 'petitions:site_stats'
+TOTAL_PETITIONS_KEY = f'{SITE_STATS_PREFIX}:total_petitions'
+TOTAL_SIGNATURES_KEY = f'{SITE_STATS_PREFIX}:total_signatures'
+HOME_SECTIONS_KEY = 'petitions:home:sections'
+
+
+def compute_site_stats():
+    """Count active petitions and sum verified signatures in one query."""
+    from apps.petitions.models import Petition
+
+    return Petition.objects.aggregate(
+        total_petitions=Count('id', filter=Q(status=Petition.STATUS_ACTIVE)),
+        total_signatures=Coalesce(Sum('signature_count'), 0),
+    )
+
+
+def refresh_site_stats():
+    """Recompute the statistics and reset the counters."""
+    stats = compute_site_stats()
+    cache.set_many({
+        TOTAL_PETITIONS_KEY: stats['total_petitions'],
+        TOTAL_SIGNATURES_KEY: stats['total_signatures'],
+    }, None)
+    return stats
+
+
+def get_site_stats():
+    """
+    Current site statistics.
+
+    Returns:
+        dict: 'total_petitions' and 'total_signatures'
+    """
+    values = cache.get_many([TOTAL_PETITIONS_KEY, TOTAL_SIGNATURES_KEY])
+    if len(values) < 2:
+        return refresh_site_stats()
+    return {
+        'total_petitions': values[TOTAL_PETITIONS_KEY],
+        'total_signatures': values[TOTAL_SIGNATURES_KEY],
+    }
+
+
+def adjust_site_stats(petitions=0, signatures=0):
+    """
+    Apply a change to the counters.
+
+    Missing counters are left alone: the next read recomputes them from
+    the database, which already includes this change.
+    """
+    for key, delta in ((TOTAL_PETITIONS_KEY, petitions), (TOTAL_SIGNATURES_KEY, signatures)):
+        if not delta:
+            continue
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            pass
+
+
+def get_home_sections():
+    """
+    Featured petitions, recent petitions and categories for the homepage.
+
+    Returns:
+        dict: 'featured_petitions', 'recent_petitions' and 'categories' lists
+    """
+    sections = cache.get(HOME_SECTIONS_KEY)
+    if sections is not None:
+        return sections
+
+    from apps.core.models import Category
+    from apps.petitions.models import Petition
+
+    active = Petition.objects.filter(
+        is_active=True, status=Petition.STATUS_ACTIVE
+    ).select_related('category', 'creator')
+    sections = {
+        'featured_petitions': list(active.order_by('-signature_count')[:6]),
+        'recent_petitions': list(active.order_by('-created_at')[:6]),
+        'categories': list(
+            Category.objects.filter(active=True).annotate(
+                active_petition_count=Count('petitions', filter=Q(petitions__is_active=True))
+            )[:8]
+        ),
+    }
+    cache.set(HOME_SECTIONS_KEY, sections, settings.HOME_PAGE_CACHE_SECONDS)
+    return sections
+
+
+def invalidate_home_sections():
+    cache.delete(HOME_SECTIONS_KEY)
@@ -4,11 +4,16 @@ Celery tasks for the petitions app.
 from celery import shared_task
 from django.core.exceptions import ObjectDoesNotExist
 from django.conf import settings
-from django.core.files.base import ContentFile
+from django.core.files.base import File
 from django.utils import timezone
+import os
+import shutil
+import tempfile
 import time
 import zipfile
-from io import BytesIO, StringIO
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO, TextIOWrapper
 import csv
 import requests
 from apps.core.logging_utils import StructuredLogger, log_execution_time
@@ -23,6 +28,17 @@ else:
     from config.storage_backends import MediaStorage
     BULK_DOWNLOAD_STORAGE = MediaStorage()
 
+# Bulk download streaming limits
+BULK_DOWNLOAD_SPOOL_MAX_SIZE = 16 * 1024 * 1024  # Keep ZIPs up to 16 MB in memory, spill to disk beyond
+BULK_DOWNLOAD_QUERY_CHUNK_SIZE = 500  # Rows fetched per round-trip when iterating signatures
+BULK_DOWNLOAD_PREFETCH_WORKERS = 8  # Concurrent storage/URL reads
+BULK_DOWNLOAD_PREFETCH_DEPTH = 16  # Signatures read ahead of the ZIP writer
+BULK_DOWNLOAD_FILE_SPOOL_SIZE = 1024 * 1024  # Keep each prefetched PDF up to 1 MB in memory, spill to disk beyond
+BULK_DOWNLOAD_COPY_CHUNK_SIZE = 64 * 1024  # Bytes copied per read when fetching and zipping PDFs
+BULK_DOWNLOAD_DELTA_WINDOW = 60 * 60  # Delta exports re-check approvals this far before the cursor (seconds)
+
+_http_session = None
+
 
 @shared_task(bind=True, max_retries=3)
 def generate_petition_pdf(self, petition_id):
@@ -146,6 +162,13 @@ def cleanup_expired_petitions():
         if count > 0:
             expired_petitions.update(status='closed')
             logger.info(f'Closed {count} expired petition(s)')
+            
+            # The bulk update bypasses Petition.save
+            from apps.petitions.search_cache import bump_catalog_version
+            from apps.petitions.site_stats import invalidate_home_sections, refresh_site_stats as recompute_site_stats
+            recompute_site_stats()
+            invalidate_home_sections()
+            bump_catalog_version()
         else:
             logger.info('No expired petitions to close')
             
@@ -159,6 +182,73 @@ def cleanup_expired_petitions():
         raise
 
 
+@shared_task(name='apps.petitions.tasks.refresh_site_stats')
+def refresh_site_stats():
+    """
+    Periodic task to recompute the homepage statistics from the database.
+    
+    The counters are adjusted on every signature and status change; this
+    folds in bulk updates and deletions that bypass the model. Petition
+    signature counts are reconciled with the approved signatures first, in
+    case buffered approvals were lost with the cache.
+    """
+    from apps.petitions.counters import reconcile_signature_counts
+    from apps.petitions.site_stats import refresh_site_stats as recompute_site_stats
+    
+    corrected = reconcile_signature_counts()
+    if corrected:
+        logger.warning(
+            'Signature counts reconciled',
+            petitions=len(corrected),
+            signatures=sum(new - old for old, new in corrected.values()),
+        )
+    stats = recompute_site_stats()
+    logger.info('Site statistics refreshed', **stats)
+    return stats
+
+
+@shared_task(name='apps.petitions.tasks.flush_petition_counters')
+def flush_petition_counters():
+    """
+    Periodic task to write buffered view and share counts to the database.
+    """
+    from apps.petitions.counters import flush_counters
+    
+    totals = flush_counters()
+    if totals['petitions']:
+        logger.info('Petition counters flushed', **totals)
+    return totals
+
+
+@shared_task(name='apps.petitions.tasks.fold_signature_counts')
+def fold_signature_counts():
+    """
+    Periodic task to write buffered signature approvals to signature_count.
+    
+    Milestones are checked afterwards on the folded counts, once per
+    petition, instead of on every approval.
+    """
+    from apps.petitions.counters import fold_signature_counts as fold_counts
+    from apps.petitions.detail_cache import bump_signatures_version
+    from apps.petitions.models import Petition
+    
+    changes = fold_counts()
+    if not changes:
+        return {'petitions': 0, 'signatures': 0}
+    
+    for petition in Petition.objects.select_related('category').filter(pk__in=changes):
+        old_count, new_count = changes[petition.pk]
+        petition.check_milestones(old_count, new_count)
+        bump_signatures_version(petition.uuid)
+    
+    totals = {
+        'petitions': len(changes),
+        'signatures': sum(new - old for old, new in changes.values()),
+    }
+    logger.info('Signature counts folded', **totals)
+    return totals
+
+
 @shared_task
 def cleanup_old_pdfs():
     """
@@ -169,18 +259,39 @@ def cleanup_old_pdfs():
 
 
 @shared_task(bind=True, max_retries=3)
-def generate_bulk_download_package(self, petition_id, user_id, user_email):
+def generate_bulk_download_package(self, petition_id, user_id, user_email, delta=False):
     """
     Generate ZIP file with all signatures and send email with download link.
     
+    The ZIP is streamed entry by entry into a spooled temporary file (memory
+    up to BULK_DOWNLOAD_SPOOL_MAX_SIZE, disk beyond that) and uploaded from
+    there, so worker memory stays flat regardless of the signature count.
+    PDFs are read concurrently ahead of the ZIP writer; the result includes
+    fetch throughput metrics.
+    
+    Every upload is recorded as a BulkDownloadChunk. In delta mode only
+    signatures approved after the last recorded part are packaged, and the
+    email links the new part together with the parts already in storage.
+    verified_at is stamped before the approval commits, so a delta also
+    takes rows up to BULK_DOWNLOAD_DELTA_WINDOW before the cursor that no
+    earlier part recorded.
+    Each part carries the cumulative MANIFEST.csv. A full export starts a
+    new chain of parts and deletes the superseded ZIPs from storage. Parts
+    are recorded under a lock on the petition row; a delta whose previous
+    part changed while it was being built is discarded and retried.
+    
     Args:
         petition_id: ID of the petition
         user_id: ID of the requesting user
         user_email: Email to send download link
+        delta: Package only signatures approved since the previous export
     """
-    from apps.petitions.models import Petition
+    from apps.petitions.models import Petition, BulkDownloadChunk
     from apps.signatures.models import Signature
     from apps.core.email import send_template_email
+    from datetime import timedelta
+    from django.db import transaction
+    from django.db.models import Q
     from django.utils import timezone
     
     try:
@@ -190,123 +301,163 @@ def generate_bulk_download_package(self, petition_id, user_id, user_email):
         signatures = Signature.objects.filter(
             petition=petition,
             verification_status=Signature.STATUS_APPROVED
-        ).select_related('petition').order_by('verified_at')
+        ).order_by('verified_at', 'id')
         
-        if not signatures.exists():
+        signature_count = signatures.count()
+        if not signature_count:
             logger.warning(
                 "No approved signatures found for bulk download",
                 petition_id=petition_id
             )
             return
         
+        previous_chunks = []
+        if delta:
+            previous_chunks = list(petition.bulk_download_chunks.order_by('sequence'))
+            missing = [
+                chunk.file_path for chunk in previous_chunks
+                if not BULK_DOWNLOAD_STORAGE.exists(chunk.file_path)
+            ]
+            if missing:
+                # A part expired or was removed; rebuild the whole package
+                logger.warning(
+                    "Bulk download parts missing from storage, rebuilding full package",
+                    petition_uuid=str(petition.uuid),
+                    missing_parts=len(missing)
+                )
+                previous_chunks = []
+        
+        new_signatures = signatures
+        if previous_chunks:
+            cursor = previous_chunks[-1]
+            if cursor.recent_signature_ids:
+                packaged_ids = {
+                    signature_id
+                    for chunk in previous_chunks
+                    for signature_id in chunk.recent_signature_ids
+                }
+                new_signatures = signatures.filter(
+                    verified_at__gt=cursor.last_verified_at - timedelta(seconds=BULK_DOWNLOAD_DELTA_WINDOW)
+                ).exclude(id__in=packaged_ids)
+            else:
+                # Part recorded before the look-back window existed
+                new_signatures = signatures.filter(
+                    Q(verified_at__gt=cursor.last_verified_at) |
+                    Q(verified_at=cursor.last_verified_at, id__gt=cursor.last_signature_id)
+                )
+        
+        new_count = new_signatures.count()
+        packaged_before = sum(chunk.signature_count for chunk in previous_chunks)
+        sequence = previous_chunks[-1].sequence + 1 if previous_chunks else 1
+        
         logger.info(
             "Starting bulk download generation",
             petition_uuid=str(petition.uuid),
-            signature_count=signatures.count(),
+            signature_count=signature_count,
+            new_signature_count=new_count,
+            reused_parts=len(previous_chunks),
+            delta=delta,
             user_id=user_id
         )
         
-        # Create ZIP file in memory
-        zip_buffer = BytesIO()
+        zip_size = 0
+        fetch_stats = {}
+        chunks = list(previous_chunks)
         
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            # Add manifest CSV
-            manifest_csv = _generate_manifest_csv(signatures)
-            zip_file.writestr('MANIFEST.csv', manifest_csv)
-            
-            # Add README
-            readme_content = _generate_readme(petition, signatures.count())
-            zip_file.writestr('README.txt', readme_content)
+        if new_count:
+            packaged = []
+            with tempfile.SpooledTemporaryFile(
+                max_size=BULK_DOWNLOAD_SPOOL_MAX_SIZE, suffix='.zip'
+            ) as zip_buffer:
+                fetch_stats = _write_bulk_download_zip(
+                    zip_buffer, petition, new_signatures, signature_count,
+                    manifest_signatures=signatures,
+                    start_index=packaged_before + 1,
+                    packaged=packaged,
+                )
+                
+                zip_size = zip_buffer.tell()
+                zip_buffer.seek(0)
+                
+                # Upload ZIP to storage (S3 in production, local filesystem in development).
+                # Storage backends read the file object in chunks (multipart upload on S3).
+                timestamp = timezone.now().strftime('%Y%m%d_%H%M%S')
+                if sequence > 1:
+                    filename = f"bulk_downloads/assinaturas_{petition.uuid}_parte{sequence:03d}_{timestamp}.zip"
+                else:
+                    filename = f"bulk_downloads/assinaturas_{petition.uuid}_{timestamp}.zip"
+                saved_path = BULK_DOWNLOAD_STORAGE.save(filename, File(zip_buffer, name=filename))
             
-            # Process each signature
-            for idx, signature in enumerate(signatures, 1):
-                try:
-                    # Add signed PDF
-                    if signature.signed_pdf:
-                        signed_pdf_name = f"{idx:04d}_signed_{signature.uuid}.pdf"
-                        try:
-                            # Read from FileField
-                            signature.signed_pdf.open('rb')
-                            signed_pdf_data = signature.signed_pdf.read()
-                            signature.signed_pdf.close()
-                            zip_file.writestr(
-                                f"signed_pdfs/{signed_pdf_name}",
-                                signed_pdf_data
-                            )
-                        except Exception as e:
-                            logger.error(f"Error reading signed PDF for {signature.uuid}: {str(e)}")
-                    elif signature.signed_pdf_url:
-                        # Fallback to URL download (for S3 or external URLs)
-                        signed_pdf_name = f"{idx:04d}_signed_{signature.uuid}.pdf"
-                        signed_pdf_data = _download_file(signature.signed_pdf_url)
-                        if signed_pdf_data:
-                            zip_file.writestr(
-                                f"signed_pdfs/{signed_pdf_name}",
-                                signed_pdf_data
-                            )
-                    
-                    # Add custody certificate
-                    if signature.custody_certificate_pdf:
-                        cert_name = f"{idx:04d}_custody_{signature.uuid}.pdf"
-                        try:
-                            # Read from FileField
-                            signature.custody_certificate_pdf.open('rb')
-                            cert_data = signature.custody_certificate_pdf.read()
-                            signature.custody_certificate_pdf.close()
-                            zip_file.writestr(
-                                f"custody_certificates/{cert_name}",
-                                cert_data
-                            )
-                        except Exception as e:
-                            logger.error(f"Error reading custody certificate for {signature.uuid}: {str(e)}")
-                    elif signature.custody_certificate_url:
-                        # Fallback to URL download (for S3 or external URLs)
-                        cert_name = f"{idx:04d}_custody_{signature.uuid}.pdf"
-                        cert_data = _download_file(signature.custody_certificate_url)
-                        if cert_data:
-                            zip_file.writestr(
-                                f"custody_certificates/{cert_name}",
-                                cert_data
-                            )
-                    
-                except Exception as e:
-                    logger.error(
-                        f"Error adding signature {signature.uuid} to ZIP: {str(e)}"
-                    )
-                    # Add error note but continue
-                    error_note = f"Erro ao processar assinatura {signature.uuid}: {str(e)}\n"
-                    zip_file.writestr(
-                        f"errors/{signature.uuid}.txt",
-                        error_note
+            # Cursor and look-back ids from the rows actually written; the
+            # queryset may already match rows committed since
+            new_count = len(packaged)
+            last_verified_at, last_signature_id = packaged[-1]
+            window_start = last_verified_at - timedelta(seconds=BULK_DOWNLOAD_DELTA_WINDOW)
+            recent_signature_ids = [
+                signature_id for verified_at, signature_id in packaged
+                if verified_at > window_start
+            ]
+            superseded = []
+            with transaction.atomic():
+                # Exports of the same petition record their parts one at a time
+                Petition.objects.select_for_update().values_list('pk', flat=True).get(pk=petition.pk)
+                latest = petition.bulk_download_chunks.order_by('-sequence').first()
+                conflict = sequence > 1 and (latest is None or latest.pk != previous_chunks[-1].pk)
+                if not conflict:
+                    if sequence == 1:
+                        # A full export starts a new chain; older parts are superseded
+                        old_chunks = petition.bulk_download_chunks.all()
+                        superseded = list(old_chunks.values_list('file_path', flat=True))
+                        old_chunks.delete()
+                    chunk = BulkDownloadChunk.objects.create(
+                        petition=petition,
+                        sequence=sequence,
+                        file_path=saved_path,
+                        signature_count=new_count,
+                        size_bytes=zip_size,
+                        last_verified_at=last_verified_at,
+                        last_signature_id=last_signature_id,
+                        recent_signature_ids=recent_signature_ids,
                     )
+            
+            if conflict:
+                # Another export recorded a part since this one was planned;
+                # this part may overlap it, so drop it and start over
+                BULK_DOWNLOAD_STORAGE.delete(saved_path)
+                raise RuntimeError('Bulk download part recorded concurrently')
+            chunks.append(chunk)
+            _delete_bulk_download_files(superseded)
         
-        # Upload ZIP to storage (S3 in production, local filesystem in development)
-        zip_buffer.seek(0)
-        
-        filename = f"bulk_downloads/assinaturas_{petition.uuid}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.zip"
-        saved_path = BULK_DOWNLOAD_STORAGE.save(filename, ContentFile(zip_buffer.getvalue()))
-        
-        # Generate URL (pre-signed for S3, direct path for local)
-        # For S3 (MediaStorage), pass expire parameter; for local storage, it's ignored
-        try:
-            download_url = BULK_DOWNLOAD_STORAGE.url(saved_path, expire=604800)  # 7 days in seconds
-        except TypeError:
-            # Local storage doesn't support expire parameter
-            download_url = BULK_DOWNLOAD_STORAGE.url(saved_path)
+        parts = [
+            {
+                'sequence': chunk.sequence,
+                'signature_count': chunk.signature_count,
+                'size_bytes': chunk.size_bytes,
+                'download_url': _get_bulk_download_url(chunk.file_path),
+                'is_new': chunk.sequence == sequence,
+            }
+            for chunk in chunks
+        ]
+        download_url = parts[-1]['download_url']
         
         logger.info(
             "Bulk download package generated",
             petition_uuid=str(petition.uuid),
             user_id=user_id,
-            zip_size_bytes=len(zip_buffer.getvalue()),
-            download_url=download_url
+            zip_size_bytes=zip_size,
+            download_url=download_url,
+            part_count=len(parts),
+            **fetch_stats
         )
         
         # Send email with download link
         context = {
             'petition': petition,
-            'signature_count': signatures.count(),
+            'signature_count': signature_count,
+            'new_signature_count': new_count,
             'download_url': download_url,
+            'parts': parts,
+            'delta': delta,
             'expiration_days': 7,
             'petition_url': petition.get_full_url(),
         }
@@ -326,8 +477,12 @@ def generate_bulk_download_package(self, petition_id, user_id, user_email):
         
         return {
             'success': True,
-            'signature_count': signatures.count(),
-            'download_url': download_url
+            'signature_count': signature_count,
+            'new_signature_count': new_count,
+            'zip_size_bytes': zip_size,
+            'download_url': download_url,
+            'part_count': len(parts),
+            'throughput': fetch_stats,
         }
         
     except Exception as e:
@@ -340,20 +495,248 @@ def generate_bulk_download_package(self, petition_id, user_id, user_email):
         raise self.retry(exc=e, countdown=60)
 
 
-def _download_file(url):
-    """Download file from URL and return bytes."""
+def _delete_bulk_download_files(paths):
+    """Remove superseded package parts from storage (best effort)."""
+    for path in paths:
+        try:
+            BULK_DOWNLOAD_STORAGE.delete(path)
+        except Exception as e:
+            logger.warning(f"Error deleting bulk download part {path}: {str(e)}")
+
+
+def _get_bulk_download_url(path):
+    """Pre-signed URL (7 days) on S3, direct path on local storage."""
+    try:
+        return BULK_DOWNLOAD_STORAGE.url(path, expire=604800)  # 7 days in seconds
+    except TypeError:
+        # Local storage doesn't support expire parameter
+        return BULK_DOWNLOAD_STORAGE.url(path)
+
+
+def _write_bulk_download_zip(zip_buffer, petition, signatures, signature_count,
+                             manifest_signatures=None, start_index=1, packaged=None):
+    """
+    Write the bulk download ZIP into ``zip_buffer`` one entry at a time.
+    
+    ``signatures`` are the ones whose PDFs go in this archive;
+    ``manifest_signatures`` (default: the same) are listed in MANIFEST.csv,
+    and ``start_index`` continues file numbering across package parts.
+    ``(verified_at, id)`` of each signature written is appended to
+    ``packaged``, when given.
+    
+    Signatures are read with ``.iterator()``; their PDFs are fetched by a
+    small thread pool up to BULK_DOWNLOAD_PREFETCH_DEPTH signatures ahead
+    of the ZIP writer, which consumes them in order. Each PDF is copied in
+    chunks into a spooled file that moves to disk past
+    BULK_DOWNLOAD_FILE_SPOOL_SIZE, so memory is bounded by the read-ahead
+    window and the spool size, not by the number or size of the PDFs.
+    Leaves ``zip_buffer`` positioned at the end of the archive.
+    
+    Returns:
+        dict: fetch throughput metrics for logging and the task result
+    """
+    started = time.monotonic()
+    stats = {
+        'files_fetched': 0,
+        'bytes_fetched': 0,
+        'fetch_errors': 0,
+        'fetch_seconds': 0.0,
+    }
+    
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as zip_file:
+        # Add manifest CSV
+        with zip_file.open('MANIFEST.csv', 'w', force_zip64=True) as manifest_entry:
+            manifest_stream = TextIOWrapper(manifest_entry, encoding='utf-8', newline='')
+            if manifest_signatures is None:
+                manifest_signatures = signatures
+            _write_manifest_csv(
+                manifest_stream,
+                manifest_signatures.iterator(chunk_size=BULK_DOWNLOAD_QUERY_CHUNK_SIZE)
+            )
+            manifest_stream.flush()
+            manifest_stream.detach()
+        
+        # Add README
+        zip_file.writestr('README.txt', _generate_readme(petition, signature_count))
+        
+        # Process each signature, in order, as its files arrive
+        prefetched = _iter_prefetched(
+            signatures.iterator(chunk_size=BULK_DOWNLOAD_QUERY_CHUNK_SIZE),
+            _fetch_signature_files,
+        )
+        for idx, (signature, future) in enumerate(prefetched, start_index):
+            if packaged is not None:
+                packaged.append((signature.verified_at, signature.id))
+            try:
+                fetched = future.result()
+                stats['fetch_seconds'] += fetched['duration']
+                
+                for kind, error in fetched['errors'].items():
+                    stats['fetch_errors'] += 1
+                    if kind == 'signed':
+                        logger.error(f"Error reading signed PDF for {signature.uuid}: {error}")
+                    else:
+                        logger.error(f"Error reading custody certificate for {signature.uuid}: {error}")
+                
+                names = {
+                    'signed': f"signed_pdfs/{idx:04d}_signed_{signature.uuid}.pdf",
+                    'custody': f"custody_certificates/{idx:04d}_custody_{signature.uuid}.pdf",
+                }
+                try:
+                    for kind, spool in fetched['files'].items():
+                        with zip_file.open(names[kind], 'w', force_zip64=True) as entry:
+                            shutil.copyfileobj(spool, entry, BULK_DOWNLOAD_COPY_CHUNK_SIZE)
+                        stats['files_fetched'] += 1
+                        stats['bytes_fetched'] += fetched['sizes'][kind]
+                finally:
+                    for spool in fetched['files'].values():
+                        spool.close()
+                
+            except Exception as e:
+                logger.error(
+                    f"Error adding signature {signature.uuid} to ZIP: {str(e)}"
+                )
+                # Add error note but continue
+                error_note = f"Erro ao processar assinatura {signature.uuid}: {str(e)}\n"
+                zip_file.writestr(
+                    f"errors/{signature.uuid}.txt",
+                    error_note
+                )
+    
+    zip_buffer.seek(0, os.SEEK_END)
+    
+    elapsed = time.monotonic() - started
+    stats['fetch_seconds'] = round(stats['fetch_seconds'], 3)
+    stats['elapsed_seconds'] = round(elapsed, 3)
+    stats['files_per_second'] = round(stats['files_fetched'] / elapsed, 2) if elapsed else 0.0
+    stats['bytes_per_second'] = int(stats['bytes_fetched'] / elapsed) if elapsed else 0
+    return stats
+
+
+def _iter_prefetched(items, fetch, workers=None, depth=None):
+    """
+    Run ``fetch(item)`` on a thread pool, keeping at most ``depth`` items in flight.
+    
+    Yields ``(item, future)`` pairs in input order, so the consumer sees a
+    sequential stream while up to ``depth`` fetches overlap their latency.
+    """
+    workers = workers or BULK_DOWNLOAD_PREFETCH_WORKERS
+    depth = max(depth or BULK_DOWNLOAD_PREFETCH_DEPTH, 1)
+    
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bulk-fetch') as pool:
+        in_flight = deque()
+        for item in items:
+            in_flight.append((item, pool.submit(fetch, item)))
+            if len(in_flight) >= depth:
+                yield in_flight.popleft()
+        while in_flight:
+            yield in_flight.popleft()
+
+
+def _fetch_signature_files(signature):
+    """
+    Read a signature's signed PDF and custody certificate (worker thread).
+    
+    Prefers the stored FileField and falls back to the public URL. Each
+    file is copied in chunks into a SpooledTemporaryFile, rewound for the
+    ZIP writer, which closes it.
+    
+    Returns:
+        dict: 'files' (kind -> spooled file), 'sizes' (kind -> bytes),
+        'errors' (kind -> message), 'duration'
+    """
+    started = time.monotonic()
+    files = {}
+    sizes = {}
+    errors = {}
+    
+    sources = (
+        ('signed', signature.signed_pdf, signature.signed_pdf_url),
+        ('custody', signature.custody_certificate_pdf, signature.custody_certificate_url),
+    )
+    for kind, field_file, url in sources:
+        if not field_file and not url:
+            continue
+        spool = tempfile.SpooledTemporaryFile(max_size=BULK_DOWNLOAD_FILE_SPOOL_SIZE)
+        try:
+            if field_file:
+                field_file.open('rb')
+                try:
+                    shutil.copyfileobj(field_file, spool, BULK_DOWNLOAD_COPY_CHUNK_SIZE)
+                finally:
+                    field_file.close()
+                fetched = True
+            else:
+                # Fallback to URL download (for S3 or external URLs)
+                fetched = _download_file(url, spool)
+        except Exception as e:
+            errors[kind] = str(e)
+            spool.close()
+            continue
+        
+        size = spool.tell()
+        if not fetched or not size:
+            spool.close()
+            continue
+        spool.seek(0)
+        files[kind] = spool
+        sizes[kind] = size
+    
+    return {
+        'files': files,
+        'sizes': sizes,
+        'errors': errors,
+        'duration': time.monotonic() - started,
+    }
+
+
+def _get_http_session():
+    """
+    Shared HTTP session for bulk download fetches.
+    
+    Keeps one connection pool per process, sized for the prefetch pool,
+    so URL fallbacks reuse TCP/TLS connections instead of reconnecting.
+    """
+    global _http_session
+    if _http_session is None:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=BULK_DOWNLOAD_PREFETCH_WORKERS,
+            pool_maxsize=BULK_DOWNLOAD_PREFETCH_WORKERS,
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _http_session = session
+    return _http_session
+
+
+def _download_file(url, destination):
+    """
+    Stream the file at ``url`` into ``destination`` in chunks.
+    
+    Returns:
+        bool: True if the whole file was written
+    """
     try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        return response.content
+        with _get_http_session().get(url, timeout=30, stream=True) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(BULK_DOWNLOAD_COPY_CHUNK_SIZE):
+                destination.write(chunk)
+        return True
     except Exception as e:
         logger.error(f"Error downloading file from {url}: {str(e)}")
-        return None
+        return False
 
 
 def _generate_manifest_csv(signatures):
     """Generate CSV manifest of all signatures."""
     output = StringIO()
+    _write_manifest_csv(output, signatures)
+    return output.getvalue()
+
+
+def _write_manifest_csv(output, signatures):
+    """Write the CSV manifest row by row to a text stream."""
     writer = csv.writer(output)
     
     # Header
@@ -389,8 +772,6 @@ def _generate_manifest_csv(signatures):
             sig.signed_pdf_url or '',
             sig.custody_certificate_url or ''
         ])
-    
-    return output.getvalue()
 
 
 def _generate_readme(petition, signature_count):
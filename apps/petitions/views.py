@@ -7,27 +7,41 @@ from django.contrib import messages
 from django.views.generic import ListView, DetailView, CreateView, UpdateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
-from django.db.models import Q, F, Count
+from django.db.models import Q, F, Exists, OuterRef, Subquery, Sum
 from django.contrib.postgres.search import SearchQuery, SearchRank
 from django.utils import timezone
 from datetime import timedelta
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.views.generic import View
 from django.core.exceptions import PermissionDenied
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils.functional import SimpleLazyObject
 from apps.core.logging_utils import StructuredLogger
 from apps.core.google_tracking import GoogleAnalyticsEventMixin
+from apps.core.pagination import CursorPaginationMixin
 
 logger = StructuredLogger(__name__)
 
-from .models import Petition, FlaggedContent
+from .models import Petition, FlaggedContent, PetitionGeoStat
 from .forms import PetitionForm
 from .search import PetitionSearchForm
+from .search_cache import get_search_results
+from .autocomplete import get_suggestions
+from .search_index import SEARCH_CONFIG
+from .counters import get_pending
+from .detail_cache import get_cached_page, get_cached_petition, get_versions, page_cache_key, store_page
+from .site_stats import get_home_sections, get_site_stats
 from apps.core.models import Category
 
 
-class PetitionListView(GoogleAnalyticsEventMixin, ListView):
+class PetitionListView(GoogleAnalyticsEventMixin, CursorPaginationMixin, ListView):
     """
     Public view listing all active petitions with advanced search and filters.
+    
+    The default newest-first listing is paginated by cursor; other sort
+    orders use numbered pages. Searches (``?q=``) page through cached
+    result ids (see search_cache).
     """
     model = Petition
     template_name = 'petitions/petition_list.html'
@@ -44,12 +58,36 @@ class PetitionListView(GoogleAnalyticsEventMixin, ListView):
         """Track search queries and results."""
         search_query = self.request.GET.get('q', '')
         if search_query:
+            results = self.get_search_results()
             return {
                 'search_term': search_query[:100],  # Limit length for privacy
-                'results_count': self.get_queryset().count()
+                'results_count': results['count'] if results else 0
             }
         return {}
     
+    def get_search_results(self):
+        """Cached ids, total and category counts of the search, or None if not searching."""
+        if not hasattr(self, '_search_results'):
+            form = PetitionSearchForm(self.request.GET)
+            if form.is_valid() and form.cleaned_data.get('q'):
+                self._search_results = get_search_results(form.cleaned_data, self.get_queryset())
+            else:
+                self._search_results = None
+        return self._search_results
+    
+    def paginate_queryset(self, queryset, page_size):
+        results = self.get_search_results()
+        if results is None:
+            return super().paginate_queryset(queryset, page_size)
+        
+        # Numbered pages over the cached ids; only the page's rows are loaded
+        paginator, page, ids, is_paginated = super(CursorPaginationMixin, self).paginate_queryset(
+            results['ids'], page_size
+        )
+        petitions = Petition.objects.select_related('creator', 'category').in_bulk(ids)
+        page.object_list = [petitions[pk] for pk in ids if pk in petitions]
+        return paginator, page, page.object_list, is_paginated
+    
     def get_queryset(self):
         queryset = Petition.objects.filter(
             is_active=True,
@@ -68,7 +106,7 @@ class PetitionListView(GoogleAnalyticsEventMixin, ListView):
                 
                 if connection.vendor == 'postgresql':
                     # Use PostgreSQL full-text search
-                    search_query_obj = SearchQuery(search_query, config='portuguese')
+                    search_query_obj = SearchQuery(search_query, config=SEARCH_CONFIG)
                     queryset = queryset.filter(search_vector=search_query_obj)
                     queryset = queryset.annotate(
                         rank=SearchRank(F('search_vector'), search_query_obj)
@@ -105,20 +143,23 @@ class PetitionListView(GoogleAnalyticsEventMixin, ListView):
             if min_signatures is not None:
                 queryset = queryset.filter(signature_count__gte=min_signatures)
             
-            # Location filters (search in signatures)
+            # Location filters (precomputed approved-signature counts)
             state = form.cleaned_data.get('state')
             if state:
-                queryset = queryset.filter(
-                    signatures__state=state
-                ).annotate(
-                    signature_from_state=Count('signatures')
-                ).distinct()
+                state_stats = PetitionGeoStat.objects.filter(petition=OuterRef('pk'), state=state)
+                queryset = queryset.filter(Exists(state_stats)).annotate(
+                    signature_from_state=Subquery(
+                        state_stats.values('petition').annotate(
+                            total=Sum('signature_count')
+                        ).values('total')
+                    )
+                )
             
             city = form.cleaned_data.get('city')
             if city:
-                queryset = queryset.filter(
-                    signatures__city__icontains=city
-                ).distinct()
+                queryset = queryset.filter(Exists(
+                    PetitionGeoStat.objects.filter(petition=OuterRef('pk'), city__icontains=city)
+                ))
             
             # Sorting
             sort = form.cleaned_data.get('sort')
@@ -139,6 +180,12 @@ class PetitionListView(GoogleAnalyticsEventMixin, ListView):
         context = super().get_context_data(**kwargs)
         context['search_form'] = PetitionSearchForm(self.request.GET or None)
         context['categories'] = Category.objects.filter(active=True).order_by('order', 'name')
+        results = self.get_search_results()
+        if results is not None:
+            context['search_total'] = results['count']
+            context['categories'] = list(context['categories'])
+            for category in context['categories']:
+                category.result_count = results['facets'].get(category.pk, 0)
         return context
 
 
@@ -165,22 +212,67 @@ class PetitionDetailView(GoogleAnalyticsEventMixin, DetailView):
     def get_object(self, queryset=None):
         # Get by UUID instead of pk
         uuid = self.kwargs.get('uuid')
-        return get_object_or_404(Petition, uuid=uuid)
+        if self.request.user.is_authenticated:
+            return get_object_or_404(Petition.objects.select_related('category', 'creator'), uuid=uuid)
+        
+        # Anonymous visitors share the cached instance (see detail_cache)
+        petition = get_cached_petition(uuid, self.versions[0])
+        if petition is None:
+            raise Http404('Petição não encontrada')
+        return petition
+    
+    def is_page_cacheable(self):
+        """Anonymous, parameterless requests without pending messages share one rendering."""
+        request = self.request
+        return not request.user.is_authenticated and not request.GET and not get_messages(request)
     
     def get(self, request, *args, **kwargs):
+        uuid = self.kwargs.get('uuid')
+        self.versions = get_versions(uuid)
+        
+        page_key = None
+        if self.is_page_cacheable():
+            page_key = page_cache_key(request, uuid, self.versions)
+            content, petition = get_cached_page(page_key, uuid, self.versions[0])
+            if content is not None:
+                petition.increment_view_count()
+                return HttpResponse(content)
+        
         self.object = self.get_object()
         # Increment view count
         self.object.increment_view_count()
         context = self.get_context_data(object=self.object)
-        return self.render_to_response(context)
+        response = self.render_to_response(context)
+        
+        if page_key:
+            response.add_post_render_callback(lambda rendered: store_page(page_key, rendered.content))
+        return response
+    
+    @staticmethod
+    def _load_live_petition(petition_pk):
+        petition = Petition.objects.only('signature_count', 'signature_goal').get(pk=petition_pk)
+        # Include approvals not yet folded into signature_count
+        petition.signature_count += get_pending('signature_count', petition_pk)
+        return petition
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Get recent signatures (approved only)
+        # Get recent signatures (approved only); lazy, only evaluated when
+        # the template fragment is not cached
         context['recent_signatures'] = self.object.signatures.filter(
             verification_status='approved'
         ).order_by('-verified_at')[:10]
         
+        # Fragment cache keys and the live signature count for volatile fragments
+        context['content_version'], context['signatures_version'] = self.versions
+        context['detail_cache_seconds'] = settings.PETITION_DETAIL_CACHE_SECONDS
+        if self.request.user.is_authenticated:
+            self.object.signature_count += get_pending('signature_count', self.object.pk)
+            context['live_petition'] = self.object
+        else:
+            petition_pk = self.object.pk
+            context['live_petition'] = SimpleLazyObject(lambda: self._load_live_petition(petition_pk))
+        
         # SEO meta tags
         context['meta_title'] = self.object.get_meta_title()
         context['meta_description'] = self.object.get_meta_description()
@@ -277,32 +369,7 @@ def petition_autocomplete(request):
     API endpoint for petition title autocomplete.
     Returns JSON with petition suggestions based on query.
     """
-    query = request.GET.get('q', '').strip()
-    
-    if len(query) < 2:
-        return JsonResponse({'results': []})
-    
-    # Search in titles with PostgreSQL full-text search
-    search_query_obj = SearchQuery(query, config='portuguese')
-    petitions = Petition.objects.filter(
-        is_active=True,
-        status='active',
-        search_vector=search_query_obj
-    ).annotate(
-        rank=SearchRank(F('search_vector'), search_query_obj)
-    ).select_related('category').order_by('-rank')[:10]
-    
-    results = []
-    for petition in petitions:
-        results.append({
-            'id': str(petition.uuid),
-            'title': petition.title,
-            'category': petition.category.name,
-            'signature_count': petition.signature_count,
-            'url': petition.get_absolute_url()
-        })
-    
-    return JsonResponse({'results': results})
+    return JsonResponse({'results': get_suggestions(request.GET.get('q', ''))})
 
 
 class PetitionUpdateView(LoginRequiredMixin, UpdateView):
@@ -328,29 +395,12 @@ class PetitionUpdateView(LoginRequiredMixin, UpdateView):
 def home_view(request):
     """
     Home page view with featured petitions.
-    """
-    featured_petitions = Petition.objects.filter(
-        is_active=True,
-        status='active'
-    ).order_by('-signature_count')[:6]
-    
-    recent_petitions = Petition.objects.filter(
-        is_active=True,
-        status='active'
-    ).order_by('-created_at')[:6]
-    
-    categories = Category.objects.filter(active=True)[:8]
-    
-    # Statistics
-    total_petitions = Petition.objects.filter(status='active').count()
-    total_signatures = sum(p.signature_count for p in Petition.objects.all())
     
+    Lists and statistics come from the cache (see apps.petitions.site_stats).
+    """
     context = {
-        'featured_petitions': featured_petitions,
-        'recent_petitions': recent_petitions,
-        'categories': categories,
-        'total_petitions': total_petitions,
-        'total_signatures': total_signatures,
+        **get_home_sections(),
+        **get_site_stats(),
     }
     
     return render(request, 'static_pages/home.html', context)
@@ -388,8 +438,8 @@ def petition_share(request, uuid):
     """
     petition = get_object_or_404(Petition, uuid=uuid)
     
-    # Increment share count
-    petition.increment_share_count()
+    # Increment share count (buffered, see apps.petitions.counters)
+    pending_shares = petition.increment_share_count()
     
     # Build share URLs
     petition_url = request.build_absolute_uri(petition.get_absolute_url())
@@ -405,7 +455,7 @@ def petition_share(request, uuid):
     
     return JsonResponse({
         'success': True,
-        'share_count': petition.share_count,
+        'share_count': petition.share_count + pending_shares,
         'share_urls': share_urls
     })
 
@@ -450,18 +500,23 @@ class RequestBulkDownloadView(GoogleAnalyticsEventMixin, LoginRequiredMixin, Vie
             messages.error(request, 'Esta petição ainda não possui assinaturas aprovadas.')
             return redirect('petitions:detail', uuid=uuid, slug=petition.slug)
         
+        # Delta mode packages only signatures approved since the last export
+        delta = request.POST.get('mode') == 'delta'
+        
         logger.info(
             "Bulk download requested",
             petition_uuid=str(petition.uuid),
             user_id=request.user.id,
-            user_email=request.user.email
+            user_email=request.user.email,
+            delta=delta
         )
         
         # Queue async task
         generate_bulk_download_package.delay(
             petition_id=petition.id,
             user_id=request.user.id,
-            user_email=request.user.email
+            user_email=request.user.email,
+            delta=delta
         )
         
         messages.success(
@@ -0,0 +1,485 @@
+"""
+Offline benchmark of the signature verification hot path.
+
+Everything runs locally: a throwaway test CA issues CPF certificates,
+synthetic PDFs are signed with them (detached CMS over the ByteRange, like
+real signing tools produce), revocation is answered by a cached CRL or by an
+in-process OCSP responder, and the Django cache is swapped for a private
+local-memory cache so no Redis or network is touched.
+
+The report holds verifications/sec, p50/p95/p99 latency per verification
+stage (see apps.signatures.verification_metrics), custody certificate
+generation and peak RSS. ``manage.py benchmark_signature_verification``
+writes it as JSON so it can be committed as a baseline and compared.
+"""
+import math
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.serialization import pkcs7
+from cryptography.x509 import ocsp
+from cryptography.x509.oid import AuthorityInformationAccessOID, NameOID
+from django.core.cache import cache
+from django.test.utils import override_settings
+
+from apps.signatures import revocation_checker
+from apps.signatures.crl_index import clear_local_cache, store_crl_index
+from apps.signatures.verification_metrics import stage_label
+from apps.signatures.verification_service import OID_CPF, PDFSignatureVerifier
+
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'signature-verification-benchmark',
+    }
+}
+
+BENCHMARK_OCSP_RESPONDER = 'http://ocsp.benchmark.invalid'
+
+# Room reserved in /Contents for the DER signature (bytes, hex encoded twice as long)
+SIGNATURE_CONTENTS_SIZE = 8192
+
+REVOCATION_MODES = ('crl', 'ocsp')
+
+
+class BenchmarkCA:
+    """Self-signed test root that issues CPF signer certificates, a CRL and OCSP answers."""
+
+    def __init__(self, key_size=2048):
+        self.key = rsa.generate_private_key(public_exponent=65537, key_size=key_size)
+        name = x509.Name([
+            x509.NameAttribute(NameOID.COUNTRY_NAME, 'BR'),
+            x509.NameAttribute(NameOID.ORGANIZATION_NAME, 'ICP-Brasil'),
+            x509.NameAttribute(NameOID.COMMON_NAME, 'AC Raiz Benchmark'),
+        ])
+        now = datetime.now(timezone.utc)
+        self.certificate = x509.CertificateBuilder().subject_name(
+            name
+        ).issuer_name(
+            name
+        ).public_key(
+            self.key.public_key()
+        ).serial_number(
+            x509.random_serial_number()
+        ).not_valid_before(
+            now - timedelta(days=1)
+        ).not_valid_after(
+            now + timedelta(days=3650)
+        ).add_extension(
+            x509.BasicConstraints(ca=True, path_length=None), critical=True
+        ).add_extension(
+            x509.SubjectKeyIdentifier.from_public_key(self.key.public_key()), critical=False
+        ).sign(self.key, hashes.SHA256())
+        self.issued = {}
+
+    def issue(self, public_key, cpf, common_name='Assinante Benchmark'):
+        """Issue a signer certificate carrying ``cpf`` in the ICP-Brasil otherName."""
+        now = datetime.now(timezone.utc)
+        cpf_bytes = cpf.encode('ascii')
+        certificate = x509.CertificateBuilder().subject_name(
+            x509.Name([
+                x509.NameAttribute(NameOID.COUNTRY_NAME, 'BR'),
+                x509.NameAttribute(NameOID.COMMON_NAME, f'{common_name}:{cpf}'),
+            ])
+        ).issuer_name(
+            self.certificate.subject
+        ).public_key(
+            public_key
+        ).serial_number(
+            x509.random_serial_number()
+        ).not_valid_before(
+            now - timedelta(days=1)
+        ).not_valid_after(
+            now + timedelta(days=365)
+        ).add_extension(
+            x509.SubjectAlternativeName([
+                x509.OtherName(OID_CPF, bytes([0x04, len(cpf_bytes)]) + cpf_bytes),
+            ]), critical=False
+        ).add_extension(
+            x509.AuthorityInformationAccess([
+                x509.AccessDescription(
+                    AuthorityInformationAccessOID.OCSP,
+                    x509.UniformResourceIdentifier(BENCHMARK_OCSP_RESPONDER),
+                ),
+            ]), critical=False
+        ).add_extension(
+            x509.AuthorityKeyIdentifier.from_issuer_public_key(self.key.public_key()), critical=False
+        ).sign(self.key, hashes.SHA256())
+        self.issued[certificate.serial_number] = certificate
+        return certificate
+
+    def crl(self, revoked_serials=()):
+        """CRL listing ``revoked_serials``."""
+        now = datetime.now(timezone.utc)
+        builder = x509.CertificateRevocationListBuilder().issuer_name(
+            self.certificate.subject
+        ).last_update(
+            now
+        ).next_update(
+            now + timedelta(days=1)
+        )
+        for serial in revoked_serials:
+            builder = builder.add_revoked_certificate(
+                x509.RevokedCertificateBuilder().serial_number(serial).revocation_date(now).build()
+            )
+        return builder.sign(self.key, hashes.SHA256())
+
+    def ocsp_response(self, request_der):
+        """Signed GOOD answer for an OCSP request about a certificate this CA issued."""
+        request = ocsp.load_der_ocsp_request(request_der)
+        now = datetime.now(timezone.utc)
+        return ocsp.OCSPResponseBuilder().add_response(
+            cert=self.issued[request.serial_number],
+            issuer=self.certificate,
+            algorithm=request.hash_algorithm,
+            cert_status=ocsp.OCSPCertStatus.GOOD,
+            this_update=now,
+            next_update=now + timedelta(hours=1),
+            revocation_time=None,
+            revocation_reason=None,
+        ).responder_id(
+            ocsp.OCSPResponderEncoding.HASH, self.certificate
+        ).sign(self.key, hashes.SHA256()).public_bytes(serialization.Encoding.DER)
+
+
+class _OCSPHTTPResponse:
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+class OCSPResponderStandIn:
+    """
+    Replaces the pooled requests.Session of the benchmark OCSP responder.
+
+    ``latency_ms`` simulates the round trip to a real responder.
+    """
+
+    def __init__(self, ca, latency_ms=0):
+        self.ca = ca
+        self.latency_ms = latency_ms
+        self.requests = 0
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        self.requests += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return _OCSPHTTPResponse(self.ca.ocsp_response(data))
+
+
+def build_signed_pdf(text, signer_key, signer_certificate, extra_certificates=(), pages=1):
+    """
+    Build a PDF whose text includes ``text`` and sign it like a PAdES tool.
+
+    The signature field's /Contents holds a detached CMS SignedData over
+    the ByteRange (everything but /Contents itself), zero padded to
+    SIGNATURE_CONTENTS_SIZE.
+
+    Returns:
+        bytes: the signed PDF
+    """
+    page_numbers = [6 + 2 * index for index in range(pages)]
+    stream = f'BT /F1 12 Tf 72 720 Td ({text}) Tj ET'.encode('latin-1')
+    byte_range_width = 48
+
+    objects = {
+        1: b'<< /Type /Catalog /Pages 2 0 R /AcroForm << /Fields [4 0 R] /SigFlags 3 >> >>',
+        2: b'<< /Type /Pages /Kids [' + b' '.join(b'%d 0 R' % n for n in page_numbers)
+           + b'] /Count %d >>' % pages,
+        3: b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+        4: b'<< /Type /Annot /Subtype /Widget /FT /Sig /T (Assinatura) /Rect [0 0 0 0] '
+           b'/F 132 /P %d 0 R /V 5 0 R >>' % page_numbers[0],
+        5: b'<< /Type /Sig /Filter /Adobe.PPKLite /SubFilter /adbe.pkcs7.detached '
+           b'/ByteRange [' + b' ' * byte_range_width + b'] '
+           b'/Contents <' + b'0' * (SIGNATURE_CONTENTS_SIZE * 2) + b'> >>',
+    }
+    for index, number in enumerate(page_numbers):
+        annots = b' /Annots [4 0 R]' if index == 0 else b''
+        objects[number] = (
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+            b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R%s >>' % (number + 1, annots)
+        )
+        objects[number + 1] = b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream)
+
+    pdf = bytearray(b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n')
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(pdf)
+        pdf += b'%d 0 obj\n%s\nendobj\n' % (number, objects[number])
+
+    xref_offset = len(pdf)
+    pdf += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for number in sorted(objects):
+        pdf += b'%010d 00000 n \n' % offsets[number]
+    pdf += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (
+        len(objects) + 1, xref_offset
+    )
+
+    contents_start = pdf.index(b'/Contents <', offsets[5]) + len(b'/Contents ')
+    contents_end = contents_start + SIGNATURE_CONTENTS_SIZE * 2 + 2
+    byte_range = b'0 %d %d %d' % (contents_start, contents_end, len(pdf) - contents_end)
+    range_start = pdf.index(b'/ByteRange [', offsets[5]) + len(b'/ByteRange [')
+    pdf[range_start:range_start + byte_range_width] = byte_range.ljust(byte_range_width)
+
+    builder = pkcs7.PKCS7SignatureBuilder().set_data(
+        bytes(pdf[:contents_start] + pdf[contents_end:])
+    ).add_signer(
+        signer_certificate, signer_key, hashes.SHA256()
+    )
+    for certificate in extra_certificates:
+        builder = builder.add_certificate(certificate)
+    cms = builder.sign(serialization.Encoding.DER, [
+        pkcs7.PKCS7Options.DetachedSignature, pkcs7.PKCS7Options.Binary,
+    ])
+
+    signature_hex = cms.hex().encode('ascii')
+    if len(signature_hex) > SIGNATURE_CONTENTS_SIZE * 2:
+        raise ValueError(f'CMS signature ({len(cms)} bytes) does not fit in /Contents')
+    pdf[contents_start + 1:contents_end - 1] = signature_hex.ljust(SIGNATURE_CONTENTS_SIZE * 2, b'0')
+    return bytes(pdf)
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of ``values`` (0 < q <= 1)."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = min(max(math.ceil(q * len(ordered)), 1), len(ordered))
+    return ordered[rank - 1]
+
+
+def summarize(durations_ms):
+    """count, mean and p50/p95/p99/max of a list of durations (ms)."""
+    return {
+        'count': len(durations_ms),
+        'mean_ms': round(sum(durations_ms) / len(durations_ms), 3),
+        'p50_ms': round(percentile(durations_ms, 0.50), 3),
+        'p95_ms': round(percentile(durations_ms, 0.95), 3),
+        'p99_ms': round(percentile(durations_ms, 0.99), 3),
+        'max_ms': round(max(durations_ms), 3),
+    }
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KiB, or None where unsupported."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux KiB
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def _custody_signature(petition, result, index):
+    from apps.signatures.models import Signature
+
+    now = datetime.now(timezone.utc)
+    certificate_info = result['certificate_info']
+    return Signature(
+        petition=petition,
+        full_name=f'Assinante Benchmark {index}',
+        cpf_hash='0' * 64,
+        email=f'assinante{index}@example.com',
+        city='Brasília',
+        state='DF',
+        signed_pdf_size=0,
+        verification_status=Signature.STATUS_APPROVED,
+        verified_cpf_from_certificate=True,
+        certificate_info=certificate_info,
+        certificate_subject=certificate_info['subject'],
+        certificate_issuer=certificate_info['issuer'],
+        certificate_serial=certificate_info['serial_number'],
+        created_at=now,
+        processing_started_at=now,
+        processing_completed_at=now,
+        verified_at=now,
+        certificate_generated_at=now,
+    )
+
+
+def _generate_custody(signature, result):
+    from apps.signatures.custody_service import (
+        CustodyCertificatePDFGenerator,
+        build_chain_of_custody,
+        build_verification_evidence,
+        calculate_verification_hash,
+    )
+
+    signature.verification_evidence = build_verification_evidence(signature, result)
+    signature.verification_hash = calculate_verification_hash(signature.verification_evidence)
+    signature.chain_of_custody = build_chain_of_custody(signature)
+    return CustodyCertificatePDFGenerator(signature).generate()
+
+
+def run_benchmark(iterations=200, revocation='crl', ocsp_latency_ms=0, pages=1,
+                  warmup=5, custody=True, stdout=None):
+    """
+    Verify ``iterations`` synthetic signed PDFs and measure every stage.
+
+    Args:
+        iterations: measured verifications (and custody certificates)
+        revocation: 'crl' (cached CRL index) or 'ocsp' (in-process responder)
+        ocsp_latency_ms: simulated responder round trip
+        pages: pages per synthetic PDF
+        warmup: unmeasured verifications run first
+        custody: also time custody certificate generation
+        stdout: optional stream for progress lines
+
+    Returns:
+        dict: the benchmark report
+    """
+    from apps.petitions.models import Petition
+
+    if revocation not in REVOCATION_MODES:
+        raise ValueError(f'Unknown revocation mode: {revocation}')
+
+    def progress(message):
+        if stdout is not None:
+            stdout.write(message)
+
+    rss = {'start': peak_rss_kb()}
+    cert_dir = tempfile.mkdtemp(prefix='signature-benchmark-')
+    try:
+        with override_settings(CACHES=BENCHMARK_CACHES, SIGNATURE_VERIFICATION_STRICT=True):
+            cache.clear()
+            clear_local_cache()
+
+            # Synthetic inputs: one CA, one signer key, a certificate per PDF
+            # so OCSP answers are never served from the response cache
+            progress(f'Generating {warmup + iterations} signed PDFs...')
+            ca = BenchmarkCA()
+            with open(f'{cert_dir}/ac-raiz-benchmark.crt', 'wb') as f:
+                f.write(ca.certificate.public_bytes(serialization.Encoding.PEM))
+
+            petition = Petition(uuid=uuid.uuid4(), title='Petição de benchmark')
+            signer_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+            pdfs = [
+                build_signed_pdf(
+                    f'Peticao {petition.uuid}',
+                    signer_key,
+                    ca.issue(signer_key.public_key(), f'{index:011d}'),
+                    [ca.certificate],
+                    pages=pages,
+                )
+                for index in range(warmup + iterations)
+            ]
+            rss['generation'] = peak_rss_kb()
+
+            responder = OCSPResponderStandIn(ca, ocsp_latency_ms)
+            if revocation == 'crl':
+                # The checker always consults the AC-Raiz index
+                store_crl_index('AC-Raiz', ca.crl())
+            with revocation_checker._ocsp_sessions_lock:
+                revocation_checker._ocsp_sessions[BENCHMARK_OCSP_RESPONDER] = responder
+
+            try:
+                verifier = PDFSignatureVerifier(cert_dir=cert_dir)
+
+                progress(f'Verifying {iterations} PDFs ({revocation})...')
+                stage_durations = {}
+                results = []
+                started = time.perf_counter()
+                for index, pdf in enumerate(pdfs):
+                    if index == warmup:
+                        started = time.perf_counter()
+
+                    start = time.perf_counter()
+                    result = verifier.verify_pdf_signature(BytesIO(pdf), petition)
+                    total_ms = (time.perf_counter() - start) * 1000
+
+                    if not result['verified']:
+                        raise RuntimeError(f"Synthetic PDF {index} failed verification: {result['error']}")
+                    if index < warmup:
+                        continue
+
+                    results.append(result)
+                    stage_durations.setdefault('total', []).append(total_ms)
+                    for name, entry in result['stage_timings'].items():
+                        stage_durations.setdefault(stage_label(name, entry), []).append(entry['duration_ms'])
+                verification_seconds = time.perf_counter() - started
+                rss['verification'] = peak_rss_kb()
+            finally:
+                with revocation_checker._ocsp_sessions_lock:
+                    revocation_checker._ocsp_sessions.pop(BENCHMARK_OCSP_RESPONDER, None)
+                clear_local_cache()
+
+            custody_seconds = None
+            if custody:
+                progress(f'Generating {iterations} custody certificates...')
+                custody_started = time.perf_counter()
+                for index, result in enumerate(results):
+                    signature = _custody_signature(petition, result, index)
+                    start = time.perf_counter()
+                    _generate_custody(signature, result)
+                    stage_durations.setdefault('custody', []).append((time.perf_counter() - start) * 1000)
+                custody_seconds = time.perf_counter() - custody_started
+                rss['custody'] = peak_rss_kb()
+    finally:
+        shutil.rmtree(cert_dir, ignore_errors=True)
+
+    return {
+        'benchmark': 'signature_verification',
+        'config': {
+            'iterations': iterations,
+            'warmup': warmup,
+            'revocation': revocation,
+            'ocsp_latency_ms': ocsp_latency_ms,
+            'pages': pages,
+            'python': platform.python_version(),
+        },
+        'throughput': {
+            'verifications_per_second': round(iterations / verification_seconds, 2),
+            'custody_certificates_per_second': (
+                round(iterations / custody_seconds, 2) if custody_seconds else None
+            ),
+        },
+        'stages': {label: summarize(values) for label, values in sorted(stage_durations.items())},
+        'peak_rss_kb': rss,
+        'ocsp_requests': responder.requests,
+    }
+
+
+def compare_reports(baseline, current, tolerance=0.25, noise_floor_ms=0.5):
+    """
+    Regressions of ``current`` against ``baseline``.
+
+    Throughput may drop, and stage p95 latency and peak RSS may grow, by at
+    most ``tolerance`` (a fraction); latency differences under
+    ``noise_floor_ms`` are ignored.
+
+    Returns:
+        list: one human readable line per regression
+    """
+    regressions = []
+
+    for key, base in baseline.get('throughput', {}).items():
+        value = current.get('throughput', {}).get(key)
+        if base and value is not None and value < base * (1 - tolerance):
+            regressions.append(f'{key}: {value} < {base} (baseline)')
+
+    for label, base in baseline.get('stages', {}).items():
+        stats = current.get('stages', {}).get(label)
+        if stats is None:
+            continue
+        limit = base['p95_ms'] * (1 + tolerance)
+        if stats['p95_ms'] > limit and stats['p95_ms'] - base['p95_ms'] > noise_floor_ms:
+            regressions.append(f"{label} p95: {stats['p95_ms']} ms > {base['p95_ms']} ms (baseline)")
+
+    for phase, base in baseline.get('peak_rss_kb', {}).items():
+        value = current.get('peak_rss_kb', {}).get(phase)
+        if base and value and value > base * (1 + tolerance):
+            regressions.append(f'peak RSS after {phase}: {value} KiB > {base} KiB (baseline)')
+
+    return regressions
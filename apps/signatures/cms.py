@@ -0,0 +1,451 @@
+"""
+CMS (PKCS#7) signature verification over a PDF ByteRange.
+
+``cryptography`` can only pull the certificates out of a SignedData
+structure, so the few fields needed to check the signature itself are read
+here with a minimal DER/BER reader:
+
+    ContentInfo { contentType, [0] SignedData {
+        version, digestAlgorithms, encapContentInfo, [0] certificates,
+        [1] crls, signerInfos { SignerInfo } } }
+
+    SignerInfo { version, sid, digestAlgorithm, [0] signedAttrs,
+                 signatureAlgorithm, signature, [1] unsignedAttrs }
+
+The two signed slices of the PDF are fed to the digest straight from the
+source buffer (memoryview slices) or file (fixed-size reads), so the signed
+bytes are never joined into a second copy of the document.
+"""
+import hashlib
+import hmac
+from dataclasses import dataclass
+
+from cryptography import x509
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, padding, rsa, utils
+
+# Bytes hashed per read when digesting a ByteRange
+CMS_DIGEST_CHUNK_SIZE = 64 * 1024
+# Bytes read from the end of the signed range to find its %%EOF marker
+SIGNED_REVISION_TAIL_SIZE = 32
+
+OID_SIGNED_DATA = '1.2.840.113549.1.7.2'
+OID_MESSAGE_DIGEST = '1.2.840.113549.1.9.4'
+OID_RSASSA_PSS = '1.2.840.113549.1.1.10'
+
+# Digest algorithms by OID; signature OIDs are accepted too because some
+# signers put sha256WithRSAEncryption in the digestAlgorithm field
+DIGEST_ALGORITHMS = {
+    '1.3.14.3.2.26': 'sha1',
+    '2.16.840.1.101.3.4.2.4': 'sha224',
+    '2.16.840.1.101.3.4.2.1': 'sha256',
+    '2.16.840.1.101.3.4.2.2': 'sha384',
+    '2.16.840.1.101.3.4.2.3': 'sha512',
+    '1.2.840.113549.1.1.5': 'sha1',
+    '1.2.840.113549.1.1.14': 'sha224',
+    '1.2.840.113549.1.1.11': 'sha256',
+    '1.2.840.113549.1.1.12': 'sha384',
+    '1.2.840.113549.1.1.13': 'sha512',
+}
+
+_HASHES = {
+    'sha1': hashes.SHA1,
+    'sha224': hashes.SHA224,
+    'sha256': hashes.SHA256,
+    'sha384': hashes.SHA384,
+    'sha512': hashes.SHA512,
+}
+
+# DER tags
+_INTEGER = 0x02
+_OCTET_STRING = 0x04
+_OID = 0x06
+_SEQUENCE = 0x30
+_SET = 0x31
+_CONTEXT_0 = 0xA0
+_CONTEXT_0_PRIMITIVE = 0x80
+
+
+class CMSError(Exception):
+    """Raised when a CMS signature is malformed or does not verify."""
+    pass
+
+
+@dataclass
+class SignerInfo:
+    """The fields of a CMS SignerInfo needed to verify it."""
+    issuer: bytes
+    serial_number: int
+    subject_key_identifier: bytes
+    digest_algorithm: str
+    signed_attrs: bytes
+    message_digest: bytes
+    signature_algorithm: str
+    signature: bytes
+
+
+@dataclass
+class SignedData:
+    """Parsed SignedData: embedded certificates and signer infos."""
+    certificates: list
+    signer_infos: list
+
+
+# --- DER reading -------------------------------------------------------------
+
+class _TLV:
+    __slots__ = ('tag', 'data', 'start', 'content_start', 'end')
+
+    def __init__(self, tag, data, start, content_start, end):
+        self.tag = tag
+        self.data = data
+        self.start = start
+        self.content_start = content_start
+        self.end = end
+
+    @property
+    def encoded(self):
+        return bytes(self.data[self.start:self.end])
+
+    @property
+    def content(self):
+        return bytes(self.data[self.content_start:self.end])
+
+    def children(self):
+        return list(_iter_tlvs(self.data, self.content_start, self.end))
+
+
+def _read_tlv(data, offset, limit=None):
+    """Read one TLV at ``offset``; BER indefinite lengths are followed to their end."""
+    limit = len(data) if limit is None else limit
+    if offset + 2 > limit:
+        raise CMSError('truncated DER element')
+
+    tag = data[offset]
+    if tag & 0x1F == 0x1F:
+        raise CMSError('high tag numbers are not supported')
+
+    length = data[offset + 1]
+    position = offset + 2
+
+    if length == 0x80:
+        if not tag & 0x20:
+            raise CMSError('indefinite length on a primitive element')
+        # Walk the children up to the end-of-contents marker
+        child = position
+        while True:
+            if child + 2 > limit:
+                raise CMSError('unterminated indefinite length element')
+            if data[child] == 0 and data[child + 1] == 0:
+                return _TLV(tag, data, offset, position, child), child + 2
+            child = _read_tlv(data, child, limit)[1]
+
+    if length & 0x80:
+        size = length & 0x7F
+        if size == 0 or size > 4 or position + size > limit:
+            raise CMSError('invalid DER length')
+        length = int.from_bytes(data[position:position + size], 'big')
+        position += size
+
+    end = position + length
+    if end > limit:
+        raise CMSError('DER element overruns its container')
+    return _TLV(tag, data, offset, position, end), end
+
+
+def _iter_tlvs(data, start, end):
+    offset = start
+    while offset < end:
+        element, offset = _read_tlv(data, offset, end)
+        yield element
+
+
+def _expect(element, tag, what):
+    if element.tag != tag:
+        raise CMSError(f'unexpected tag 0x{element.tag:02x} for {what}')
+    return element
+
+
+def _decode_oid(content):
+    values = []
+    value = 0
+    for byte in content:
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            values.append(value)
+            value = 0
+    if not values:
+        raise CMSError('empty OID')
+    first = min(values[0] // 40, 2)
+    return '.'.join(str(part) for part in [first, values[0] - first * 40] + values[1:])
+
+
+def _algorithm_oid(element):
+    return _decode_oid(_expect(element.children()[0], _OID, 'algorithm').content)
+
+
+# --- SignedData parsing ------------------------------------------------------
+
+def parse_signed_data(cms_data):
+    """
+    Parse a DER (or BER) ContentInfo holding SignedData.
+
+    Trailing bytes are ignored: PDF /Contents is zero padded after the CMS.
+
+    Raises:
+        CMSError: if the structure is not a SignedData with signer infos
+    """
+    try:
+        return _parse_signed_data(memoryview(cms_data))
+    except (IndexError, StopIteration, ValueError) as e:
+        raise CMSError(f'malformed SignedData: {e}')
+
+
+def _parse_signed_data(data):
+    content_info, _ = _read_tlv(data, 0)
+    _expect(content_info, _SEQUENCE, 'ContentInfo')
+
+    parts = content_info.children()
+    if len(parts) < 2 or _decode_oid(_expect(parts[0], _OID, 'contentType').content) != OID_SIGNED_DATA:
+        raise CMSError('content is not SignedData')
+
+    signed_data = _expect(_expect(parts[1], _CONTEXT_0, 'content').children()[0], _SEQUENCE, 'SignedData')
+    fields = signed_data.children()
+
+    certificates = []
+    signer_infos = None
+    for field in fields[3:]:
+        if field.tag == _CONTEXT_0:
+            for element in field.children():
+                if element.tag == _SEQUENCE:
+                    certificates.append(x509.load_der_x509_certificate(element.encoded))
+        elif field.tag == _SET:
+            signer_infos = [_parse_signer_info(element) for element in field.children()]
+
+    if not signer_infos:
+        raise CMSError('SignedData has no signer info')
+
+    return SignedData(certificates=certificates, signer_infos=signer_infos)
+
+
+def _parse_signer_info(element):
+    fields = iter(_expect(element, _SEQUENCE, 'SignerInfo').children())
+    next(fields)  # version
+
+    sid = next(fields)
+    issuer, serial_number, subject_key_identifier = b'', None, b''
+    if sid.tag == _SEQUENCE:
+        issuer_name, serial = sid.children()[:2]
+        issuer = issuer_name.encoded
+        serial_number = int.from_bytes(_expect(serial, _INTEGER, 'serialNumber').content, 'big', signed=True)
+    elif sid.tag == _CONTEXT_0_PRIMITIVE:
+        subject_key_identifier = sid.content
+    else:
+        raise CMSError('unsupported signer identifier')
+
+    digest_oid = _algorithm_oid(next(fields))
+    digest_algorithm = DIGEST_ALGORITHMS.get(digest_oid)
+    if digest_algorithm is None:
+        raise CMSError(f'unsupported digest algorithm {digest_oid}')
+
+    field = next(fields)
+    signed_attrs = b''
+    message_digest = b''
+    if field.tag == _CONTEXT_0:
+        # Signed over as an explicit SET OF, not the [0] IMPLICIT tag
+        signed_attrs = b'\x31' + field.encoded[1:]
+        for attribute in field.children():
+            attr_type, attr_values = attribute.children()[:2]
+            if _decode_oid(attr_type.content) == OID_MESSAGE_DIGEST:
+                message_digest = _expect(attr_values.children()[0], _OCTET_STRING, 'messageDigest').content
+        if not message_digest:
+            raise CMSError('signed attributes lack messageDigest')
+        field = next(fields)
+
+    signature_algorithm = _algorithm_oid(field)
+    signature = _expect(next(fields), _OCTET_STRING, 'signature').content
+
+    return SignerInfo(
+        issuer=issuer,
+        serial_number=serial_number,
+        subject_key_identifier=subject_key_identifier,
+        digest_algorithm=digest_algorithm,
+        signed_attrs=signed_attrs,
+        message_digest=message_digest,
+        signature_algorithm=signature_algorithm,
+        signature=signature,
+    )
+
+
+def find_signer_certificate(signer_info, certificates):
+    """Certificate in ``certificates`` identified by the SignerInfo sid, or None."""
+    for certificate in certificates:
+        if signer_info.subject_key_identifier:
+            try:
+                ski = certificate.extensions.get_extension_for_class(x509.SubjectKeyIdentifier).value.digest
+            except (x509.ExtensionNotFound, ValueError):
+                continue
+            if ski == signer_info.subject_key_identifier:
+                return certificate
+        elif (
+            certificate.serial_number == signer_info.serial_number
+            and certificate.issuer.public_bytes() == signer_info.issuer
+        ):
+            return certificate
+    return None
+
+
+# --- ByteRange digest --------------------------------------------------------
+
+def check_byte_range(byte_range, total_size):
+    """
+    Validate a PDF /ByteRange ``[offset1, length1, offset2, length2]``.
+
+    The signed slices must start at the beginning of the file and leave
+    only the /Contents gap unsigned. They may end before the end of the
+    file: incremental updates (a second signature, form filling) append a
+    new revision after the signed one, and only the signed revision
+    ``[0, offset2 + length2)`` is covered by this signature.
+    """
+    try:
+        start1, length1, start2, length2 = (int(value) for value in byte_range)
+    except (TypeError, ValueError):
+        raise CMSError('malformed ByteRange')
+
+    if start1 != 0 or length1 <= 0 or length2 < 0 or start2 <= length1:
+        raise CMSError('ByteRange does not cover the document')
+    if start2 + length2 > total_size:
+        raise CMSError('ByteRange extends past the end of the file')
+
+    return start1, length1, start2, length2
+
+
+def check_signed_revision(source, signed_size):
+    """
+    Check that the signed bytes end a complete PDF revision (``%%EOF``).
+
+    Only needed when bytes follow the signed range: anything else appended
+    to the file is not an incremental update of the signed document.
+    """
+    start = max(0, signed_size - SIGNED_REVISION_TAIL_SIZE)
+    if hasattr(source, 'read'):
+        source.seek(start)
+        tail = source.read(signed_size - start)
+    else:
+        tail = bytes(memoryview(source)[start:signed_size])
+    if not tail.rstrip().endswith(b'%%EOF'):
+        raise CMSError('document was modified after signing')
+
+
+def digest_byte_ranges(source, byte_range, algorithm, chunk_size=CMS_DIGEST_CHUNK_SIZE):
+    """
+    Hash the slices named by ``byte_range`` in a single streaming pass.
+
+    Args:
+        source: bytes-like object, or a seekable binary file
+        byte_range: ``[offset1, length1, offset2, length2]``
+        algorithm: hashlib name ('sha256', ...)
+
+    Returns:
+        bytes: the digest
+    """
+    digest = hashlib.new(algorithm)
+    ranges = list(byte_range)
+
+    if hasattr(source, 'read'):
+        for offset, length in zip(ranges[0::2], ranges[1::2]):
+            source.seek(offset)
+            while length > 0:
+                chunk = source.read(min(chunk_size, length))
+                if not chunk:
+                    raise CMSError('ByteRange extends past the end of the file')
+                digest.update(chunk)
+                length -= len(chunk)
+        return digest.digest()
+
+    view = memoryview(source)
+    for offset, length in zip(ranges[0::2], ranges[1::2]):
+        if offset + length > len(view):
+            raise CMSError('ByteRange extends past the end of the file')
+        for position in range(offset, offset + length, chunk_size):
+            digest.update(view[position:min(position + chunk_size, offset + length)])
+    return digest.digest()
+
+
+# --- Verification ------------------------------------------------------------
+
+def _verify_with_key(certificate, signer_info, data, prehashed_digest=None):
+    """Check ``signer_info.signature`` over ``data`` (or an already computed digest)."""
+    public_key = certificate.public_key()
+    hash_algorithm = _HASHES[signer_info.digest_algorithm]()
+    if prehashed_digest is not None:
+        data, signed_hash = prehashed_digest, utils.Prehashed(hash_algorithm)
+    else:
+        signed_hash = hash_algorithm
+
+    if isinstance(public_key, rsa.RSAPublicKey):
+        if signer_info.signature_algorithm == OID_RSASSA_PSS:
+            pad = padding.PSS(mgf=padding.MGF1(hash_algorithm), salt_length=padding.PSS.AUTO)
+        else:
+            pad = padding.PKCS1v15()
+        public_key.verify(signer_info.signature, data, pad, signed_hash)
+    elif isinstance(public_key, ec.EllipticCurvePublicKey):
+        public_key.verify(signer_info.signature, data, ec.ECDSA(signed_hash))
+    elif isinstance(public_key, ed25519.Ed25519PublicKey) and prehashed_digest is None:
+        public_key.verify(signer_info.signature, data)
+    else:
+        raise CMSError(f'unsupported signer key type {type(public_key).__name__}')
+
+
+def verify_byte_range_signature(signed_data, source, byte_range, certificates=None):
+    """
+    Verify the first signer of ``signed_data`` over the PDF ``byte_range``.
+
+    Args:
+        signed_data: SignedData from parse_signed_data()
+        source: the PDF as a bytes-like object or a seekable binary file
+        byte_range: the signature dictionary /ByteRange
+        certificates: candidate signer certificates (defaults to the embedded ones)
+
+    Returns:
+        dict: 'certificate' (the signer), 'digest_algorithm', 'digest' (hex),
+        'signed_size' (bytes of the signed revision) and 'appended_bytes'
+        (incremental updates after it, not covered by the signature)
+
+    Raises:
+        CMSError: if the ByteRange, messageDigest or signature does not verify
+    """
+    signer_info = signed_data.signer_infos[0]
+    certificate = find_signer_certificate(signer_info, certificates or signed_data.certificates)
+    if certificate is None:
+        raise CMSError('signer certificate not found in the signature')
+
+    if hasattr(source, 'read'):
+        total_size = source.seek(0, 2)
+    else:
+        total_size = len(source)
+    byte_range = check_byte_range(byte_range, total_size)
+    signed_size = byte_range[2] + byte_range[3]
+    if signed_size < total_size:
+        check_signed_revision(source, signed_size)
+
+    digest = digest_byte_ranges(source, byte_range, signer_info.digest_algorithm)
+
+    try:
+        if signer_info.signed_attrs:
+            if not hmac.compare_digest(digest, signer_info.message_digest):
+                raise CMSError('messageDigest does not match the signed ByteRange')
+            _verify_with_key(certificate, signer_info, signer_info.signed_attrs)
+        else:
+            _verify_with_key(certificate, signer_info, None, prehashed_digest=digest)
+    except InvalidSignature:
+        raise CMSError('signature does not verify against the signer certificate')
+
+    return {
+        'certificate': certificate,
+        'digest_algorithm': signer_info.digest_algorithm,
+        'digest': digest.hex(),
+        'signed_size': signed_size,
+        'appended_bytes': total_size - signed_size,
+    }
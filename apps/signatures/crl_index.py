@@ -0,0 +1,446 @@
+"""
+Compact, bucketed index of revoked certificate serials in the Django cache.
+
+A CRL is stored as small hash buckets instead of one pickled set:
+
+    crl:{ca}:meta                     issuer, update times, count, generation
+    crl:{ca}:{generation}:{bucket}    {serial: {'revocation_date', 'reason'}}
+
+Buckets live for CRL_INDEX_BUCKET_TIMEOUT, longer than the meta entry, and
+the meta entry records when they expire. A refresh that finds the CRL
+unchanged only rewrites the meta entry; the buckets are touched one by one
+only when they would expire before it. The buckets of a replaced
+generation are deleted when the new one is published.
+
+A serial always maps to bucket ``serial % buckets``, so a lookup reads the
+meta entry and one bucket of roughly CRL_INDEX_BUCKET_SIZE entries, whatever
+the size of the CRL. Every bucket is written (empty ones included) before the
+meta entry, and a new generation is used on each refresh, so readers never
+see a half-written index. A missing bucket means the index was evicted and is
+reported as a miss, never as "not revoked".
+
+Each worker keeps the meta entries and the buckets it has read in small
+LRUs, so steady-state lookups need no cache round-trip. Buckets share one
+LRU across every CA (CRL_INDEX_LOCAL_MAX_BUCKETS), so a few large CRLs
+cannot fill the worker's memory. Local entries expire at the CRL's
+next_update and are all dropped when the global version stamp
+(``crl:version``, bumped after every CRL refresh) changes; the stamp is
+re-read at most every CRL_INDEX_VERSION_CHECK_INTERVAL seconds.
+"""
+import logging
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from cryptography import x509
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Cache for 25 hours (gives 1-hour overlap before next daily run)
+CRL_CACHE_TIMEOUT = 25 * 3600
+
+# Index buckets outlive the meta entry, so unchanged CRLs only touch the meta
+CRL_INDEX_BUCKET_TIMEOUT = 7 * 24 * 3600
+
+# Target number of serials per bucket
+CRL_INDEX_BUCKET_SIZE = 64
+
+# Buckets written per cache round-trip
+CRL_INDEX_WRITE_BATCH = 500
+
+# Per-worker LRU: number of CA meta entries and buckets (all CAs together)
+# kept, how often the version stamp is re-read, and how long "no CRL cached
+# for this CA" is remembered
+CRL_INDEX_LOCAL_MAX_ENTRIES = 32
+CRL_INDEX_LOCAL_MAX_BUCKETS = 1024
+CRL_INDEX_VERSION_CHECK_INTERVAL = 30  # seconds
+CRL_INDEX_NEGATIVE_TTL = 300  # seconds
+
+CRL_VERSION_KEY = 'crl:version'
+
+
+class CRLIndexUnavailable(Exception):
+    """Raised when a cached CRL index exists but is incomplete."""
+    pass
+
+
+def meta_key(ca_name):
+    return f"crl:{ca_name}:meta"
+
+
+def _bucket_key(ca_name, generation, bucket):
+    return f"crl:{ca_name}:{generation}:{bucket}"
+
+
+def _bucket_timeout(timeout):
+    return max(timeout, CRL_INDEX_BUCKET_TIMEOUT)
+
+
+class _LocalIndex:
+    """Meta entry for one CA, held in-process."""
+
+    __slots__ = ('meta', 'expires_at')
+
+    def __init__(self, meta, expires_at):
+        self.meta = meta
+        self.expires_at = expires_at
+
+
+_local_lock = threading.Lock()
+_local_indexes = OrderedDict()
+_local_buckets = OrderedDict()  # (ca_name, generation, bucket) -> bucket
+_local_version = {'value': None, 'checked_at': None}
+
+
+def _expiry_for(meta):
+    """Monotonic deadline for a local entry: next_update, capped by the cache TTL."""
+    now = time.time()
+    if meta is None:
+        return time.monotonic() + CRL_INDEX_NEGATIVE_TTL
+
+    ttl = CRL_CACHE_TIMEOUT
+    next_update = meta.get('next_update')
+    if next_update:
+        try:
+            next_update = datetime.fromisoformat(next_update)
+            if next_update.tzinfo is None:
+                next_update = next_update.replace(tzinfo=timezone.utc)
+            ttl = min(ttl, next_update.timestamp() - now)
+        except ValueError:
+            pass
+    return time.monotonic() + ttl
+
+
+def _check_local_version():
+    """Drop every local entry if the global version stamp moved."""
+    now = time.monotonic()
+    checked_at = _local_version['checked_at']
+    if checked_at is not None and now - checked_at < CRL_INDEX_VERSION_CHECK_INTERVAL:
+        return
+
+    version = cache.get(CRL_VERSION_KEY)
+    with _local_lock:
+        if version != _local_version['value']:
+            _local_indexes.clear()
+            _local_buckets.clear()
+            _local_version['value'] = version
+        _local_version['checked_at'] = now
+
+
+def _get_local(ca_name):
+    with _local_lock:
+        entry = _local_indexes.get(ca_name)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del _local_indexes[ca_name]
+            _discard_buckets(ca_name)
+            return None
+        _local_indexes.move_to_end(ca_name)
+        return entry
+
+
+def _put_local(ca_name, entry):
+    with _local_lock:
+        if _local_indexes.pop(ca_name, None) is not None:
+            _discard_buckets(ca_name)
+        _local_indexes[ca_name] = entry
+        while len(_local_indexes) > CRL_INDEX_LOCAL_MAX_ENTRIES:
+            evicted, _ = _local_indexes.popitem(last=False)
+            _discard_buckets(evicted)
+
+
+def _get_local_bucket(key):
+    with _local_lock:
+        bucket = _local_buckets.get(key)
+        if bucket is not None:
+            _local_buckets.move_to_end(key)
+        return bucket
+
+
+def _put_local_bucket(key, bucket):
+    with _local_lock:
+        if key[0] not in _local_indexes:
+            # The CA's entry was dropped while the bucket was being read
+            return
+        _local_buckets[key] = bucket
+        _local_buckets.move_to_end(key)
+        while len(_local_buckets) > CRL_INDEX_LOCAL_MAX_BUCKETS:
+            _local_buckets.popitem(last=False)
+
+
+def _discard_buckets(ca_name):
+    """Forget the buckets held for ``ca_name``; the caller holds _local_lock."""
+    for key in [key for key in _local_buckets if key[0] == ca_name]:
+        del _local_buckets[key]
+
+
+def _drop_local(ca_name):
+    with _local_lock:
+        _local_indexes.pop(ca_name, None)
+        _discard_buckets(ca_name)
+
+
+def clear_local_cache():
+    """Forget every CRL index held by this process."""
+    with _local_lock:
+        _local_indexes.clear()
+        _local_buckets.clear()
+        _local_version['value'] = None
+        _local_version['checked_at'] = None
+
+
+def bump_crl_version():
+    """
+    Invalidate the CRL indexes held by every worker.
+
+    Call after refreshing cached CRLs; workers notice within
+    CRL_INDEX_VERSION_CHECK_INTERVAL seconds.
+    """
+    version = uuid.uuid4().hex[:12]
+    cache.set(CRL_VERSION_KEY, version, None)
+    return version
+
+
+def revocation_reason(revoked_cert):
+    """Extract revocation reason from a CRL entry."""
+    try:
+        from cryptography.x509.oid import CRLEntryExtensionOID
+        reason_ext = revoked_cert.extensions.get_extension_for_oid(
+            CRLEntryExtensionOID.CRL_REASON
+        )
+        return str(reason_ext.value.reason)
+    except Exception:
+        return 'unspecified'
+
+
+def crl_number(crl):
+    """CRL number extension of ``crl``, or None when absent."""
+    try:
+        return int(crl.extensions.get_extension_for_class(x509.CRLNumber).value.crl_number)
+    except (x509.ExtensionNotFound, ValueError, TypeError):
+        return None
+
+
+def _entry_details(revoked_cert):
+    return {
+        'revocation_date': revoked_cert.revocation_date_utc.isoformat(),
+        'reason': revocation_reason(revoked_cert),
+    }
+
+
+def store_crl_index(ca_name, crl, timeout=CRL_CACHE_TIMEOUT, **meta_fields):
+    """
+    Index the revoked serials of ``crl`` under ``ca_name``.
+
+    Extra keyword arguments (source URL, ETag, CRL number...) are kept in
+    the meta entry for the next conditional refresh.
+
+    Returns:
+        dict: the meta entry written to the cache
+    """
+    revoked = [
+        (revoked_cert.serial_number, _entry_details(revoked_cert))
+        for revoked_cert in crl
+    ]
+
+    bucket_count = max(1, math.ceil(len(revoked) / CRL_INDEX_BUCKET_SIZE))
+    generation = uuid.uuid4().hex[:12]
+
+    buckets = [{} for _ in range(bucket_count)]
+    for serial, details in revoked:
+        buckets[serial % bucket_count][serial] = details
+
+    bucket_timeout = _bucket_timeout(timeout)
+    for start in range(0, bucket_count, CRL_INDEX_WRITE_BATCH):
+        cache.set_many({
+            _bucket_key(ca_name, generation, bucket): buckets[bucket]
+            for bucket in range(start, min(start + CRL_INDEX_WRITE_BATCH, bucket_count))
+        }, bucket_timeout)
+
+    meta = {
+        'this_update': crl.last_update_utc.isoformat(),
+        'next_update': crl.next_update_utc.isoformat() if crl.next_update_utc else None,
+        'issuer': crl.issuer.rfc4514_string(),
+        'count': len(revoked),
+        'cached_at': datetime.utcnow().isoformat(),
+        'generation': generation,
+        'buckets': bucket_count,
+        'buckets_expire_at': time.time() + bucket_timeout,
+        **meta_fields,
+    }
+    # Publishing the meta entry switches readers to the new generation
+    previous = cache.get(meta_key(ca_name))
+    cache.set(meta_key(ca_name), meta, timeout)
+
+    # Buckets of the replaced generation would otherwise linger until they expire
+    if previous and previous.get('generation'):
+        previous_keys = [
+            _bucket_key(ca_name, previous['generation'], bucket)
+            for bucket in range(previous['buckets'])
+        ]
+        for start in range(0, len(previous_keys), CRL_INDEX_WRITE_BATCH):
+            cache.delete_many(previous_keys[start:start + CRL_INDEX_WRITE_BATCH])
+
+    # Drop the pre-index pickled set, if any
+    cache.delete_many([f"crl:{ca_name}:serials", f"crl:{ca_name}:details"])
+    _drop_local(ca_name)
+
+    return meta
+
+
+def touch_crl_index(ca_name, meta, timeout=CRL_CACHE_TIMEOUT, **meta_fields):
+    """
+    Extend the TTL of an unchanged index and update its meta fields.
+
+    Usually a single write of the meta entry: buckets are only touched when
+    they would expire before it.
+
+    Returns:
+        bool: False if any bucket already expired (the index must be rebuilt)
+    """
+    generation = meta.get('generation')
+    if generation is None:
+        return False
+
+    now = time.time()
+    buckets_expire_at = meta.get('buckets_expire_at', 0)
+    if buckets_expire_at < now + timeout:
+        bucket_timeout = _bucket_timeout(timeout)
+        for bucket in range(meta['buckets']):
+            if not cache.touch(_bucket_key(ca_name, generation, bucket), bucket_timeout):
+                return False
+        buckets_expire_at = now + bucket_timeout
+
+    meta = dict(
+        meta,
+        cached_at=datetime.utcnow().isoformat(),
+        buckets_expire_at=buckets_expire_at,
+        **meta_fields
+    )
+    cache.set(meta_key(ca_name), meta, timeout)
+    return True
+
+
+def apply_crl_delta(ca_name, delta_crl, timeout=CRL_CACHE_TIMEOUT, **meta_fields):
+    """
+    Merge a delta CRL into the cached index of its base CRL.
+
+    Only the buckets holding the delta's serials are read and rewritten;
+    entries with reason removeFromCRL are dropped from the index.
+
+    Returns:
+        dict: the updated meta entry
+
+    Raises:
+        CRLIndexUnavailable: if the base index is missing or incomplete
+    """
+    meta = cache.get(meta_key(ca_name))
+    if meta is None or meta.get('generation') is None:
+        raise CRLIndexUnavailable(f"No CRL index for {ca_name} to apply delta to")
+
+    generation = meta['generation']
+    bucket_count = meta['buckets']
+    removed_reason = str(x509.ReasonFlags.remove_from_crl)
+
+    changes = {}
+    for revoked_cert in delta_crl:
+        serial = revoked_cert.serial_number
+        details = _entry_details(revoked_cert)
+        if details['reason'] == removed_reason:
+            details = None
+        key = _bucket_key(ca_name, generation, serial % bucket_count)
+        changes.setdefault(key, []).append((serial, details))
+
+    buckets = cache.get_many(list(changes))
+    if len(buckets) != len(changes):
+        raise CRLIndexUnavailable(
+            f"CRL index for {ca_name} is incomplete (generation {generation})"
+        )
+
+    count = meta['count']
+    for key, entries in changes.items():
+        bucket = buckets[key]
+        for serial, details in entries:
+            if details is None:
+                count -= bucket.pop(serial, None) is not None
+            else:
+                count += serial not in bucket
+                bucket[serial] = details
+
+    cache.set_many(buckets, _bucket_timeout(timeout))
+
+    meta = dict(
+        meta,
+        this_update=delta_crl.last_update_utc.isoformat(),
+        next_update=delta_crl.next_update_utc.isoformat() if delta_crl.next_update_utc else meta.get('next_update'),
+        count=count,
+        cached_at=datetime.utcnow().isoformat(),
+        **meta_fields
+    )
+    cache.set(meta_key(ca_name), meta, timeout)
+    _drop_local(ca_name)
+
+    return meta
+
+
+def lookup_serial(ca_name, serial):
+    """
+    Look ``serial`` up in the cached index for ``ca_name``.
+
+    Served from the per-worker LRU when possible; otherwise reads the meta
+    entry and one bucket from the cache and keeps them locally.
+
+    Returns:
+        None if no CRL is cached for ``ca_name``, otherwise a tuple
+        ``(meta, details)`` where ``details`` is None when not revoked.
+
+    Raises:
+        CRLIndexUnavailable: if the meta entry exists but its bucket is gone
+    """
+    _check_local_version()
+
+    entry = _get_local(ca_name)
+    if entry is None:
+        meta = cache.get(meta_key(ca_name))
+        entry = _LocalIndex(meta, _expiry_for(meta))
+        _put_local(ca_name, entry)
+
+    meta = entry.meta
+    if meta is None:
+        return None
+
+    generation = meta.get('generation')
+    if generation is None:
+        return _lookup_legacy(ca_name, serial, meta)
+
+    bucket_number = serial % meta['buckets']
+    local_key = (ca_name, generation, bucket_number)
+    bucket = _get_local_bucket(local_key)
+    if bucket is None:
+        bucket = cache.get(_bucket_key(ca_name, generation, bucket_number))
+        if bucket is None:
+            _drop_local(ca_name)
+            raise CRLIndexUnavailable(
+                f"CRL index for {ca_name} is incomplete (generation {generation})"
+            )
+        _put_local_bucket(local_key, bucket)
+
+    return meta, bucket.get(serial)
+
+
+def _lookup_legacy(ca_name, serial, meta):
+    """Read a CRL cached as a pickled set by releases before the index."""
+    revoked_serials = cache.get(f"crl:{ca_name}:serials")
+    if revoked_serials is None:
+        return None
+
+    if serial not in revoked_serials:
+        return meta, None
+
+    details = cache.get(f"crl:{ca_name}:details", {})
+    return meta, details.get(str(serial), {})
@@ -0,0 +1,193 @@
+"""
+Concurrent refresh of the cached CRL indexes.
+
+Each endpoint is fetched with the validators (ETag / Last-Modified) kept in
+its cached meta entry, so an unchanged CRL costs one 304 response. A CRL
+that was downloaded again is only re-indexed when its CRL number advances;
+otherwise the existing index just has its TTL extended. When a base CRL
+advertises a delta CRL (Freshest CRL extension), the delta is fetched the
+same way and merged into the base index.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from cryptography import x509
+from cryptography.hazmat.backends import default_backend
+from django.core.cache import cache
+
+from apps.signatures.crl_index import (
+    apply_crl_delta,
+    crl_number,
+    meta_key,
+    store_crl_index,
+    touch_crl_index,
+)
+
+logger = logging.getLogger(__name__)
+
+CRL_REFRESH_WORKERS = 8
+CRL_DOWNLOAD_TIMEOUT = 60  # seconds
+
+STATUS_UPDATED = 'updated'
+STATUS_UNCHANGED = 'unchanged'
+
+
+def load_crl(crl_data):
+    """Parse a DER or PEM encoded CRL."""
+    try:
+        return x509.load_der_x509_crl(crl_data, default_backend())
+    except Exception:
+        return x509.load_pem_x509_crl(crl_data, default_backend())
+
+
+def freshest_crl_url(crl):
+    """URL of the delta CRL advertised by ``crl``, if any."""
+    try:
+        freshest = crl.extensions.get_extension_for_class(x509.FreshestCRL).value
+    except (x509.ExtensionNotFound, ValueError):
+        return None
+
+    for point in freshest:
+        for name in point.full_name or []:
+            if isinstance(name, x509.UniformResourceIdentifier):
+                return name.value
+    return None
+
+
+def _conditional_headers(etag, last_modified):
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    return headers
+
+
+def _validators(response):
+    """ETag and Last-Modified of a response, as plain strings."""
+    return {
+        name: value if isinstance(value, str) else None
+        for name, value in (
+            ('etag', response.headers.get('ETag')),
+            ('last_modified', response.headers.get('Last-Modified')),
+        )
+    }
+
+
+def refresh_crl(ca_name, crl_url):
+    """
+    Bring the cached index for ``ca_name`` up to date with ``crl_url``.
+
+    Returns:
+        dict: 'status' (updated/unchanged), 'count', 'crl_number' and,
+        when the CA publishes one, 'delta' with the delta CRL outcome
+    """
+    meta = cache.get(meta_key(ca_name))
+    if meta is not None and (meta.get('url') != crl_url or meta.get('generation') is None):
+        meta = None
+
+    headers = {}
+    if meta is not None:
+        headers = _conditional_headers(meta.get('etag'), meta.get('last_modified'))
+
+    response = requests.get(crl_url, headers=headers, timeout=CRL_DOWNLOAD_TIMEOUT)
+
+    if response.status_code == 304 and touch_crl_index(ca_name, meta):
+        status = STATUS_UNCHANGED
+        delta_url = meta.get('delta_url')
+    else:
+        if response.status_code == 304:
+            # Index expired under an unchanged CRL; download it again
+            response = requests.get(crl_url, timeout=CRL_DOWNLOAD_TIMEOUT)
+            meta = None
+        response.raise_for_status()
+
+        crl = load_crl(response.content)
+        number = crl_number(crl)
+        delta_url = freshest_crl_url(crl)
+        fields = dict(_validators(response), url=crl_url, delta_url=delta_url)
+
+        if (
+            meta is not None and number is not None
+            and meta.get('crl_number') is not None and number <= meta['crl_number']
+            and touch_crl_index(ca_name, meta, **fields)
+        ):
+            status = STATUS_UNCHANGED
+        else:
+            meta = store_crl_index(ca_name, crl, crl_number=number, **fields)
+            status = STATUS_UPDATED
+
+    meta = cache.get(meta_key(ca_name)) or meta
+    outcome = {
+        'status': status,
+        'count': meta['count'],
+        'crl_number': meta.get('crl_number'),
+    }
+
+    if delta_url:
+        try:
+            outcome['delta'] = _refresh_delta(ca_name, meta, delta_url)
+            outcome['count'] = cache.get(meta_key(ca_name), meta)['count']
+        except Exception as e:
+            # The base CRL is still valid on its own
+            logger.warning(f"Delta CRL for {ca_name} not applied: {str(e)}")
+            outcome['delta'] = {'status': 'failed', 'error': str(e)}
+
+    return outcome
+
+
+def _refresh_delta(ca_name, meta, delta_url):
+    """Fetch the delta CRL for ``ca_name`` and merge it when it is newer."""
+    headers = {}
+    if meta.get('delta_url') == delta_url and meta.get('delta_crl_number') is not None:
+        headers = _conditional_headers(meta.get('delta_etag'), meta.get('delta_last_modified'))
+
+    response = requests.get(delta_url, headers=headers, timeout=CRL_DOWNLOAD_TIMEOUT)
+    if response.status_code == 304:
+        return {'status': STATUS_UNCHANGED, 'crl_number': meta.get('delta_crl_number')}
+    response.raise_for_status()
+
+    delta = load_crl(response.content)
+    base_number = delta.extensions.get_extension_for_class(x509.DeltaCRLIndicator).value.crl_number
+    if meta.get('crl_number') is None or base_number > meta['crl_number']:
+        raise ValueError(
+            f"delta CRL requires base CRL {base_number}, cached base is {meta.get('crl_number')}"
+        )
+
+    number = crl_number(delta)
+    if number is not None and meta.get('delta_crl_number') is not None \
+            and number <= meta['delta_crl_number']:
+        return {'status': STATUS_UNCHANGED, 'crl_number': number}
+
+    validators = _validators(response)
+    apply_crl_delta(
+        ca_name, delta,
+        delta_url=delta_url,
+        delta_crl_number=number,
+        delta_etag=validators['etag'],
+        delta_last_modified=validators['last_modified'],
+    )
+    return {'status': STATUS_UPDATED, 'crl_number': number}
+
+
+def refresh_crls(endpoints, workers=CRL_REFRESH_WORKERS):
+    """
+    Refresh every ``{ca_name: crl_url}`` endpoint concurrently.
+
+    Returns:
+        dict: ca_name -> refresh_crl() outcome, or the exception raised
+    """
+    def _refresh(item):
+        ca_name, crl_url = item
+        logger.info(f"Refreshing CRL for {ca_name} from {crl_url}")
+        try:
+            return ca_name, refresh_crl(ca_name, crl_url)
+        except Exception as e:
+            return ca_name, e
+
+    if not endpoints:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(endpoints))) as pool:
+        return dict(pool.map(_refresh, endpoints.items()))
@@ -0,0 +1,134 @@
+"""
+Management command to benchmark signature verification offline.
+
+Usage:
+    python manage.py benchmark_signature_verification
+    python manage.py benchmark_signature_verification --revocation ocsp --ocsp-latency-ms 50
+    python manage.py benchmark_signature_verification --output benchmarks/signature_verification.json
+    python manage.py benchmark_signature_verification --compare benchmarks/signature_verification.json
+"""
+import json
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.signatures.benchmark import REVOCATION_MODES, compare_reports, run_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Benchmark PDF signature verification and custody certificates with synthetic signed PDFs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=200,
+            help='Number of measured verifications (default: 200)',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=5,
+            help='Unmeasured verifications run first (default: 5)',
+        )
+        parser.add_argument(
+            '--revocation',
+            choices=REVOCATION_MODES,
+            default='crl',
+            help='Revocation source: cached CRL index or in-process OCSP responder (default: crl)',
+        )
+        parser.add_argument(
+            '--ocsp-latency-ms',
+            type=float,
+            default=0,
+            help='Simulated OCSP round trip in milliseconds (default: 0)',
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=1,
+            help='Pages per synthetic PDF (default: 1)',
+        )
+        parser.add_argument(
+            '--skip-custody',
+            action='store_true',
+            help='Do not time custody certificate generation',
+        )
+        parser.add_argument(
+            '--output',
+            help='Write the JSON report to this file (e.g. a committed baseline)',
+        )
+        parser.add_argument(
+            '--compare',
+            help='Baseline JSON report to compare against; fails on regressions',
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.25,
+            help='Allowed regression as a fraction of the baseline (default: 0.25)',
+        )
+        parser.add_argument(
+            '--verbose-logs',
+            action='store_true',
+            help='Keep INFO/DEBUG logging from the verifier (skews timings)',
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read baseline {options['compare']}: {e}")
+
+        # Per-verification log lines would dominate the stages being measured
+        if not options['verbose_logs']:
+            logging.disable(logging.INFO)
+        try:
+            report = run_benchmark(
+                iterations=options['iterations'],
+                revocation=options['revocation'],
+                ocsp_latency_ms=options['ocsp_latency_ms'],
+                pages=options['pages'],
+                warmup=options['warmup'],
+                custody=not options['skip_custody'],
+                stdout=self.stdout,
+            )
+        finally:
+            logging.disable(logging.NOTSET)
+
+        self._print_report(report)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+                f.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+        if baseline is not None:
+            regressions = compare_reports(baseline, report, options['tolerance'])
+            if regressions:
+                for line in regressions:
+                    self.stdout.write(self.style.ERROR(f'  ✗ {line}'))
+                raise CommandError(f'{len(regressions)} regression(s) against {options["compare"]}')
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['compare']}"))
+
+    def _print_report(self, report):
+        throughput = report['throughput']
+        self.stdout.write(self.style.SUCCESS('\n=== Signature Verification Benchmark ==='))
+        self.stdout.write(f"Verifications/s: {throughput['verifications_per_second']}")
+        if throughput['custody_certificates_per_second'] is not None:
+            self.stdout.write(f"Custody certificates/s: {throughput['custody_certificates_per_second']}")
+
+        self.stdout.write(f"\n{'stage':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for label, stats in report['stages'].items():
+            self.stdout.write(
+                f"{label:<28}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}"
+                f"{stats['p99_ms']:>10.3f}{stats['max_ms']:>10.3f}"
+            )
+
+        self.stdout.write('\nPeak RSS (KiB): ' + ', '.join(
+            f'{phase}={value}' for phase, value in report['peak_rss_kb'].items()
+        ))
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.12 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("signatures", "0003_add_custody_chain_fields"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="signature",
+            name="enqueued_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Quando a verificação foi enviada para a fila",
+                null=True,
+                verbose_name="Enfileirado em",
+            ),
+        ),
+    ]
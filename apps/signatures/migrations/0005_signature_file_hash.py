@@ -0,0 +1,29 @@
+# Generated by Django 5.1.12 on 2026-10-16 20:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("signatures", "0004_signature_enqueued_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="signature",
+            name="file_hash",
+            field=models.CharField(
+                blank=True,
+                help_text="SHA-256 do PDF assinado enviado",
+                max_length=64,
+                verbose_name="Hash do arquivo",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="signature",
+            index=models.Index(
+                fields=["file_hash", "petition"], name="signatures__file_ha_beda0c_idx"
+            ),
+        ),
+    ]
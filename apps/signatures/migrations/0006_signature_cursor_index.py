@@ -0,0 +1,20 @@
+# Generated by Django 5.1.12 on 2026-10-16 22:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("signatures", "0005_signature_file_hash"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="signature",
+            index=models.Index(
+                fields=["petition", "-created_at", "-id"],
+                name="signatures__petitio_62f210_idx",
+            ),
+        ),
+    ]
@@ -115,6 +115,13 @@ class Signature(models.Model):
         help_text="Arquivo PDF assinado digitalmente"
     )
     
+    file_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        verbose_name="Hash do arquivo",
+        help_text="SHA-256 do PDF assinado enviado"
+    )
+    
     signed_pdf_url = models.URLField(
         max_length=500,
         blank=True,
@@ -241,6 +248,13 @@ class Signature(models.Model):
         help_text="Quando a verificação terminou"
     )
     
+    enqueued_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Enfileirado em",
+        help_text="Quando a verificação foi enviada para a fila"
+    )
+    
     certificate_generated_at = models.DateTimeField(
         null=True,
         blank=True,
@@ -303,8 +317,10 @@ class Signature(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['petition', 'verification_status', '-created_at']),
+            models.Index(fields=['petition', '-created_at', '-id']),  # Cursor pagination
             models.Index(fields=['verification_status', '-created_at']),
             models.Index(fields=['cpf_hash', 'petition']),  # Duplicate detection
+            models.Index(fields=['file_hash', 'petition']),  # Resubmitted files
             models.Index(fields=['email']),
         ]
         constraints = [
@@ -374,8 +390,10 @@ class Signature(models.Model):
                 state=self.state
             )
             
-            # Increment petition signature count
+            # Increment petition signature count and state/city counts
+            from apps.petitions.geo_stats import record_approved_signatures
             self.petition.increment_signature_count()
+            record_approved_signatures([self])
     
     def reject(self, reason):
         """Reject signature with reason"""
@@ -3,8 +3,11 @@ Certificate revocation checking service.
 Supports cached CRL checking with OCSP fallback.
 """
 import logging
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timezone
 from typing import Optional, Dict, Tuple
+from urllib.parse import urlsplit
 
 import requests
 from cryptography import x509
@@ -15,6 +18,13 @@ from cryptography.x509.oid import ExtensionOID, AuthorityInformationAccessOID
 from django.core.cache import cache
 from django.conf import settings
 
+from apps.signatures.crl_index import (
+    crl_number,
+    lookup_serial,
+    revocation_reason,
+    store_crl_index,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,12 +33,39 @@ class RevocationCheckError(Exception):
     pass
 
 
+# One pooled HTTP session per OCSP responder (scheme + host), per process
+OCSP_POOL_SIZE = 10
+
+_ocsp_sessions = {}
+_ocsp_sessions_lock = threading.Lock()
+
+
+def _get_ocsp_session(ocsp_url: str) -> requests.Session:
+    """Return the keep-alive session for the responder serving ``ocsp_url``."""
+    parts = urlsplit(ocsp_url)
+    responder = f"{parts.scheme}://{parts.netloc}"
+    
+    session = _ocsp_sessions.get(responder)
+    if session is None:
+        with _ocsp_sessions_lock:
+            session = _ocsp_sessions.get(responder)
+            if session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=OCSP_POOL_SIZE,
+                )
+                session.mount(responder, adapter)
+                _ocsp_sessions[responder] = session
+    return session
+
+
 class CertificateRevocationChecker:
     """
     Check certificate revocation status with intelligent fallback.
     
     Priority order:
-    1. Cached CRL (~10ms) - Fastest, uses pre-downloaded CRL data
+    1. Cached CRL (~1ms) - Fastest, one index bucket of pre-downloaded CRL data
     2. OCSP (2-5s) - Real-time when no CRL cache available
     3. Dynamic CRL (5-10s) - Downloads CRL on-demand if both fail
     """
@@ -36,6 +73,13 @@ class CertificateRevocationChecker:
     # Network timeouts (only for OCSP fallback)
     OCSP_TIMEOUT = 10  # seconds
     
+    # OCSP response cache and request coalescing
+    OCSP_CACHE_MAX_TTL = 24 * 3600  # seconds, even if nextUpdate is later
+    OCSP_CACHE_DEFAULT_TTL = 300  # seconds, for responses without nextUpdate
+    OCSP_LOCK_TIMEOUT = 15  # seconds, longer than one OCSP request
+    OCSP_LOCK_WAIT = 12  # seconds a worker waits for a coalesced answer
+    OCSP_LOCK_POLL_INTERVAL = 0.1  # seconds
+    
     def __init__(self, certificate: x509.Certificate, issuer_certificate: Optional[x509.Certificate] = None):
         """
         Initialize the revocation checker.
@@ -138,26 +182,20 @@ class CertificateRevocationChecker:
         ca_names = self._get_potential_ca_names(issuer_cn)
         
         for ca_name in ca_names:
-            cache_key_serials = f"crl:{ca_name}:serials"
-            cache_key_details = f"crl:{ca_name}:details"
-            cache_key_meta = f"crl:{ca_name}:meta"
-            
-            revoked_serials = cache.get(cache_key_serials)
+            # Reads the CRL meta entry and a single index bucket
+            found = lookup_serial(ca_name, self.serial_number)
             
-            if revoked_serials is not None:
+            if found is not None:
                 # Found cached CRL for this CA
-                meta = cache.get(cache_key_meta, {})
+                meta, cert_details = found
                 
                 logger.info(
                     f"✓ Using cached CRL for {ca_name} "
                     f"(serial: {self.serial_number}, issuer: {issuer_cn})"
                 )
                 
-                if self.serial_number in revoked_serials:
+                if cert_details is not None:
                     # Certificate is revoked
-                    details_dict = cache.get(cache_key_details, {})
-                    cert_details = details_dict.get(str(self.serial_number), {})
-                    
                     logger.warning(
                         f"✗ Certificate REVOKED via CRL: {ca_name} "
                         f"(serial: {self.serial_number})"
@@ -268,12 +306,43 @@ class CertificateRevocationChecker:
         )
         ocsp_request = builder.build()
         
+        # Responses are shared by every worker until their nextUpdate
+        cache_key = f"ocsp:{ocsp_request.issuer_key_hash.hex()}:{self.serial_number:x}"
+        cached = cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"✓ Using cached OCSP response (serial: {self.serial_number})")
+            return cached['revoked'], dict(cached['details'])
+        
+        # Coalesce concurrent lookups: one worker asks the responder,
+        # the others wait briefly for its cached answer
+        lock_key = f"{cache_key}:lock"
+        if cache.add(lock_key, 1, self.OCSP_LOCK_TIMEOUT):
+            try:
+                return self._query_ocsp(ocsp_url, ocsp_request, cache_key)
+            finally:
+                cache.delete(lock_key)
+        
+        deadline = time.monotonic() + self.OCSP_LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(self.OCSP_LOCK_POLL_INTERVAL)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"✓ Using coalesced OCSP response (serial: {self.serial_number})")
+                return cached['revoked'], dict(cached['details'])
+            if cache.get(lock_key) is None:
+                # The other worker gave up without an answer
+                break
+        
+        return self._query_ocsp(ocsp_url, ocsp_request, cache_key)
+    
+    def _query_ocsp(self, ocsp_url: str, ocsp_request, cache_key: str) -> Tuple[bool, Dict]:
+        """Send ``ocsp_request`` to the responder and cache a definitive answer."""
         # Serialize request
         ocsp_request_bytes = ocsp_request.public_bytes(serialization.Encoding.DER)
         
-        # Send OCSP request
+        # Send OCSP request over the responder's pooled session
         try:
-            response = requests.post(
+            response = _get_ocsp_session(ocsp_url).post(
                 ocsp_url,
                 data=ocsp_request_bytes,
                 headers={'Content-Type': 'application/ocsp-request'},
@@ -294,30 +363,41 @@ class CertificateRevocationChecker:
         
         # Get certificate status
         cert_status = ocsp_response.certificate_status
+        next_update = ocsp_response.next_update_utc
         
         details = {
             'status': str(cert_status),
-            'this_update': ocsp_response.this_update.isoformat() if ocsp_response.this_update else None,
-            'next_update': ocsp_response.next_update.isoformat() if ocsp_response.next_update else None,
+            'this_update': ocsp_response.this_update_utc.isoformat() if ocsp_response.this_update_utc else None,
+            'next_update': next_update.isoformat() if next_update else None,
         }
         
-        if isinstance(cert_status, ocsp.OCSPCertStatus):
+        if cert_status == ocsp.OCSPCertStatus.GOOD:
             # Certificate is good
             logger.info(
                 f"✓ OCSP confirms certificate NOT revoked (serial: {self.serial_number})"
             )
-            return False, details
-        elif isinstance(cert_status, ocsp.RevokedCertStatus):
+            is_revoked = False
+        elif cert_status == ocsp.OCSPCertStatus.REVOKED:
             # Certificate is revoked
             logger.warning(
                 f"✗ Certificate REVOKED via OCSP (serial: {self.serial_number})"
             )
-            details['revocation_date'] = cert_status.revocation_time.isoformat()
-            details['reason'] = str(cert_status.revocation_reason) if cert_status.revocation_reason else 'unspecified'
-            return True, details
+            details['revocation_date'] = ocsp_response.revocation_time_utc.isoformat()
+            details['reason'] = str(ocsp_response.revocation_reason) if ocsp_response.revocation_reason else 'unspecified'
+            is_revoked = True
         else:
             # Unknown status
             raise RevocationCheckError(f"Unknown OCSP certificate status: {cert_status}")
+        
+        if next_update:
+            ttl = (next_update - datetime.now(timezone.utc)).total_seconds()
+        else:
+            ttl = self.OCSP_CACHE_DEFAULT_TTL
+        ttl = min(int(ttl), self.OCSP_CACHE_MAX_TTL)
+        if ttl > 0:
+            cache.set(cache_key, {'revoked': is_revoked, 'details': details}, ttl)
+        
+        return is_revoked, dict(details)
     
     def _get_ocsp_url(self) -> Optional[str]:
         """Extract OCSP URL from certificate's Authority Information Access extension."""
@@ -389,48 +469,31 @@ class CertificateRevocationChecker:
                 except Exception:
                     crl = x509.load_pem_x509_crl(crl_data, default_backend())
                 
-                # Extract revoked serials
-                revoked_serials = set()
-                revoked_details = {}
-                
-                for revoked_cert in crl:
-                    serial = revoked_cert.serial_number
-                    revoked_serials.add(serial)
-                    
-                    revoked_details[str(serial)] = {
-                        'revocation_date': revoked_cert.revocation_date_utc.isoformat(),
-                        'reason': self._get_revocation_reason_from_cert(revoked_cert),
-                    }
-                
-                # Cache the CRL (25 hour TTL)
+                # Index and cache the CRL (25 hour TTL). Only this CA's local
+                # entry is dropped; the global version bump is left to the
+                # scheduled refresh so other CAs' entries stay warm
                 ca_name = self._normalize_ca_name(issuer_cn)
-                cache_key_serials = f"crl:{ca_name}:serials"
-                cache_key_details = f"crl:{ca_name}:details"
-                cache_key_meta = f"crl:{ca_name}:meta"
-                
-                cache_timeout = 25 * 3600
-                
-                cache.set(cache_key_serials, revoked_serials, cache_timeout)
-                cache.set(cache_key_details, revoked_details, cache_timeout)
-                cache.set(cache_key_meta, {
-                    'this_update': crl.last_update_utc.isoformat(),
-                    'next_update': crl.next_update_utc.isoformat() if crl.next_update_utc else None,
-                    'issuer': crl.issuer.rfc4514_string(),
-                    'count': len(revoked_serials),
-                    'cached_at': datetime.utcnow().isoformat(),
-                }, cache_timeout)
+                meta = store_crl_index(
+                    ca_name, crl,
+                    url=crl_url,
+                    crl_number=crl_number(crl),
+                )
                 
                 # Add to discovered endpoints for daily sync
                 self._add_to_discovered_endpoints(ca_name, crl_url)
                 
                 logger.info(
                     f"✓ CRL downloaded and cached: {ca_name} "
-                    f"({len(revoked_serials)} revoked certificates)"
+                    f"({meta['count']} revoked certificates)"
                 )
                 
                 # Check if this certificate is revoked
-                if self.serial_number in revoked_serials:
-                    cert_details = revoked_details.get(str(self.serial_number), {})
+                revoked_cert = crl.get_revoked_certificate_by_serial_number(self.serial_number)
+                if revoked_cert is not None:
+                    cert_details = {
+                        'revocation_date': revoked_cert.revocation_date_utc.isoformat(),
+                        'reason': revocation_reason(revoked_cert),
+                    }
                     logger.warning(f"✗ Certificate REVOKED via dynamic CRL: {ca_name}")
                     
                     return True, {
@@ -445,7 +508,7 @@ class CertificateRevocationChecker:
                     return False, {
                         'status': 'GOOD',
                         'crl_url': crl_url,
-                        'revoked_count': len(revoked_serials),
+                        'revoked_count': meta['count'],
                     }
                 
             except Exception as e:
@@ -464,17 +527,6 @@ class CertificateRevocationChecker:
         normalized = re.sub(r'-+', '-', normalized)
         return normalized.strip('-')
     
-    def _get_revocation_reason_from_cert(self, revoked_cert) -> str:
-        """Extract revocation reason from revoked certificate entry."""
-        try:
-            from cryptography.x509.oid import CRLEntryExtensionOID
-            reason_ext = revoked_cert.extensions.get_extension_for_oid(
-                CRLEntryExtensionOID.CRL_REASON
-            )
-            return str(reason_ext.value.reason)
-        except:
-            return 'unspecified'
-    
     def _add_to_discovered_endpoints(self, ca_name: str, crl_url: str):
         """Add discovered CRL endpoint to list for daily sync."""
         cache_key = 'discovered_crl_endpoints'
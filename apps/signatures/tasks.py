@@ -4,16 +4,35 @@ Celery tasks for signature verification.
 from celery import shared_task
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils import timezone
+import math
 import time
 from apps.core.logging_utils import StructuredLogger
 
 logger = StructuredLogger(__name__)
 
+# Batch verification
+VERIFICATION_BATCH_SIZE = 100  # Signatures claimed per verify_signature_batch task
+VERIFICATION_MAX_BATCHES_PER_RUN = 50  # Batches queued per verify_pending_signatures run
+VERIFICATION_BULK_UPDATE_SIZE = 500
+
+# Adaptive scheduling
+VERIFICATION_ENQUEUE_TIMEOUT = 15 * 60  # Re-dispatch rows enqueued but unclaimed for this long (seconds)
+VERIFICATION_PROCESSING_TIMEOUT = 60 * 60  # Release rows claimed but unfinished for this long (seconds)
+VERIFICATION_DEFAULT_SECONDS_PER_SIGNATURE = 3.0  # Until batches have reported real latency
+VERIFICATION_LATENCY_SMOOTHING = 0.2  # Weight of the newest batch in the moving average
+VERIFICATION_LATENCY_CACHE_KEY = 'signatures:verification:seconds_per_signature'
+VERIFICATION_BACKLOG_CACHE_KEY = 'signatures:verification:backlog'
+VERIFICATION_DUPLICATES_CACHE_KEY = 'signatures:verification:duplicate_uploads'
+
 
 @shared_task(bind=True, max_retries=3)
 def verify_signature(self, signature_id):
     """
     Async task to verify a signature's digital certificate.
+    
+    Runs the CPU-bound document checks (routed to the
+    SIGNATURE_VERIFICATION_CPU_QUEUE); a PDF that passes them is handed to
+    check_signature_status on the I/O queue for the revocation lookups.
     """
     start_time = time.time()
     try:
@@ -23,6 +42,36 @@ def verify_signature(self, signature_id):
         # Get signature
         signature = Signature.objects.get(id=signature_id)
         
+        # Claim the row; a verify_signature_batch may already hold it
+        claimable = [Signature.STATUS_PENDING]
+        if self.request.retries:
+            # The failed attempt flagged it for manual review before retrying
+            claimable.append(Signature.STATUS_MANUAL_REVIEW)
+        processing_started_at = timezone.now()
+        claimed = Signature.objects.filter(
+            id=signature_id,
+            verification_status__in=claimable
+        ).update(
+            verification_status=Signature.STATUS_PROCESSING,
+            processing_started_at=processing_started_at
+        )
+        if not claimed:
+            logger.info(
+                "Signature already claimed, skipping verification",
+                signature_id=signature_id,
+                signature_uuid=str(signature.uuid),
+                verification_status=signature.verification_status,
+                task_id=self.request.id
+            )
+            return {
+                'success': True,
+                'signature_uuid': str(signature.uuid),
+                'status': signature.verification_status,
+                'skipped': True,
+            }
+        signature.verification_status = Signature.STATUS_PROCESSING
+        signature.processing_started_at = processing_started_at
+        
         logger.info(
             "Starting signature verification",
             signature_id=signature_id,
@@ -31,11 +80,6 @@ def verify_signature(self, signature_id):
             task_id=self.request.id
         )
         
-        # Update status to processing + set timestamp
-        signature.verification_status = Signature.STATUS_PROCESSING
-        signature.processing_started_at = timezone.now()
-        signature.save(update_fields=['verification_status', 'processing_started_at'])
-        
         # Initialize verifier
         verifier = PDFSignatureVerifier()
         
@@ -47,160 +91,828 @@ def verify_signature(self, signature_id):
             logger.error(f"Failed to open signed PDF: {str(e)}")
             raise
         
-        # Verify the signature
-        result = verifier.verify_pdf_signature(
-            pdf_file,
-            signature.petition
-        )
+        # Verify the document (reusing the result of an identical earlier upload)
+        result = _run_verification(verifier, signature, pdf_file)
         
-        if result['verified']:
-            # Store certificate information
-            if result['certificate_info']:
-                cert_info = result['certificate_info']
-                signature.certificate_info = cert_info
-                signature.certificate_subject = cert_info.get('subject', '')
-                signature.certificate_issuer = cert_info.get('issuer', '')
-                signature.certificate_serial = cert_info.get('serial_number', '')
-                signature.verified_cpf_from_certificate = result.get('cpf_verified', False)
-            
-            signature.verified = True
-            signature.processing_completed_at = timezone.now()
-            signature.save()
-            
-            # Approve signature (this increments the petition count)
-            signature.approve()
-            
-            # Generate custody chain certificate
-            try:
-                from apps.signatures.custody_service import generate_custody_certificate
-                certificate_url = generate_custody_certificate(signature, result)
-                logger.info(
-                    "Custody certificate generated",
-                    signature_uuid=str(signature.uuid),
-                    certificate_url=certificate_url
-                )
-            except Exception as cert_error:
-                logger.error(
-                    f"Failed to generate custody certificate: {str(cert_error)}",
-                    signature_uuid=str(signature.uuid),
-                    exc_info=True
-                )
-                # Don't fail the whole verification if certificate generation fails
-            
-            duration = time.time() - start_time
-            logger.info(
-                "Signature verified successfully",
-                signature_id=signature_id,
-                signature_uuid=str(signature.uuid),
-                petition_id=signature.petition_id,
-                duration_seconds=duration,
-                task_id=self.request.id
-            )
-            
-            # Send verification email notification
-            try:
-                from apps.core.tasks import send_signature_verified_notification
-                send_signature_verified_notification.delay(signature.id)
-            except Exception as e:
-                logger.error(f"Failed to queue verification email: {str(e)}")
-            
+        if result.get('duplicate_of'):
+            _mark_duplicate(signature, result).save(update_fields=[
+                'verification_status', 'rejection_reason', 'processing_completed_at', 'file_hash',
+            ])
             return {
-                'success': True,
+                'success': False,
                 'signature_uuid': str(signature.uuid),
-                'status': 'approved',
-                'custody_certificate_url': signature.custody_certificate_url
+                'status': Signature.STATUS_MANUAL_REVIEW,
+                'reason': signature.rejection_reason,
             }
-        else:
-            # Signature verification failed
-            signature.verification_status = Signature.STATUS_REJECTED
-            signature.rejection_reason = result.get('error', 'Verificação falhou')
-            signature.processing_completed_at = timezone.now()
-            signature.save()
+        
+        if result.get('status_check'):
+            # Revocation lookups wait on the network; free this CPU slot
+            signature.save(update_fields=['file_hash'])
+            check_signature_status.delay(signature_id, result)
             
-            duration = time.time() - start_time
-            logger.warning(
-                "Signature verification rejected",
+            logger.info(
+                "Signature document checks passed",
                 signature_id=signature_id,
                 signature_uuid=str(signature.uuid),
-                petition_id=signature.petition_id,
-                rejection_reason=signature.rejection_reason,
-                duration_seconds=duration,
+                duration_seconds=time.time() - start_time,
                 task_id=self.request.id
             )
-            
-            # Check if this is a CNPJ rejection - send specific email
-            if result.get('rejection_code') == 'CNPJ_NOT_ACCEPTED':
-                try:
-                    from apps.core.email import send_cnpj_rejection_email
-                    send_cnpj_rejection_email(
-                        signature=signature,
-                        petition=signature.petition,
-                        certificate_info=result.get('certificate_info', {})
-                    )
-                    logger.info(f"CNPJ rejection email sent for signature {signature.id}")
-                except Exception as e:
-                    logger.error(f"Failed to send CNPJ rejection email: {str(e)}")
-            else:
-                # Send generic rejection email notification
-                try:
-                    from apps.core.tasks import send_signature_rejected_notification
-                    send_signature_rejected_notification.delay(signature.id)
-                except Exception as e:
-                    logger.error(f"Failed to queue rejection email: {str(e)}")
-            
             return {
-                'success': False,
+                'success': True,
                 'signature_uuid': str(signature.uuid),
-                'status': 'rejected',
-                'reason': signature.rejection_reason
+                'status': Signature.STATUS_PROCESSING,
             }
         
+        return _finalize_signature(signature, result, start_time, self.request.id)
+        
     except ObjectDoesNotExist:
         logger.error(f"Signature with id {signature_id} not found")
         raise
     
     except Exception as exc:
         logger.error(f"Error verifying signature {signature_id}: {str(exc)}")
+        _flag_for_manual_review(signature_id, exc)
         
-        # Update signature to manual review on error
-        try:
-            signature = Signature.objects.get(id=signature_id)
-            signature.verification_status = Signature.STATUS_MANUAL_REVIEW
-            signature.rejection_reason = f"Erro na verificação automática: {str(exc)}"
+        # Retry the task
+        raise self.retry(exc=exc, countdown=60)
+
+
+@shared_task(bind=True, max_retries=3)
+def check_signature_status(self, signature_id, stage_result):
+    """
+    Second verification stage: certificate revocation and chain.
+    
+    Routed to the SIGNATURE_VERIFICATION_IO_QUEUE, where workers mostly
+    wait on OCSP/CRL responses. ``stage_result`` is the verify_signature
+    result carrying the signer's certificate chain.
+    """
+    start_time = time.time()
+    try:
+        from apps.signatures.models import Signature
+        from apps.signatures.verification_cache import cache_result
+        from apps.signatures.verification_service import PDFSignatureVerifier
+        
+        if self.request.retries:
+            # The failed attempt flagged it for manual review before retrying
+            Signature.objects.filter(
+                id=signature_id,
+                verification_status=Signature.STATUS_MANUAL_REVIEW
+            ).update(verification_status=Signature.STATUS_PROCESSING)
+        
+        signature = Signature.objects.select_related('petition').get(id=signature_id)
+        if signature.verification_status != Signature.STATUS_PROCESSING:
+            return _skip_finalized(signature, self.request.id)
+        
+        verifier = PDFSignatureVerifier()
+        result = verifier.check_certificate_status(stage_result)
+        cache_result(signature.file_hash, signature.petition, verifier.trust_store.version, result)
+        
+        return _finalize_signature(signature, result, start_time, self.request.id)
+        
+    except ObjectDoesNotExist:
+        logger.error(f"Signature with id {signature_id} not found")
+        raise
+    
+    except Exception as exc:
+        logger.error(f"Error checking certificate status for signature {signature_id}: {str(exc)}")
+        _flag_for_manual_review(signature_id, exc)
+        raise self.retry(exc=exc, countdown=60)
+
+
+def _flag_for_manual_review(signature_id, exc):
+    """Update signature to manual review on error."""
+    from apps.signatures.models import Signature
+    
+    try:
+        signature = Signature.objects.get(id=signature_id)
+        signature.verification_status = Signature.STATUS_MANUAL_REVIEW
+        signature.rejection_reason = f"Erro na verificação automática: {str(exc)}"
+        signature.save()
+    except:
+        pass
+
+
+def _finalize_signature(signature, result, start_time, task_id):
+    """
+    Store a final verification result for one signature and notify the signer.
+    
+    Only a row still in PROCESSING is finalized: once its claim went stale
+    it may have been verified by another task.
+    """
+    from django.db import transaction
+    from apps.signatures.models import Signature
+    
+    with transaction.atomic():
+        held = Signature.objects.select_for_update().filter(
+            pk=signature.pk,
+            verification_status=Signature.STATUS_PROCESSING
+        ).values_list('pk', flat=True).first()
+        if held is None:
+            return _skip_finalized(signature, task_id)
+        
+        if result['verified']:
+            # Store certificate information
+            _apply_certificate_info(signature, result)
+            
+            signature.verified = True
+            signature.processing_completed_at = timezone.now()
             signature.save()
-        except:
-            pass
+            
+            # Approve signature (this increments the petition count)
+            signature.approve()
+        else:
+            signature.verification_status = Signature.STATUS_REJECTED
+            signature.rejection_reason = result.get('error', 'Verificação falhou')
+            signature.processing_completed_at = timezone.now()
+            signature.save()
+    
+    if result['verified']:
+        # Generate custody chain certificate
+        stage_timings = _generate_custody_certificate(signature, result)
+        _observe_stage_timings(result, stage_timings)
+        _flush_stage_histograms()
         
-        # Retry the task
+        duration = time.time() - start_time
+        logger.info(
+            "Signature verified successfully",
+            signature_id=signature.id,
+            signature_uuid=str(signature.uuid),
+            petition_id=signature.petition_id,
+            duration_seconds=duration,
+            stage_durations_ms=_stage_durations(stage_timings),
+            task_id=task_id
+        )
+        
+        # Send verification email notification
+        _notify_signature_verified(signature)
+        
+        return {
+            'success': True,
+            'signature_uuid': str(signature.uuid),
+            'status': 'approved',
+            'custody_certificate_url': signature.custody_certificate_url
+        }
+    
+    # Signature verification failed
+    _observe_stage_timings(result, result.get('stage_timings'))
+    _flush_stage_histograms()
+    
+    duration = time.time() - start_time
+    logger.warning(
+        "Signature verification rejected",
+        signature_id=signature.id,
+        signature_uuid=str(signature.uuid),
+        petition_id=signature.petition_id,
+        rejection_reason=signature.rejection_reason,
+        duration_seconds=duration,
+        stage_durations_ms=_stage_durations(result.get('stage_timings')),
+        task_id=task_id
+    )
+    
+    _notify_signature_rejected(signature, result)
+    
+    return {
+        'success': False,
+        'signature_uuid': str(signature.uuid),
+        'status': 'rejected',
+        'reason': signature.rejection_reason
+    }
+
+
+def _skip_finalized(signature, task_id):
+    """Result for a task whose row was finished elsewhere."""
+    from apps.signatures.models import Signature
+    
+    status = Signature.objects.filter(pk=signature.pk).values_list(
+        'verification_status', flat=True
+    ).first()
+    logger.info(
+        "Signature no longer processing, skipping finalization",
+        signature_id=signature.id,
+        signature_uuid=str(signature.uuid),
+        verification_status=status,
+        task_id=task_id
+    )
+    return {
+        'success': True,
+        'signature_uuid': str(signature.uuid),
+        'status': status,
+        'skipped': True,
+    }
+
+
+def _run_verification(verifier, signature, pdf_file):
+    """
+    Run the document checks on an opened signed PDF, going through the
+    verification result cache.
+    
+    Rows uploaded before ``file_hash`` existed get it computed and saved.
+    A file already uploaded
+    for an earlier, not rejected signature of the same petition is not
+    verified: the result carries 'duplicate_of' and the row goes to manual
+    review. Results still waiting for the certificate status check carry
+    'status_check' and are cached once check_signature_status completes
+    them.
+    """
+    from apps.core.validators import calculate_file_hash
+    from apps.signatures.verification_cache import cache_result, get_cached_result
+    
+    if not signature.file_hash:
+        # Stored right away so concurrent copies find each other
+        signature.file_hash = calculate_file_hash(pdf_file)
+        type(signature).objects.filter(pk=signature.pk).update(file_hash=signature.file_hash)
+    
+    # The same file already backs another signature of this petition: a
+    # cached approval must not approve the copy (indexed lookup)
+    duplicate_of = _find_duplicate_upload(signature)
+    if duplicate_of is not None:
+        _record_duplicate_upload(signature, duplicate_of)
+        return {
+            'verified': False,
+            'certificate_info': None,
+            'error': (
+                'Arquivo PDF idêntico ao de outra assinatura desta petição. '
+                'Sua assinatura está em análise manual.'
+            ),
+            'duplicate_of': duplicate_of,
+        }
+    
+    trust_store_version = verifier.trust_store.version
+    result = get_cached_result(signature.file_hash, signature.petition, trust_store_version)
+    if result is None:
+        result = verifier.verify_pdf_signature(pdf_file, signature.petition, check_status=False)
+        if not result.get('status_check'):
+            cache_result(signature.file_hash, signature.petition, trust_store_version, result)
+    return result
+
+
+def _find_duplicate_upload(signature):
+    """Id of an earlier, not rejected signature of the petition with the same file, or None."""
+    from apps.signatures.models import Signature
+    
+    return Signature.objects.filter(
+        petition_id=signature.petition_id,
+        file_hash=signature.file_hash,
+        id__lt=signature.id
+    ).exclude(
+        verification_status=Signature.STATUS_REJECTED
+    ).values_list('id', flat=True).first()
+
+
+def _record_duplicate_upload(signature, duplicate_of):
+    """Log a duplicate upload and count it for monitoring."""
+    from django.core.cache import cache
+    
+    logger.warning(
+        "Duplicate signed PDF submitted",
+        signature_id=signature.id,
+        petition_id=signature.petition_id,
+        duplicate_of=duplicate_of,
+        file_hash=signature.file_hash[:12]
+    )
+    cache.add(VERIFICATION_DUPLICATES_CACHE_KEY, 0, None)
+    cache.incr(VERIFICATION_DUPLICATES_CACHE_KEY)
+
+
+def _mark_duplicate(signature, result):
+    """Send a signature whose file duplicates another one to manual review."""
+    from apps.signatures.models import Signature
+    
+    signature.verification_status = Signature.STATUS_MANUAL_REVIEW
+    signature.rejection_reason = result['error']
+    signature.processing_completed_at = timezone.now()
+    return signature
+
+
+def _apply_certificate_info(signature, result):
+    """Copy certificate details from a successful verification result."""
+    if result['certificate_info']:
+        cert_info = result['certificate_info']
+        signature.certificate_info = cert_info
+        signature.certificate_subject = cert_info.get('subject', '')
+        signature.certificate_issuer = cert_info.get('issuer', '')
+        signature.certificate_serial = cert_info.get('serial_number', '')
+        signature.verified_cpf_from_certificate = result.get('cpf_verified', False)
+
+
+def _generate_custody_certificate(signature, result):
+    """
+    Generate the custody chain certificate; failures are logged, not raised.
+    
+    Returns:
+        dict: the result's stage timings plus the 'custody' stage
+    """
+    from apps.signatures.verification_metrics import StageTimings
+    
+    timings = StageTimings(result.get('stage_timings'))
+    with timings.stage('custody'):
+        _write_custody_certificate(signature, result)
+    return timings.stages
+
+
+def _write_custody_certificate(signature, result):
+    try:
+        from apps.signatures.custody_service import generate_custody_certificate
+        certificate_url = generate_custody_certificate(signature, result)
+        logger.info(
+            "Custody certificate generated",
+            signature_uuid=str(signature.uuid),
+            certificate_url=certificate_url
+        )
+    except Exception as cert_error:
+        logger.error(
+            f"Failed to generate custody certificate: {str(cert_error)}",
+            signature_uuid=str(signature.uuid),
+            exc_info=True
+        )
+        # Don't fail the whole verification if certificate generation fails
+
+
+def _observe_stage_timings(result, stage_timings):
+    """Add a fresh (not cached) verification's stages to the stage histograms."""
+    from apps.signatures.verification_metrics import observe_stage_timings
+    
+    if stage_timings and not result.get('cached'):
+        observe_stage_timings(stage_timings)
+
+
+def _flush_stage_histograms():
+    from apps.signatures.verification_metrics import maybe_flush_stage_histograms
+    
+    try:
+        maybe_flush_stage_histograms()
+    except Exception as e:
+        logger.error(f"Failed to flush verification stage histograms: {str(e)}")
+
+
+def _stage_durations(stage_timings):
+    return {
+        name: entry['duration_ms']
+        for name, entry in (stage_timings or {}).items()
+        if 'duration_ms' in entry
+    }
+
+
+def _notify_signature_verified(signature):
+    try:
+        from apps.core.tasks import send_signature_verified_notification
+        send_signature_verified_notification.delay(signature.id)
+    except Exception as e:
+        logger.error(f"Failed to queue verification email: {str(e)}")
+
+
+def _notify_signature_rejected(signature, result):
+    # Check if this is a CNPJ rejection - send specific email
+    if result.get('rejection_code') == 'CNPJ_NOT_ACCEPTED':
+        try:
+            from apps.core.email import send_cnpj_rejection_email
+            send_cnpj_rejection_email(
+                signature=signature,
+                petition=signature.petition,
+                certificate_info=result.get('certificate_info', {})
+            )
+            logger.info(f"CNPJ rejection email sent for signature {signature.id}")
+        except Exception as e:
+            logger.error(f"Failed to send CNPJ rejection email: {str(e)}")
+    else:
+        # Send generic rejection email notification
+        try:
+            from apps.core.tasks import send_signature_rejected_notification
+            send_signature_rejected_notification.delay(signature.id)
+        except Exception as e:
+            logger.error(f"Failed to queue rejection email: {str(e)}")
+
+
+@shared_task(bind=True, max_retries=3)
+def verify_signature_batch(self, signature_ids=None, batch_size=None):
+    """
+    Verify up to ``batch_size`` pending signatures in one task.
+    
+    ``signature_ids`` restricts the batch to the rows dispatched by the
+    scheduler; without it the oldest pending rows are taken. Rows are
+    claimed with SELECT ... FOR UPDATE SKIP LOCKED and flipped to
+    processing, so concurrent batches never pick the same signature. One
+    verifier (trust store, CRL/OCSP caches) serves the whole batch and
+    status transitions are written with bulk_update; petition counters
+    are incremented once per petition.
+    
+    This task runs the CPU-bound document checks; rows that pass them are
+    sent as one check_signature_status_batch to the I/O queue.
+    """
+    from django.db import transaction
+    from apps.signatures.models import Signature
+    from apps.signatures.verification_service import PDFSignatureVerifier
+    
+    start_time = time.time()
+    batch_size = batch_size or VERIFICATION_BATCH_SIZE
+    
+    # Claim a batch atomically
+    with transaction.atomic():
+        claimable = Signature.objects.select_for_update(skip_locked=True).filter(
+            verification_status=Signature.STATUS_PENDING
+        )
+        if signature_ids is not None:
+            claimable = claimable.filter(id__in=signature_ids)
+        signature_ids = list(
+            claimable.order_by('created_at').values_list('id', flat=True)[:batch_size]
+        )
+        if not signature_ids:
+            return {'success': True, 'claimed_count': 0}
+        
+        claimed_at = timezone.now()
+        Signature.objects.filter(id__in=signature_ids).update(
+            verification_status=Signature.STATUS_PROCESSING,
+            processing_started_at=claimed_at
+        )
+    
+    signatures = list(
+        Signature.objects.select_related('petition').filter(
+            id__in=signature_ids
+        ).order_by('created_at', 'id')
+    )
+    
+    logger.info(
+        "Starting batch signature verification",
+        claimed_count=len(signatures),
+        task_id=self.request.id
+    )
+    
+    try:
+        verifier = PDFSignatureVerifier()
+    except Exception as exc:
+        # Release the claim so the rows are picked up again
+        Signature.objects.filter(id__in=signature_ids).update(
+            verification_status=Signature.STATUS_PENDING,
+            processing_started_at=None
+        )
         raise self.retry(exc=exc, countdown=60)
+    
+    approved = []
+    rejected = []
+    failed = []
+    deferred = []
+    
+    for signature in signatures:
+        signature.processing_started_at = claimed_at
+        try:
+            signature.signed_pdf.open('rb')
+            try:
+                result = _run_verification(verifier, signature, signature.signed_pdf)
+            finally:
+                signature.signed_pdf.close()
+        except Exception as exc:
+            _mark_failed(signature, exc, failed)
+            continue
+        
+        if result.get('duplicate_of'):
+            failed.append(_mark_duplicate(signature, result))
+        elif result.get('status_check'):
+            deferred.append((signature, result))
+        else:
+            _sort_result(signature, result, approved, rejected)
+    
+    _store_batch_outcomes(approved, rejected, failed)
+    deferred_count = _defer_status_checks(deferred)
+    
+    duration = time.time() - start_time
+    _record_verification_latency(duration / len(signatures))
+    logger.info(
+        "Batch signature verification completed",
+        claimed_count=len(signatures),
+        approved_count=len(approved),
+        rejected_count=len(rejected),
+        manual_review_count=len(failed),
+        status_check_count=deferred_count,
+        duration_seconds=duration,
+        task_id=self.request.id
+    )
+    
+    return {
+        'success': True,
+        'claimed_count': len(signatures),
+        'approved_count': len(approved),
+        'rejected_count': len(rejected),
+        'manual_review_count': len(failed),
+        'status_check_count': deferred_count,
+    }
+
+
+@shared_task(bind=True, max_retries=3)
+def check_signature_status_batch(self, items):
+    """
+    Certificate status stage for rows that passed verify_signature_batch.
+    
+    ``items`` is a list of ``[signature_id, stage_result]`` pairs. The
+    revocation lookups run on SIGNATURE_VERIFICATION_IO_CONCURRENCY threads,
+    each with its own verifier (revocation details are kept per instance).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from django.conf import settings
+    from apps.signatures.models import Signature
+    from apps.signatures.verification_cache import cache_result
+    from apps.signatures.verification_service import PDFSignatureVerifier
+    
+    start_time = time.time()
+    stage_results = {signature_id: stage_result for signature_id, stage_result in items}
+    signatures = list(
+        Signature.objects.select_related('petition').filter(
+            id__in=list(stage_results),
+            verification_status=Signature.STATUS_PROCESSING
+        )
+    )
+    if not signatures:
+        return {'success': True, 'checked_count': 0}
+    
+    def _check(signature):
+        try:
+            verifier = PDFSignatureVerifier()
+            result = verifier.check_certificate_status(stage_results[signature.id])
+            cache_result(signature.file_hash, signature.petition, verifier.trust_store.version, result)
+            return signature, result
+        except Exception as exc:
+            return signature, exc
+    
+    workers = max(1, min(settings.SIGNATURE_VERIFICATION_IO_CONCURRENCY, len(signatures)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        outcomes = list(pool.map(_check, signatures))
+    
+    approved = []
+    rejected = []
+    failed = []
+    for signature, result in outcomes:
+        if isinstance(result, Exception):
+            _mark_failed(signature, result, failed)
+        else:
+            _sort_result(signature, result, approved, rejected)
+    
+    _store_batch_outcomes(approved, rejected, failed)
+    
+    duration = time.time() - start_time
+    logger.info(
+        "Batch certificate status check completed",
+        checked_count=len(signatures),
+        approved_count=len(approved),
+        rejected_count=len(rejected),
+        manual_review_count=len(failed),
+        duration_seconds=duration,
+        task_id=self.request.id
+    )
+    
+    return {
+        'success': True,
+        'checked_count': len(signatures),
+        'approved_count': len(approved),
+        'rejected_count': len(rejected),
+        'manual_review_count': len(failed),
+    }
+
+
+def _mark_failed(signature, exc, failed):
+    from apps.signatures.models import Signature
+    
+    logger.error(
+        f"Error verifying signature {signature.id}: {str(exc)}",
+        signature_uuid=str(signature.uuid)
+    )
+    signature.verification_status = Signature.STATUS_MANUAL_REVIEW
+    signature.rejection_reason = f"Erro na verificação automática: {str(exc)}"
+    signature.processing_completed_at = timezone.now()
+    failed.append(signature)
+
+
+def _sort_result(signature, result, approved, rejected):
+    """Apply a final result to ``signature`` and file it as approved or rejected."""
+    from apps.signatures.models import Signature
+    
+    signature.processing_completed_at = timezone.now()
+    if result['verified']:
+        _apply_certificate_info(signature, result)
+        signature.verification_status = Signature.STATUS_APPROVED
+        signature.verified_at = signature.processing_completed_at
+        approved.append((signature, result))
+    else:
+        signature.verification_status = Signature.STATUS_REJECTED
+        signature.rejection_reason = result.get('error', 'Verificação falhou')
+        rejected.append((signature, result))
+
+
+def _store_batch_outcomes(approved, rejected, failed):
+    """
+    Write batch outcomes with bulk_update, bump counters once per petition, notify.
+    
+    Rows no longer in PROCESSING (finished by another task after a stale
+    claim was released) are left alone.
+    """
+    from django.db import transaction
+    from apps.signatures.models import Signature
+    from apps.core.logging_utils import log_model_event
+    
+    with transaction.atomic():
+        ids = [signature.id for signature, _ in approved + rejected] + [signature.id for signature in failed]
+        held = set(Signature.objects.select_for_update().filter(
+            id__in=ids,
+            verification_status=Signature.STATUS_PROCESSING
+        ).values_list('id', flat=True))
+        approved = [(signature, result) for signature, result in approved if signature.id in held]
+        rejected = [(signature, result) for signature, result in rejected if signature.id in held]
+        failed = [signature for signature in failed if signature.id in held]
+        
+        # Write every status transition in a few statements
+        status_fields = [
+            'verification_status', 'processing_started_at', 'processing_completed_at', 'file_hash',
+        ]
+        if approved:
+            Signature.objects.bulk_update(
+                [signature for signature, _ in approved],
+                status_fields + [
+                    'verified_at', 'certificate_info', 'certificate_subject',
+                    'certificate_issuer', 'certificate_serial', 'verified_cpf_from_certificate',
+                ],
+                batch_size=VERIFICATION_BULK_UPDATE_SIZE
+            )
+        if rejected or failed:
+            Signature.objects.bulk_update(
+                [signature for signature, _ in rejected] + failed,
+                status_fields + ['rejection_reason'],
+                batch_size=VERIFICATION_BULK_UPDATE_SIZE
+            )
+        
+        # One counter update (and milestone check) per petition
+        approvals_by_petition = {}
+        for signature, _ in approved:
+            log_model_event(
+                logger, 'Signature', 'approved',
+                signature.uuid,
+                petition_id=signature.petition_id,
+                old_status=Signature.STATUS_PROCESSING,
+                signer_name=signature.full_name,
+                city=signature.city,
+                state=signature.state
+            )
+            petition, count = approvals_by_petition.get(signature.petition_id, (signature.petition, 0))
+            approvals_by_petition[signature.petition_id] = (petition, count + 1)
+        for petition, count in approvals_by_petition.values():
+            petition.increment_signature_count(count)
+        if approved:
+            from apps.petitions.geo_stats import record_approved_signatures
+            record_approved_signatures(signature for signature, _ in approved)
+    
+    for signature, result in approved:
+        _observe_stage_timings(result, _generate_custody_certificate(signature, result))
+        _notify_signature_verified(signature)
+    
+    for signature, result in rejected:
+        _observe_stage_timings(result, result.get('stage_timings'))
+        _notify_signature_rejected(signature, result)
+    
+    _flush_stage_histograms()
+
+
+def _defer_status_checks(deferred):
+    """
+    Queue the certificate status stage for rows that passed the document checks.
+    
+    Returns:
+        int: number of rows handed to the I/O queue
+    """
+    from apps.signatures.models import Signature
+    
+    if not deferred:
+        return 0
+    
+    Signature.objects.bulk_update(
+        [signature for signature, _ in deferred],
+        ['file_hash'],
+        batch_size=VERIFICATION_BULK_UPDATE_SIZE
+    )
+    
+    ids = [signature.id for signature, _ in deferred]
+    try:
+        check_signature_status_batch.delay([[signature.id, result] for signature, result in deferred])
+    except Exception as e:
+        # Release the rows; the scheduler dispatches them again
+        logger.error(f'Failed to queue certificate status checks: {str(e)}')
+        Signature.objects.filter(id__in=ids).update(
+            verification_status=Signature.STATUS_PENDING,
+            processing_started_at=None,
+            enqueued_at=None
+        )
+        return 0
+    return len(ids)
+
+
+def _record_verification_latency(seconds_per_signature):
+    """Fold a batch's per-signature latency into the moving average."""
+    from django.core.cache import cache
+    
+    previous = cache.get(VERIFICATION_LATENCY_CACHE_KEY)
+    if previous is not None:
+        seconds_per_signature = (
+            VERIFICATION_LATENCY_SMOOTHING * seconds_per_signature
+            + (1 - VERIFICATION_LATENCY_SMOOTHING) * previous
+        )
+    cache.set(VERIFICATION_LATENCY_CACHE_KEY, seconds_per_signature, None)
+
+
+def get_verification_backlog():
+    """Latest backlog snapshot recorded by verify_pending_signatures, or None."""
+    from django.core.cache import cache
+    return cache.get(VERIFICATION_BACKLOG_CACHE_KEY)
 
 
 @shared_task(name='apps.signatures.tasks.verify_pending_signatures')
 def verify_pending_signatures():
     """
-    Periodic task to verify all pending signatures.
-    Runs every 5 minutes via Celery Beat.
+    Periodic task that dispatches pending signatures to verification batches.
+    Runs every SIGNATURE_VERIFICATION_SCHEDULE_SECONDS via Celery Beat.
+    
+    Dispatches enough signatures to keep SIGNATURE_VERIFICATION_CONCURRENCY
+    workers busy for two scheduler intervals at the measured per-signature
+    latency, minus what is already queued. Dispatched rows are stamped with
+    ``enqueued_at`` so later runs skip them; rows left unclaimed for
+    VERIFICATION_ENQUEUE_TIMEOUT are dispatched again. Rows claimed by a
+    batch that died (worker killed, time limit, lost I/O stage message)
+    stay processing; after VERIFICATION_PROCESSING_TIMEOUT they are put
+    back to pending. The backlog size and the age of the oldest pending
+    signature are logged and cached.
     """
+    from datetime import timedelta
+    from django.conf import settings
+    from django.core.cache import cache
+    from django.db.models import Q
     from apps.signatures.models import Signature
     
     try:
-        pending_signatures = Signature.objects.filter(
-            verification_status=Signature.STATUS_PENDING
-        )[:50]  # Limit to 50 at a time
+        now = timezone.now()
+        stale_before = now - timedelta(seconds=VERIFICATION_ENQUEUE_TIMEOUT)
+        
+        # Release claims abandoned by batches that never finished
+        recovered_count = Signature.objects.filter(
+            verification_status=Signature.STATUS_PROCESSING,
+            processing_started_at__lt=now - timedelta(seconds=VERIFICATION_PROCESSING_TIMEOUT)
+        ).update(
+            verification_status=Signature.STATUS_PENDING,
+            processing_started_at=None,
+            enqueued_at=None
+        )
+        if recovered_count:
+            logger.warning("Released stale processing signatures", recovered_count=recovered_count)
         
-        count = 0
-        for signature in pending_signatures:
+        pending = Signature.objects.filter(verification_status=Signature.STATUS_PENDING)
+        queued_count = pending.filter(enqueued_at__gte=stale_before).count()
+        dispatchable = pending.filter(Q(enqueued_at__isnull=True) | Q(enqueued_at__lt=stale_before))
+        backlog_count = dispatchable.count()
+        oldest_pending = pending.order_by('created_at').values_list('created_at', flat=True).first()
+        
+        interval = settings.SIGNATURE_VERIFICATION_SCHEDULE_SECONDS
+        concurrency = settings.SIGNATURE_VERIFICATION_CONCURRENCY
+        seconds_per_signature = max(
+            cache.get(VERIFICATION_LATENCY_CACHE_KEY) or VERIFICATION_DEFAULT_SECONDS_PER_SIGNATURE,
+            0.001
+        )
+        
+        # Keep workers busy until the next run, with one interval of headroom
+        target_in_flight = int(concurrency * 2 * interval / seconds_per_signature)
+        dispatch_count = max(0, min(
+            backlog_count,
+            target_in_flight - queued_count,
+            VERIFICATION_MAX_BATCHES_PER_RUN * VERIFICATION_BATCH_SIZE
+        ))
+        
+        signature_ids = list(
+            dispatchable.order_by('created_at').values_list('id', flat=True)[:dispatch_count]
+        )
+        
+        dispatched = 0
+        batch_count = 0
+        for start in range(0, len(signature_ids), VERIFICATION_BATCH_SIZE):
+            batch_ids = signature_ids[start:start + VERIFICATION_BATCH_SIZE]
+            Signature.objects.filter(id__in=batch_ids).update(enqueued_at=now)
             try:
-                verify_signature.delay(signature.id)
-                count += 1
+                verify_signature_batch.delay(signature_ids=batch_ids)
             except Exception as e:
-                logger.error(f'Failed to queue verification for signature {signature.uuid}: {str(e)}')
+                logger.error(f'Failed to queue verification batch: {str(e)}')
+                Signature.objects.filter(id__in=batch_ids).update(enqueued_at=None)
                 continue
+            dispatched += len(batch_ids)
+            batch_count += 1
         
-        logger.info(f'Queued {count} signature(s) for verification')
+        metrics = {
+            'pending_count': queued_count + backlog_count,
+            'queued_count': queued_count + dispatched,
+            'dispatched_count': dispatched,
+            'batch_count': batch_count,
+            'recovered_count': recovered_count,
+            'backlog_age_seconds': (now - oldest_pending).total_seconds() if oldest_pending else 0.0,
+            'seconds_per_signature': round(seconds_per_signature, 3),
+            'measured_at': now.isoformat(),
+        }
+        cache.set(VERIFICATION_BACKLOG_CACHE_KEY, metrics, interval * 5)
+        
+        logger.info("Verification backlog", **metrics)
         return {
             'success': True,
-            'queued_count': count
+            **metrics
         }
         
     except Exception as e:
@@ -216,12 +928,15 @@ def download_and_cache_crls(self):
     Downloads CRLs from:
     1. AC-Raiz (always)
     2. Previously discovered intermediate CA endpoints
+    
+    Endpoints are refreshed concurrently with conditional GETs; a CRL is
+    only re-indexed when its CRL number advances, and published delta
+    CRLs are merged into the cached index.
     """
-    import requests
     from datetime import datetime
-    from cryptography import x509
-    from cryptography.hazmat.backends import default_backend
     from django.core.cache import cache
+    from apps.signatures.crl_index import bump_crl_version
+    from apps.signatures.crl_refresh import STATUS_UPDATED, refresh_crls
     
     logger.info("Starting daily CRL download task")
     
@@ -238,77 +953,48 @@ def download_and_cache_crls(self):
     
     results = {
         'success': [],
+        'unchanged': [],
+        'delta_applied': [],
         'failed': [],
         'total_revoked_certs': 0,
         'timestamp': datetime.utcnow().isoformat()
     }
     
-    for ca_name, crl_url in CRL_ENDPOINTS.items():
-        try:
-            logger.info(f"Downloading CRL for {ca_name} from {crl_url}")
-            
-            # Download CRL
-            response = requests.get(crl_url, timeout=60)
-            response.raise_for_status()
-            crl_data = response.content
-            
-            # Parse CRL
-            try:
-                crl = x509.load_der_x509_crl(crl_data, default_backend())
-            except Exception:
-                # Try PEM format
-                crl = x509.load_pem_x509_crl(crl_data, default_backend())
-            
-            # Extract revoked certificate serial numbers
-            revoked_serials = set()
-            revoked_details = {}
-            
-            for revoked_cert in crl:
-                serial = revoked_cert.serial_number
-                revoked_serials.add(serial)
-                
-                # Store additional details
-                revoked_details[str(serial)] = {
-                    'revocation_date': revoked_cert.revocation_date_utc.isoformat(),
-                    'reason': _get_revocation_reason(revoked_cert),
-                }
-            
-            # Cache in Redis
-            cache_key_serials = f"crl:{ca_name}:serials"
-            cache_key_details = f"crl:{ca_name}:details"
-            cache_key_meta = f"crl:{ca_name}:meta"
-            
-            # Cache for 25 hours (gives 1-hour overlap before next daily run)
-            cache_timeout = 25 * 3600
-            
-            cache.set(cache_key_serials, revoked_serials, cache_timeout)
-            cache.set(cache_key_details, revoked_details, cache_timeout)
-            cache.set(cache_key_meta, {
-                'this_update': crl.last_update_utc.isoformat(),
-                'next_update': crl.next_update_utc.isoformat() if crl.next_update_utc else None,
-                'issuer': crl.issuer.rfc4514_string(),
-                'count': len(revoked_serials),
-                'cached_at': datetime.utcnow().isoformat(),
-            }, cache_timeout)
-            
-            results['success'].append(ca_name)
-            results['total_revoked_certs'] += len(revoked_serials)
-            
-            logger.info(
-                f"CRL cached for {ca_name}: {len(revoked_serials)} revoked certificates"
-            )
-            
-        except Exception as e:
-            logger.error(f"Failed to download/cache CRL for {ca_name}: {str(e)}")
+    changed = False
+    for ca_name, outcome in refresh_crls(CRL_ENDPOINTS).items():
+        if isinstance(outcome, Exception):
+            logger.error(f"Failed to download/cache CRL for {ca_name}: {str(outcome)}")
             results['failed'].append({
                 'ca': ca_name,
-                'error': str(e)
+                'error': str(outcome)
             })
+            continue
+        
+        results['success'].append(ca_name)
+        results['total_revoked_certs'] += outcome['count']
+        
+        if outcome['status'] == STATUS_UPDATED:
+            changed = True
+        else:
+            results['unchanged'].append(ca_name)
+        
+        if outcome.get('delta', {}).get('status') == STATUS_UPDATED:
+            changed = True
+            results['delta_applied'].append(ca_name)
+        
+        logger.info(
+            f"CRL {outcome['status']} for {ca_name}: {outcome['count']} revoked certificates"
+        )
+    
+    # Make every worker drop its in-process CRL indexes
+    if changed:
+        results['crl_version'] = bump_crl_version()
     
     # Log summary
     logger.info(
         f"CRL download task completed: "
-        f"{len(results['success'])} successful, "
+        f"{len(results['success'])} successful "
+        f"({len(results['unchanged'])} unchanged), "
         f"{len(results['failed'])} failed, "
         f"{results['total_revoked_certs']} total revoked certificates cached"
     )
@@ -316,18 +1002,6 @@ def download_and_cache_crls(self):
     return results
 
 
-def _get_revocation_reason(revoked_cert):
-    """Extract revocation reason from certificate."""
-    try:
-        from cryptography.x509.oid import CRLEntryExtensionOID
-        reason_ext = revoked_cert.extensions.get_extension_for_oid(
-            CRLEntryExtensionOID.CRL_REASON
-        )
-        return str(reason_ext.value.reason)
-    except:
-        return 'unspecified'
-
-
 @shared_task(bind=True, max_retries=3)
 def update_icp_brasil_certificates(self):
     """
@@ -421,5 +1095,14 @@ def update_icp_brasil_certificates(self):
     
     if results['downloaded']:
         logger.info(f"Downloaded {len(results['downloaded'])} new ICP-Brasil certificates")
+        
+        # Rebuild the shared trust store so new roots are used right away.
+        # Other worker processes pick them up on their next verification.
+        try:
+            from apps.signatures.trust_store import reload_trust_store
+            store = reload_trust_store(cert_dir)
+            results['trust_store_version'] = store.version
+        except Exception as e:
+            logger.error(f"Failed to reload ICP-Brasil trust store: {str(e)}")
     
     return results
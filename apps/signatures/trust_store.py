@@ -0,0 +1,220 @@
+"""
+Process-wide ICP-Brasil trust anchor store.
+
+Root certificates are parsed once per worker process and indexed by subject
+DN (DER bytes) and Subject Key Identifier, so issuer lookups during chain
+validation are dictionary hits instead of linear scans. The store reloads
+itself when the contents of the certificate directory change (e.g. after
+``update_icp_brasil_certificates`` downloads a new root).
+"""
+import hashlib
+import logging
+import os
+import threading
+
+from django.conf import settings
+from cryptography import x509
+from cryptography.hazmat.backends import default_backend
+from cryptography.x509 import load_der_x509_certificate, load_pem_x509_certificate
+
+logger = logging.getLogger(__name__)
+
+
+class TrustStoreError(Exception):
+    """Raised when the trust anchors cannot be loaded."""
+    pass
+
+
+def get_default_cert_dir():
+    """Directory holding the ICP-Brasil root certificates (.crt)."""
+    return os.path.join(settings.BASE_DIR, 'apps', 'signatures', 'icp_certificates')
+
+
+def _directory_fingerprint(cert_dir):
+    """
+    Cheap fingerprint of the .crt files in a directory.
+
+    Uses (name, size, mtime) from a single scandir, so checking for changes
+    costs one directory listing and no file reads.
+    """
+    entries = []
+    with os.scandir(cert_dir) as it:
+        for entry in it:
+            if entry.name.endswith('.crt') and entry.is_file():
+                stat = entry.stat()
+                entries.append((entry.name, stat.st_size, stat.st_mtime_ns))
+    return tuple(sorted(entries))
+
+
+def _subject_key_identifier(certificate):
+    try:
+        return certificate.extensions.get_extension_for_class(
+            x509.SubjectKeyIdentifier
+        ).value.digest
+    except (x509.ExtensionNotFound, ValueError):
+        return None
+
+
+def _authority_key_identifier(certificate):
+    try:
+        return certificate.extensions.get_extension_for_class(
+            x509.AuthorityKeyIdentifier
+        ).value.key_identifier
+    except (x509.ExtensionNotFound, ValueError):
+        return None
+
+
+class TrustStore:
+    """
+    Immutable, indexed set of trusted ICP-Brasil root certificates.
+
+    Instances are shared between verifications in the same process and
+    must never be mutated; a reload builds a brand new store.
+    """
+
+    def __init__(self, entries, fingerprint=()):
+        """
+        Args:
+            entries: list of dicts with 'filename', 'certificate' and 'subject'
+            fingerprint: directory fingerprint the entries were loaded from
+        """
+        self.entries = tuple(entries)
+        self.fingerprint = fingerprint
+        self.version = hashlib.sha256(repr(fingerprint).encode('utf-8')).hexdigest()[:16]
+
+        self._by_subject_der = {}
+        self._by_subject_str = {}
+        self._by_ski = {}
+
+        for entry in self.entries:
+            cert = entry['certificate']
+            self._by_subject_der.setdefault(cert.subject.public_bytes(), []).append(cert)
+            self._by_subject_str.setdefault(entry['subject'], []).append(cert)
+            ski = _subject_key_identifier(cert)
+            if ski:
+                self._by_ski.setdefault(ski, []).append(cert)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def certificates_for_subject(self, name):
+        """
+        Return trusted certificates whose subject equals ``name``.
+
+        Matches on the DER encoding first and falls back to the RFC 4514
+        string, which tolerates string-type differences in the encoding.
+        """
+        certs = self._by_subject_der.get(name.public_bytes())
+        if certs:
+            return certs
+        return self._by_subject_str.get(name.rfc4514_string(), [])
+
+    def is_trusted_subject(self, name):
+        """True if ``name`` is the subject of a trusted root."""
+        return bool(self.certificates_for_subject(name))
+
+    def find_issuer(self, certificate):
+        """
+        Find the trusted certificate that issued ``certificate``.
+
+        Prefers the Authority Key Identifier (unique per CA key, survives
+        re-keyed roots with identical DNs) and falls back to issuer DN.
+        """
+        aki = _authority_key_identifier(certificate)
+        if aki:
+            candidates = self._by_ski.get(aki)
+            if candidates:
+                return candidates[0]
+
+        candidates = self.certificates_for_subject(certificate.issuer)
+        return candidates[0] if candidates else None
+
+
+def load_trust_store(cert_dir=None):
+    """
+    Read and parse every .crt file in ``cert_dir`` into a new TrustStore.
+
+    Raises:
+        TrustStoreError: if the directory is missing or holds no valid certificate
+    """
+    cert_dir = cert_dir or get_default_cert_dir()
+
+    if not os.path.exists(cert_dir):
+        raise TrustStoreError(
+            f"Certificate directory not found: {cert_dir}. "
+            "Run 'python manage.py download_icp_certificates' first."
+        )
+
+    fingerprint = _directory_fingerprint(cert_dir)
+    entries = []
+
+    for filename, _size, _mtime in fingerprint:
+        filepath = os.path.join(cert_dir, filename)
+        try:
+            with open(filepath, 'rb') as f:
+                cert_data = f.read()
+
+            # Try loading as PEM first, then DER
+            try:
+                cert = load_pem_x509_certificate(cert_data, default_backend())
+            except Exception:
+                cert = load_der_x509_certificate(cert_data, default_backend())
+
+            entries.append({
+                'filename': filename,
+                'certificate': cert,
+                'subject': cert.subject.rfc4514_string(),
+            })
+        except Exception as e:
+            logger.warning(f"Could not load certificate {filename}: {e}")
+
+    if not entries:
+        raise TrustStoreError(
+            "No ICP-Brasil certificates found. "
+            "Run 'python manage.py download_icp_certificates' first."
+        )
+
+    logger.info(f"Loaded {len(entries)} ICP-Brasil trust anchors from {cert_dir}")
+    return TrustStore(entries, fingerprint)
+
+
+_stores = {}
+_lock = threading.Lock()
+
+
+def get_trust_store(cert_dir=None):
+    """
+    Return the shared TrustStore for ``cert_dir``, loading it on first use.
+
+    The store is rebuilt when the directory fingerprint changes, so new
+    roots written by another process are picked up without a restart.
+    """
+    cert_dir = cert_dir or get_default_cert_dir()
+    store = _stores.get(cert_dir)
+
+    if store is not None:
+        try:
+            if _directory_fingerprint(cert_dir) == store.fingerprint:
+                return store
+        except OSError:
+            return store
+
+    with _lock:
+        store = _stores.get(cert_dir)
+        if store is not None and os.path.exists(cert_dir) \
+                and _directory_fingerprint(cert_dir) == store.fingerprint:
+            return store
+        store = load_trust_store(cert_dir)
+        _stores[cert_dir] = store
+        return store
+
+
+def reload_trust_store(cert_dir=None):
+    """Force the shared store for ``cert_dir`` to be rebuilt from disk."""
+    cert_dir = cert_dir or get_default_cert_dir()
+    with _lock:
+        _stores.pop(cert_dir, None)
+    return get_trust_store(cert_dir)
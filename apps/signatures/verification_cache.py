@@ -0,0 +1,88 @@
+"""
+Content-addressed cache of PDF verification results.
+
+A result is stored under the SHA-256 of the signed PDF together with
+everything else the verifier's outcome depends on:
+
+    signatures:verification:result:{pdf sha256}:{petition uuid}:{trust store version}:{crl version}
+
+A new trust store (roots added or removed) or a CRL refresh that changed
+an index (``crl:version``, see apps.signatures.crl_index) produces new keys,
+so stale outcomes are never served and simply expire. Only outcomes that
+depend on the document alone are stored: approvals and rejections with a
+deterministic rejection code. Errors such as a failed revocation lookup
+are always retried.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.signatures.crl_index import CRL_VERSION_KEY
+
+logger = logging.getLogger(__name__)
+
+VERIFICATION_RESULT_CACHE_PREFIX = 'signatures:verification:result'
+
+# Rejections that a second run over the same bytes would repeat
+CACHEABLE_REJECTION_CODES = {
+    'CNPJ_NOT_ACCEPTED',
+    'SIGNATURE_INVALID',
+    'CONTENT_MISMATCH',
+}
+
+
+def result_cache_key(file_hash, petition, trust_store_version):
+    crl_version = cache.get(CRL_VERSION_KEY) or 'none'
+    return (
+        f"{VERIFICATION_RESULT_CACHE_PREFIX}:{file_hash}:{petition.uuid}:"
+        f"{trust_store_version}:{crl_version}"
+    )
+
+
+def is_cacheable(result):
+    """True if ``result`` only depends on the PDF bytes and the cache key inputs."""
+    if result.get('verified'):
+        return True
+    return (
+        result.get('rejection_code') in CACHEABLE_REJECTION_CODES
+        or bool(result.get('requires_manual_review'))
+    )
+
+
+def get_cached_result(file_hash, petition, trust_store_version):
+    """
+    Previous verification result for this exact PDF and petition, or None.
+
+    Hits are returned as a copy flagged with ``cached=True``, without the
+    stage timings of the run that produced them.
+    """
+    if not file_hash:
+        return None
+
+    result = cache.get(result_cache_key(file_hash, petition, trust_store_version))
+    if result is None:
+        return None
+
+    logger.info(f"Verification result cache hit for {file_hash[:12]} (petition {petition.uuid})")
+    result = dict(result, cached=True)
+    result.pop('stage_timings', None)
+    return result
+
+
+def cache_result(file_hash, petition, trust_store_version, result):
+    """
+    Store ``result`` when it is cacheable.
+
+    Returns:
+        bool: whether the result was stored
+    """
+    if not file_hash or not is_cacheable(result):
+        return False
+
+    cache.set(
+        result_cache_key(file_hash, petition, trust_store_version),
+        result,
+        settings.SIGNATURE_VERIFICATION_RESULT_CACHE_SECONDS
+    )
+    return True
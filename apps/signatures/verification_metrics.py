@@ -0,0 +1,221 @@
+"""
+Per-stage timing of signature verification.
+
+PDFSignatureVerifier records each stage (read, parse, certificate
+extraction, type check, integrity, validity, content, revocation, chain)
+with a monotonic clock into ``result['stage_timings']``; the tasks add the
+custody certificate stage. The timings go into the verification evidence
+and into fixed-bucket histograms kept in the Django cache:
+
+    signatures:verification:stage_seconds:{label}:bucket:{upper bound}
+    signatures:verification:stage_seconds:{label}:count
+    signatures:verification:stage_seconds:{label}:sum_ms
+
+Revocation is labelled by method (``revocation:ocsp``, ``revocation:crl``...).
+Observations are accumulated per worker process. Tasks call
+maybe_flush_stage_histograms(), which writes them only every
+STAGE_HISTOGRAM_FLUSH_SECONDS or STAGE_HISTOGRAM_FLUSH_OBSERVATIONS
+verifications, whichever comes first, with one increment per touched
+counter; the counters are created once per process, not on every flush.
+Up to one interval of observations is lost when a worker exits.
+"""
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+
+# Histogram bucket upper bounds (seconds); slower observations go to +Inf
+VERIFICATION_STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_HISTOGRAM_PREFIX = 'signatures:verification:stage_seconds'
+STAGE_HISTOGRAM_LABELS_KEY = f'{STAGE_HISTOGRAM_PREFIX}:labels'
+
+# Flush accumulated observations at most this often...
+STAGE_HISTOGRAM_FLUSH_SECONDS = 30
+# ...unless this many verifications are waiting
+STAGE_HISTOGRAM_FLUSH_OBSERVATIONS = 100
+
+
+class StageTimings:
+    """Start time and monotonic duration of each stage of one verification."""
+
+    def __init__(self, stages=None):
+        self.stages = dict(stages or {})
+        self._running = None
+
+    def begin(self, name, **labels):
+        """End the running stage, if any, and start ``name``."""
+        self.end()
+        entry = {'started_at': datetime.now(timezone.utc).isoformat(), **labels}
+        self._running = (name, entry, time.monotonic())
+        return entry
+
+    def end(self):
+        """End the running stage."""
+        if self._running is None:
+            return
+        name, entry, start = self._running
+        entry['duration_ms'] = round((time.monotonic() - start) * 1000, 3)
+        self.stages[name] = entry
+        self._running = None
+
+    @contextmanager
+    def stage(self, name, **labels):
+        """
+        Time the enclosed block as ``name``.
+
+        Yields the stage entry, so labels known only inside the block (the
+        revocation method) can be added to it.
+        """
+        entry = {'started_at': datetime.now(timezone.utc).isoformat(), **labels}
+        start = time.monotonic()
+        try:
+            yield entry
+        finally:
+            entry['duration_ms'] = round((time.monotonic() - start) * 1000, 3)
+            self.stages[name] = entry
+
+
+def stage_label(name, entry):
+    method = entry.get('method')
+    return f'{name}:{str(method).lower()}' if method else name
+
+
+def _bucket(seconds):
+    for upper in VERIFICATION_STAGE_BUCKETS:
+        if seconds <= upper:
+            return str(upper)
+    return '+Inf'
+
+
+_pending_lock = threading.Lock()
+_pending = defaultdict(int)
+_pending_labels = set()
+_pending_observations = 0
+_last_flush = time.monotonic()
+# Counters and labels this process has already created in the cache
+_created_keys = set()
+_published_labels = set()
+
+
+def observe_stage_timings(stage_timings):
+    """Add the stages of one finished verification to this process's histograms."""
+    global _pending_observations
+    with _pending_lock:
+        _pending_observations += 1
+        for name, entry in (stage_timings or {}).items():
+            if 'duration_ms' not in entry:
+                continue
+            label = stage_label(name, entry)
+            prefix = f'{STAGE_HISTOGRAM_PREFIX}:{label}'
+            _pending[f'{prefix}:bucket:{_bucket(entry["duration_ms"] / 1000)}'] += 1
+            _pending[f'{prefix}:count'] += 1
+            _pending[f'{prefix}:sum_ms'] += int(round(entry['duration_ms']))
+            _pending_labels.add(label)
+
+
+def flush_stage_histograms():
+    """Write the observations accumulated in this process to the shared cache."""
+    global _pending_observations, _last_flush
+    with _pending_lock:
+        increments = dict(_pending)
+        labels = set(_pending_labels)
+        _pending.clear()
+        _pending_labels.clear()
+        _pending_observations = 0
+        _last_flush = time.monotonic()
+
+    if not increments:
+        return
+
+    for key, delta in increments.items():
+        if key not in _created_keys:
+            cache.add(key, 0, None)
+            _created_keys.add(key)
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            # Evicted (or the cache was cleared) since this process created
+            # it; the other counters and the label list may be gone too
+            _created_keys.clear()
+            _published_labels.clear()
+            cache.add(key, 0, None)
+            cache.incr(key, delta)
+            _created_keys.add(key)
+
+    if not labels <= _published_labels:
+        known = set(cache.get(STAGE_HISTOGRAM_LABELS_KEY) or ())
+        if not labels <= known:
+            cache.set(STAGE_HISTOGRAM_LABELS_KEY, sorted(known | labels), None)
+        _published_labels.update(labels, known)
+
+
+def maybe_flush_stage_histograms():
+    """
+    Flush if STAGE_HISTOGRAM_FLUSH_SECONDS have passed since the last flush
+    or STAGE_HISTOGRAM_FLUSH_OBSERVATIONS verifications are waiting.
+
+    Returns:
+        bool: Whether a flush ran
+    """
+    with _pending_lock:
+        due = (
+            _pending_observations >= STAGE_HISTOGRAM_FLUSH_OBSERVATIONS
+            or time.monotonic() - _last_flush >= STAGE_HISTOGRAM_FLUSH_SECONDS
+        )
+    if due:
+        flush_stage_histograms()
+    return due
+
+
+def _quantile(cumulative, count, q):
+    """Upper bound of the bucket holding quantile ``q``."""
+    target = q * count
+    for upper, seen in cumulative:
+        if seen >= target:
+            return upper
+    return '+Inf'
+
+
+def get_stage_histograms():
+    """
+    Current per-stage histograms, with cumulative buckets and estimated quantiles.
+
+    Returns:
+        dict: label -> {'count', 'sum_seconds', 'buckets': [(upper, cumulative)],
+        'p50', 'p99'}; quantiles are bucket upper bounds
+    """
+    labels = cache.get(STAGE_HISTOGRAM_LABELS_KEY) or []
+    uppers = [str(upper) for upper in VERIFICATION_STAGE_BUCKETS] + ['+Inf']
+
+    keys = []
+    for label in labels:
+        prefix = f'{STAGE_HISTOGRAM_PREFIX}:{label}'
+        keys += [f'{prefix}:count', f'{prefix}:sum_ms']
+        keys += [f'{prefix}:bucket:{upper}' for upper in uppers]
+    values = cache.get_many(keys)
+
+    histograms = {}
+    for label in labels:
+        prefix = f'{STAGE_HISTOGRAM_PREFIX}:{label}'
+        count = values.get(f'{prefix}:count', 0)
+        if not count:
+            continue
+
+        cumulative = []
+        seen = 0
+        for upper in uppers:
+            seen += values.get(f'{prefix}:bucket:{upper}', 0)
+            cumulative.append((upper, seen))
+
+        histograms[label] = {
+            'count': count,
+            'sum_seconds': values.get(f'{prefix}:sum_ms', 0) / 1000,
+            'buckets': cumulative,
+            'p50': _quantile(cumulative, count, 0.5),
+            'p99': _quantile(cumulative, count, 0.99),
+        }
+    return histograms
@@ -16,6 +16,19 @@ from cryptography.hazmat.primitives.serialization import pkcs7
 
 from pypdf import PdfReader
 
+from apps.signatures.cms import (
+    CMSError,
+    find_signer_certificate,
+    parse_signed_data,
+    verify_byte_range_signature,
+)
+from apps.signatures.verification_metrics import StageTimings
+from apps.signatures.trust_store import (
+    TrustStoreError,
+    get_default_cert_dir,
+    get_trust_store,
+)
+
 
 # ICP-Brasil OID Constants
 # Reference: DOC-ICP-04 - Requisitos Mínimos para as PC ICP-Brasil
@@ -36,84 +49,78 @@ class PDFSignatureVerifier:
     Verify digital signatures on PDF documents using ICP-Brasil certificates.
     """
     
-    def __init__(self):
-        self.cert_dir = os.path.join(
-            settings.BASE_DIR,
-            'apps',
-            'signatures',
-            'icp_certificates'
-        )
-        self.trusted_certs = self._load_trusted_certificates()
+    def __init__(self, cert_dir=None):
+        self.cert_dir = cert_dir or get_default_cert_dir()
+        self.trust_store = self._load_trusted_certificates()
+        self.timings = StageTimings()
     
     def _load_trusted_certificates(self):
-        """Load ICP-Brasil root certificates from storage."""
-        certificates = []
-        
-        if not os.path.exists(self.cert_dir):
-            raise SignatureVerificationError(
-                f"Certificate directory not found: {self.cert_dir}. "
-                "Run 'python manage.py download_icp_certificates' first."
-            )
-        
-        for filename in os.listdir(self.cert_dir):
-            if filename.endswith('.crt'):
-                filepath = os.path.join(self.cert_dir, filename)
-                try:
-                    with open(filepath, 'rb') as f:
-                        cert_data = f.read()
-                        
-                        # Try loading as PEM first, then DER
-                        try:
-                            cert = load_pem_x509_certificate(cert_data, default_backend())
-                        except Exception:
-                            cert = load_der_x509_certificate(cert_data, default_backend())
-                        
-                        certificates.append({
-                            'filename': filename,
-                            'certificate': cert,
-                            'subject': cert.subject.rfc4514_string(),
-                        })
-                except Exception as e:
-                    print(f"Warning: Could not load certificate {filename}: {e}")
-        
-        if not certificates:
-            raise SignatureVerificationError(
-                "No ICP-Brasil certificates found. "
-                "Run 'python manage.py download_icp_certificates' first."
-            )
+        """
+        Get the ICP-Brasil root certificates.
         
-        return certificates
+        Certificates are parsed once per worker process and shared between
+        verifier instances (see apps.signatures.trust_store).
+        """
+        try:
+            return get_trust_store(self.cert_dir)
+        except TrustStoreError as e:
+            raise SignatureVerificationError(str(e))
+    
+    @property
+    def trusted_certs(self):
+        """Trusted roots as a list of dicts (filename, certificate, subject)."""
+        return list(self.trust_store)
     
-    def verify_pdf_signature(self, pdf_file, petition):
+    def verify_pdf_signature(self, pdf_file, petition, check_status=True):
         """
         Verify the digital signature on a PDF file.
         
+        Verification runs in two stages: the CPU-bound document checks
+        (parsing, certificate type, CMS signature, validity, content) and
+        the network-bound certificate status check (revocation and chain,
+        see check_certificate_status).
+        
         Args:
             pdf_file: File object or path to the signed PDF
             petition: The petition object this signature is for
+            check_status: If False, stop after the document checks; a result
+                that passed them carries 'status_check' for the second stage
             
         Returns:
             dict: Verification results with keys:
                 - verified (bool): Whether signature is valid
                 - certificate_info (dict): Certificate details if valid
                 - error (str): Error message if invalid
+                - stage_timings (dict): start and duration of each stage
         """
+        self.timings = StageTimings()
+        try:
+            result = self._check_document(pdf_file, petition)
+        finally:
+            self.timings.end()
+        result['stage_timings'] = self.timings.stages
+        
+        if not check_status or 'status_check' not in result:
+            return result
+        
+        return self.check_certificate_status(result)
+    
+    def _check_document(self, pdf_file, petition):
+        """First verification stage: everything that only needs the PDF bytes."""
         result = {
             'verified': False,
             'certificate_info': None,
             'error': None,
         }
+        timings = self.timings
         
         try:
-            # Read PDF file
-            if isinstance(pdf_file, str):
-                with open(pdf_file, 'rb') as f:
-                    pdf_data = f.read()
-            else:
-                pdf_file.seek(0)
-                pdf_data = pdf_file.read()
+            # Read PDF file once; the reader and the content check share this buffer
+            timings.begin('read')
+            pdf_data = self._read_pdf_data(pdf_file)
             
-            # Parse PDF
+            # Parse PDF (the only parse for this verification)
+            timings.begin('parse')
             pdf_reader = PdfReader(BytesIO(pdf_data))
             
             # Check if PDF is signed
@@ -147,6 +154,11 @@ class PDFSignatureVerifier:
             
             sig_dict = sig_field['/V']
             
+            # CMS SignedData, checked against the signed ByteRange below
+            timings.begin('cert_extraction')
+            pkcs7_data = None
+            signed_data = None
+            
             # Extract certificate from signature (PKCS#7 format)
             if '/Contents' in sig_dict:
                 # Standard PKCS#7 signature format
@@ -184,6 +196,16 @@ class PDFSignatureVerifier:
                         # Store the full certificate chain for validation
                         certificate_chain = p7
                         
+                        # Prefer the certificate the SignerInfo points at;
+                        # parse errors are reported by the integrity check
+                        try:
+                            signed_data = parse_signed_data(pkcs7_data)
+                            signer = find_signer_certificate(signed_data.signer_infos[0], p7)
+                            if signer is not None:
+                                certificate = signer
+                        except CMSError:
+                            signed_data = None
+                        
                     except Exception as pkcs7_error:
                         result['error'] = f'Erro ao processar PKCS#7: {str(pkcs7_error)}'
                         return result
@@ -219,6 +241,7 @@ class PDFSignatureVerifier:
             
             # Now validate the certificate (for both PKCS#7 and /Cert formats)
             try:
+                timings.begin('type_check')
                 # STEP 1: Check certificate type (CPF vs CNPJ) - MUST BE FIRST
                 cert_type, cert_value = self._extract_certificate_type(certificate)
                 
@@ -272,14 +295,19 @@ class PDFSignatureVerifier:
                 
                 # CPF certificate - continue with normal validation
                 
-                # STEP 2: Verify certificate chain against ICP-Brasil roots
-                chain_valid = self._verify_certificate_chain(certificate, certificate_chain)
+                # STEP 2: Verify the CMS signature over the signed ByteRange
+                timings.begin('integrity')
+                integrity_error = self._verify_signature_integrity(
+                    pdf_data, sig_dict, pkcs7_data, signed_data, certificate
+                )
                 
-                if not chain_valid:
-                    result['error'] = 'Certificado não pertence à cadeia ICP-Brasil'
+                if integrity_error:
+                    result['error'] = integrity_error
+                    result['rejection_code'] = 'SIGNATURE_INVALID'
                     return result
                 
                 # Check certificate validity period
+                timings.begin('validity')
                 now = datetime.now(timezone.utc)
                 if now < certificate.not_valid_before_utc:
                     result['error'] = 'Certificado ainda não é válido'
@@ -292,32 +320,138 @@ class PDFSignatureVerifier:
                 # Extract certificate information
                 cert_info = self._extract_certificate_info(certificate)
                 
-                # Verify PDF content hash matches petition
-                content_valid = self._verify_pdf_content(pdf_data, petition)
+                # Verify PDF content hash matches petition. Incremental
+                # updates after the signed revision are not covered by the
+                # signature, so only the revision the signer saw is checked
+                timings.begin('content')
+                if self.signed_size < len(pdf_data):
+                    result['appended_bytes'] = len(pdf_data) - self.signed_size
+                    content_valid = self._verify_pdf_content(pdf_data[:self.signed_size], petition)
+                else:
+                    content_valid = self._verify_pdf_content(pdf_data, petition, pdf_reader)
                 
                 if not content_valid:
                     result['error'] = 'Conteúdo do PDF não corresponde à petição original'
+                    result['rejection_code'] = 'CONTENT_MISMATCH'
                     return result
                 
-                # All checks passed
-                result['verified'] = True
-                result['certificate_info'] = cert_info
-                
-                # Add revocation check details if available
-                if hasattr(self, 'revocation_details') and self.revocation_details:
-                    result['revocation_method'] = self.revocation_details.get('method')
-                    result['revocation_checked_at'] = self.revocation_details.get('checked_at')
-                    result['revocation_status'] = self.revocation_details.get('status')
-                
             except Exception as e:
                 result['error'] = f'Erro na validação do certificado: {str(e)}'
                 return result
             
+            # Document checks passed; the certificate status check remains
+            timings.end()
+            result['status_check'] = {
+                'certificate_info': cert_info,
+                'certificate_chain': [
+                    cert.public_bytes(serialization.Encoding.PEM).decode('ascii')
+                    for cert in [certificate] + [c for c in certificate_chain if c != certificate]
+                ],
+            }
+            
         except Exception as e:
             result['error'] = f'Erro ao verificar PDF: {str(e)}'
         
         return result
     
+    def check_certificate_status(self, result):
+        """
+        Second (network-bound) stage: revocation and ICP-Brasil chain.
+        
+        Completes a result returned by ``verify_pdf_signature(...,
+        check_status=False)``. The certificates are rebuilt from the PEM
+        chain carried in ``result['status_check']``, so the stage can run
+        in another process.
+        
+        Returns:
+            dict: the final verification result
+        """
+        result = dict(result)
+        status_check = result.pop('status_check')
+        self.timings = StageTimings(result.get('stage_timings'))
+        result['stage_timings'] = self.timings.stages
+        
+        try:
+            certificate_chain = [
+                load_pem_x509_certificate(pem.encode('ascii'), default_backend())
+                for pem in status_check['certificate_chain']
+            ]
+            certificate = certificate_chain[0]
+            
+            # Verify certificate chain against ICP-Brasil roots
+            try:
+                chain_valid = self._verify_certificate_chain(certificate, certificate_chain)
+            finally:
+                self.timings.end()
+            
+            if not chain_valid:
+                result['error'] = 'Certificado não pertence à cadeia ICP-Brasil'
+                return result
+            
+            # All checks passed
+            result['verified'] = True
+            result['certificate_info'] = status_check['certificate_info']
+            
+            # Add revocation check details if available
+            if hasattr(self, 'revocation_details') and self.revocation_details:
+                result['revocation_method'] = self.revocation_details.get('method')
+                result['revocation_checked_at'] = self.revocation_details.get('checked_at')
+                result['revocation_status'] = self.revocation_details.get('status')
+            
+        except Exception as e:
+            result['error'] = f'Erro na validação do certificado: {str(e)}'
+        
+        return result
+    
+    def _verify_signature_integrity(self, pdf_data, sig_dict, pkcs7_data, signed_data, certificate):
+        """
+        Check that the signer really signed this exact document.
+        
+        The two /ByteRange slices are hashed straight from ``pdf_data``
+        (see apps.signatures.cms) and compared with the signer's
+        messageDigest, and the signature is verified with the signer's key.
+        The size of the signed revision is kept in ``self.signed_size``;
+        incremental updates may follow it.
+        
+        Returns:
+            str: error message, or None if the signature is intact
+        """
+        import logging
+        logger = logging.getLogger(__name__)
+        
+        self.signed_size = None
+        
+        if pkcs7_data is None:
+            return 'Assinatura digital sem dados PKCS#7 não pode ser verificada'
+        
+        if signed_data is None:
+            try:
+                signed_data = parse_signed_data(pkcs7_data)
+            except CMSError as e:
+                logger.warning(f"Invalid CMS signature structure: {str(e)}")
+                return 'Estrutura da assinatura PKCS#7 inválida'
+        
+        if '/ByteRange' not in sig_dict:
+            return 'Assinatura não indica o intervalo de bytes assinado'
+        
+        try:
+            byte_range = [int(value) for value in sig_dict['/ByteRange']]
+            signature = verify_byte_range_signature(signed_data, pdf_data, byte_range, [certificate])
+        except CMSError as e:
+            logger.warning(
+                f"CMS signature check failed: {str(e)}",
+                extra={'certificate_serial': certificate.serial_number}
+            )
+            return 'Assinatura digital inválida: o documento foi alterado ou a assinatura não confere'
+        
+        if signature['appended_bytes']:
+            logger.info(
+                f"Signed revision followed by {signature['appended_bytes']} bytes of incremental updates",
+                extra={'certificate_serial': certificate.serial_number}
+            )
+        self.signed_size = signature['signed_size']
+        return None
+    
     def _verify_certificate_chain(self, certificate, certificate_chain):
         """
         Verify that the certificate chain leads to an ICP-Brasil root.
@@ -348,8 +482,10 @@ class PDFSignatureVerifier:
                 issuer_certificate=issuer_cert
             )
             
-            # Check revocation status
-            is_revoked, revocation_details = revocation_checker.is_revoked()
+            # Check revocation status (timed per method: cached CRL, OCSP...)
+            with self.timings.stage('revocation') as stage:
+                is_revoked, revocation_details = revocation_checker.is_revoked()
+                stage['method'] = revocation_details.get('method')
             
             # Store for custody certificate
             self.revocation_details = revocation_details
@@ -384,6 +520,9 @@ class PDFSignatureVerifier:
                     "(SIGNATURE_VERIFICATION_STRICT=False)"
                 )
         
+        # Trust store lookups; the stage is ended by check_certificate_status
+        self.timings.begin('chain')
+        
         # Known ICP-Brasil intermediate CAs (Gov.br chain)
         # These are common intermediate CAs under ICP-Brasil roots
         known_intermediates = [
@@ -394,30 +533,19 @@ class PDFSignatureVerifier:
             'Gov-Br',
         ]
         
-        # Build a list of all certificates we need to check
+        # Check each certificate in the chain against the indexed trust store
         for cert in certificate_chain:
-            issuer = cert.issuer.rfc4514_string()
-            cert_subject = cert.subject.rfc4514_string()
-            
             # Check if this cert is issued directly by a trusted root
-            for trusted_cert_info in self.trusted_certs:
-                trusted_cert = trusted_cert_info['certificate']
-                trusted_subject = trusted_cert.subject.rfc4514_string()
-                
-                # Check if the issuer matches the trusted root's subject
-                if issuer == trusted_subject:
-                    return True
+            if self.trust_store.is_trusted_subject(cert.issuer):
+                return True
             
             # Check if this cert itself IS a trusted root
-            for trusted_cert_info in self.trusted_certs:
-                trusted_cert = trusted_cert_info['certificate']
-                trusted_subject = trusted_cert.subject.rfc4514_string()
-                
-                if cert_subject == trusted_subject:
-                    return True
+            if self.trust_store.is_trusted_subject(cert.subject):
+                return True
             
             # Check if issued by a known ICP-Brasil intermediate
             # This handles Gov.br certificates that don't include full chain
+            issuer = cert.issuer.rfc4514_string()
             for intermediate_name in known_intermediates:
                 if intermediate_name in issuer:
                     # Accept certificates issued by known Gov.br intermediates
@@ -443,13 +571,8 @@ class PDFSignatureVerifier:
             if cert.subject == issuer_name:
                 return cert
         
-        # Not found in chain - try loaded trusted certs
-        for trusted_cert_info in self.trusted_certs:
-            trusted_cert = trusted_cert_info['certificate']
-            if trusted_cert.subject == issuer_name:
-                return trusted_cert
-        
-        return None
+        # Not found in chain - try the trust store
+        return self.trust_store.find_issuer(certificate)
     
     def _extract_certificate_info(self, certificate):
         """Extract relevant information from certificate."""
@@ -573,13 +696,34 @@ class PDFSignatureVerifier:
             logger.error(f'Error extracting certificate type: {e}')
             return ('UNKNOWN', None)
     
-    def _verify_pdf_content(self, pdf_data, petition):
+    @staticmethod
+    def _read_pdf_data(pdf_file):
+        """
+        Return the PDF bytes without extra copies.
+        
+        In-memory buffers hand back their existing bytes (BytesIO.getvalue()
+        shares rather than copies); BytesIO(pdf_data) over those bytes is
+        likewise copy-free, so one buffer serves the reader and the UUID scan.
+        """
+        if isinstance(pdf_file, str):
+            with open(pdf_file, 'rb') as f:
+                return f.read()
+        if isinstance(pdf_file, BytesIO):
+            return pdf_file.getvalue()
+        pdf_file.seek(0)
+        return pdf_file.read()
+    
+    def _verify_pdf_content(self, pdf_data, petition, pdf_reader=None):
         """
         Verify that the PDF content matches the petition.
         
         This checks if the petition UUID is embedded in the PDF by:
         1. Searching in raw PDF bytes (faster, covers all PDF objects)
-        2. Extracting and searching text from pages (more reliable for content)
+        2. Extracting text page by page, stopping at the first page that
+           contains it (more reliable for content)
+        
+        ``pdf_reader`` is the reader already built by verify_pdf_signature;
+        the PDF is only parsed here when none is given.
         """
         import logging
         logger = logging.getLogger(__name__)
@@ -602,20 +746,28 @@ class PDFSignatureVerifier:
                 logger.debug('[VERIFY_PETITION_CONTENT] UUID found in raw bytes')
                 return True
             
-            # Method 2: Extract text from pages and search
+            # Method 2: Extract text from pages lazily and search
             # This handles cases where UUID is in rendered text but encoded differently
             try:
-                pdf_reader = PdfReader(BytesIO(pdf_data))
-                all_text = ""
+                if pdf_reader is None:
+                    pdf_reader = PdfReader(BytesIO(pdf_data))
                 
-                for page in pdf_reader.pages:
+                # Carry the end of the previous page so a UUID split
+                # across a page break is still found
+                carry = ''
+                overlap = len(petition_uuid) - 1
+                
+                for page_number, page in enumerate(pdf_reader.pages, 1):
                     try:
-                        all_text += page.extract_text()
+                        text = carry + (page.extract_text() or '')
                     except:
-                        pass
-                
-                if petition_uuid in all_text:
-                    return True
+                        continue
+                    
+                    if petition_uuid in text:
+                        logger.debug(f'[VERIFY_PETITION_CONTENT] UUID found in text of page {page_number}')
+                        return True
+                    
+                    carry = text[-overlap:]
                     
             except:
                 pass
@@ -13,6 +13,7 @@ from django.utils.decorators import method_decorator
 from apps.petitions.models import Petition
 from apps.core.rate_limiting import rate_limit
 from apps.core.google_tracking import GoogleAnalyticsEventMixin
+from apps.core.pagination import CursorPaginationMixin
 from .models import Signature
 from .forms import SignatureSubmissionForm
 
@@ -92,8 +93,9 @@ class SignatureSubmitView(GoogleAnalyticsEventMixin, CreateView):
                 # Hash IP address for LGPD compliance
                 form.instance.ip_address_hash = Signature.hash_ip(ip)
                 
-                # Set initial status as pending
+                # Set initial status as pending; queued for verification right below
                 form.instance.verification_status = 'pending'
+                form.instance.enqueued_at = timezone.now()
                 
                 # Save signature
                 signature = form.save()
@@ -174,14 +176,19 @@ class MySignaturesView(LoginRequiredMixin, ListView):
         return queryset.order_by('-created_at')
 
 
-class PetitionSignaturesView(ListView):
+class PetitionSignaturesView(CursorPaginationMixin, ListView):
     """
     View to list all signatures for a specific petition (for petition creator/admin).
+    
+    Paginated by cursor on (created_at, id), so deep pages of large petitions
+    cost the same as the first.
     """
     model = Signature
     template_name = 'signatures/petition_signatures.html'
     context_object_name = 'signatures'
     paginate_by = 50
+    # The exact totals are already in the statistics
+    cursor_estimate_count = False
     
     def dispatch(self, request, *args, **kwargs):
         """Get petition and check permissions."""
@@ -199,7 +206,7 @@ class PetitionSignaturesView(ListView):
         """Get signatures for this petition."""
         return Signature.objects.filter(
             petition=self.petition
-        ).order_by('-created_at')
+        ).order_by('-created_at', '-id')
     
     def get_context_data(self, **kwargs):
         """Add petition and statistics to context."""
@@ -207,19 +214,22 @@ class PetitionSignaturesView(ListView):
         context['petition'] = self.petition
         context['is_staff'] = self.request.user.is_staff
         
-        # Add statistics
+        # Add statistics (one aggregate query)
         signatures = self.get_queryset()
-        context['total_signatures'] = signatures.count()
-        context['approved_signatures'] = signatures.filter(verification_status='approved').count()
-        context['pending_signatures'] = signatures.filter(verification_status='pending').count()
-        context['rejected_signatures'] = signatures.filter(verification_status='rejected').count()
+        context.update(signatures.aggregate(
+            total_signatures=models.Count('id'),
+            approved_signatures=models.Count('id', filter=models.Q(verification_status='approved')),
+            pending_signatures=models.Count('id', filter=models.Q(verification_status='pending')),
+            rejected_signatures=models.Count('id', filter=models.Q(verification_status='rejected')),
+        ))
         
         # Signatures by state (only for staff)
         if self.request.user.is_staff:
-            context['signatures_by_state'] = signatures.values(
+            # Approved signatures, from the precomputed state/city counts
+            context['signatures_by_state'] = self.petition.geo_stats.values(
                 'state'
             ).annotate(
-                count=models.Count('id')
+                count=models.Sum('signature_count')
             ).order_by('-count')[:10]
         
         return context
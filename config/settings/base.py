@@ -191,11 +191,62 @@ GOOGLE_ANALYTICS_ENABLED = config('GOOGLE_ANALYTICS_ENABLED', default=True, cast
 PETITION_PDF_STORAGE_PATH = config('PETITION_PDF_STORAGE_PATH', default='petitions/pdfs/')
 SIGNATURE_PDF_STORAGE_PATH = config('SIGNATURE_PDF_STORAGE_PATH', default='signatures/pdfs/')
 
+# How long the homepage petition/category lists are served from the cache (seconds);
+# site statistics are cache counters kept current on every change
+HOME_PAGE_CACHE_SECONDS = config('HOME_PAGE_CACHE_SECONDS', default=60, cast=int)
+SITE_STATS_REFRESH_SECONDS = config('SITE_STATS_REFRESH_SECONDS', default=900, cast=int)
+
+# Lifetime of cached petition detail pages and fragments (seconds); edits and
+# signature approvals invalidate them earlier through per-petition version stamps
+PETITION_DETAIL_CACHE_SECONDS = config('PETITION_DETAIL_CACHE_SECONDS', default=300, cast=int)
+
+# Lifetime of cached petition search results (seconds); creating, editing or closing
+# a petition invalidates them earlier through a catalog version stamp
+PETITION_SEARCH_CACHE_SECONDS = config('PETITION_SEARCH_CACHE_SECONDS', default=300, cast=int)
+
+# Petition autocomplete: lifetime of cached suggestions (seconds) and the database
+# time allowed for a suggestion query before it is cancelled (milliseconds)
+PETITION_AUTOCOMPLETE_CACHE_SECONDS = config('PETITION_AUTOCOMPLETE_CACHE_SECONDS', default=300, cast=int)
+PETITION_AUTOCOMPLETE_BUDGET_MS = config('PETITION_AUTOCOMPLETE_BUDGET_MS', default=30, cast=int)
+
+# How often buffered petition view/share counts are written to the database (seconds)
+PETITION_COUNTER_FLUSH_SECONDS = config('PETITION_COUNTER_FLUSH_SECONDS', default=60, cast=int)
+
+# Buffer signature approvals in the cache and fold them into Petition.signature_count
+# periodically (needs the fold-signature-counts beat entry); otherwise fold on approval
+SIGNATURE_COUNT_BUFFERED = config('SIGNATURE_COUNT_BUFFERED', default=False, cast=bool)
+# How often buffered signature approvals are folded and milestones checked (seconds)
+SIGNATURE_COUNT_FOLD_SECONDS = config('SIGNATURE_COUNT_FOLD_SECONDS', default=10, cast=int)
+
 # Signature Verification Settings
 SIGNATURE_VERIFICATION_STRICT = config('SIGNATURE_VERIFICATION_STRICT', default=True, cast=bool)
 # If True: Reject signatures if revocation check fails
 # If False: Allow signatures if revocation check fails (log warning)
 
+# Verification scheduler (verify_pending_signatures): worker processes serving
+# verification batches (the CPU queue), and how often the scheduler runs (seconds)
+SIGNATURE_VERIFICATION_CONCURRENCY = config('SIGNATURE_VERIFICATION_CONCURRENCY', default=4, cast=int)
+SIGNATURE_VERIFICATION_SCHEDULE_SECONDS = config('SIGNATURE_VERIFICATION_SCHEDULE_SECONDS', default=60, cast=int)
+
+# Verification runs in two stages on separate queues: document checks (PDF
+# parsing, CMS, content) on the CPU queue, sized to the cores, and
+# certificate status (OCSP/CRL) on the I/O queue, where each batch task
+# runs SIGNATURE_VERIFICATION_IO_CONCURRENCY lookups in parallel
+SIGNATURE_VERIFICATION_CPU_QUEUE = config('SIGNATURE_VERIFICATION_CPU_QUEUE', default='signatures_cpu')
+SIGNATURE_VERIFICATION_IO_QUEUE = config('SIGNATURE_VERIFICATION_IO_QUEUE', default='signatures_io')
+SIGNATURE_VERIFICATION_IO_CONCURRENCY = config('SIGNATURE_VERIFICATION_IO_CONCURRENCY', default=16, cast=int)
+
+CELERY_TASK_ROUTES = {
+    'apps.signatures.tasks.verify_signature': {'queue': SIGNATURE_VERIFICATION_CPU_QUEUE},
+    'apps.signatures.tasks.verify_signature_batch': {'queue': SIGNATURE_VERIFICATION_CPU_QUEUE},
+    'apps.signatures.tasks.check_signature_status': {'queue': SIGNATURE_VERIFICATION_IO_QUEUE},
+    'apps.signatures.tasks.check_signature_status_batch': {'queue': SIGNATURE_VERIFICATION_IO_QUEUE},
+}
+
+# How long a verification result is reused for a resubmitted, byte-identical PDF
+# (seconds); a trust store change or CRL refresh invalidates results earlier
+SIGNATURE_VERIFICATION_RESULT_CACHE_SECONDS = config('SIGNATURE_VERIFICATION_RESULT_CACHE_SECONDS', default=3600, cast=int)
+
 # Rate Limiting
 RATELIMIT_ENABLE = True
 RATELIMIT_USE_CACHE = 'default'
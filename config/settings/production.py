@@ -211,12 +211,27 @@ CELERY_TASK_SOFT_TIME_LIMIT = 25 * 60  # 25 minutes
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
 CELERY_RESULT_EXPIRES = 3600  # 1 hour
 
+# Approvals are folded into signature_count by the fold-signature-counts beat entry
+SIGNATURE_COUNT_BUFFERED = config('SIGNATURE_COUNT_BUFFERED', default=True, cast=bool)
+
 # Celery Beat Schedule for periodic tasks
 from celery.schedules import crontab
 CELERY_BEAT_SCHEDULE = {
     'verify-pending-signatures': {
         'task': 'apps.signatures.tasks.verify_pending_signatures',
-        'schedule': crontab(minute='*/5'),  # Every 5 minutes
+        'schedule': SIGNATURE_VERIFICATION_SCHEDULE_SECONDS,  # Every minute by default
+    },
+    'refresh-site-stats': {
+        'task': 'apps.petitions.tasks.refresh_site_stats',
+        'schedule': SITE_STATS_REFRESH_SECONDS,  # Every 15 minutes by default
+    },
+    'fold-signature-counts': {
+        'task': 'apps.petitions.tasks.fold_signature_counts',
+        'schedule': SIGNATURE_COUNT_FOLD_SECONDS,  # Every 10 seconds by default
+    },
+    'flush-petition-counters': {
+        'task': 'apps.petitions.tasks.flush_petition_counters',
+        'schedule': PETITION_COUNTER_FLUSH_SECONDS,  # Every minute by default
     },
     'cleanup-expired-petitions': {
         'task': 'apps.petitions.tasks.cleanup_expired_petitions',
@@ -23,6 +23,22 @@ def disable_turnstile(settings):
     return settings
 
 
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    """Keep files saved by tests (custody certificates, bulk exports) out of the tree"""
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    return settings.MEDIA_ROOT
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Start every test with an empty cache (counters, cached pages and results)"""
+    from django.core.cache import cache
+    cache.clear()
+    yield
+    cache.clear()
+
+
 @pytest.fixture
 def user(db):
     """Create a test user"""
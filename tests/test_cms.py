@@ -0,0 +1,203 @@
+"""
+Tests for CMS signature verification over a PDF ByteRange.
+"""
+import pytest
+from datetime import datetime, timedelta
+from io import BytesIO
+from unittest.mock import Mock, patch
+
+from cryptography import x509
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from cryptography.hazmat.primitives.serialization import pkcs7
+from cryptography.x509.oid import NameOID
+
+from apps.signatures.cms import (
+    CMSError,
+    check_byte_range,
+    check_signed_revision,
+    digest_byte_ranges,
+    parse_signed_data,
+    verify_byte_range_signature,
+)
+from apps.signatures.verification_service import PDFSignatureVerifier
+
+CONTENTS_SIZE = 8192
+
+
+def _make_signer(key):
+    name = x509.Name([
+        x509.NameAttribute(NameOID.COUNTRY_NAME, "BR"),
+        x509.NameAttribute(NameOID.COMMON_NAME, "Assinante Teste"),
+    ])
+    cert = x509.CertificateBuilder().subject_name(
+        name
+    ).issuer_name(
+        name
+    ).public_key(
+        key.public_key()
+    ).serial_number(
+        x509.random_serial_number()
+    ).not_valid_before(
+        datetime.utcnow() - timedelta(days=1)
+    ).not_valid_after(
+        datetime.utcnow() + timedelta(days=365)
+    ).sign(key, hashes.SHA256(), default_backend())
+    return cert
+
+
+def _signed_pdf(key=None, options=()):
+    """
+    Build a PDF-shaped byte string with a detached CMS signature in /Contents.
+
+    Returns:
+        tuple: (pdf bytes, byte_range, cms der, signer certificate)
+    """
+    key = key or rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    cert = _make_signer(key)
+
+    head = b'%PDF-1.7\n1 0 obj\n<< /Type /Sig /Contents '
+    tail = b' >>\nendobj\nBT (peticao) Tj ET\n%%EOF\n'
+    gap = CONTENTS_SIZE * 2 + 2
+    byte_range = [0, len(head), len(head) + gap, len(tail)]
+
+    cms = pkcs7.PKCS7SignatureBuilder().set_data(
+        head + tail
+    ).add_signer(
+        cert, key, hashes.SHA256()
+    ).sign(serialization.Encoding.DER, [
+        pkcs7.PKCS7Options.DetachedSignature, pkcs7.PKCS7Options.Binary, *options
+    ])
+
+    contents = b'<' + cms.hex().encode().ljust(CONTENTS_SIZE * 2, b'0') + b'>'
+    return head + contents + tail, byte_range, cms, cert
+
+
+@pytest.mark.unit
+class TestCMSByteRangeVerification:
+    """Tests for parsing and verifying detached CMS signatures."""
+
+    def test_valid_rsa_signature(self):
+        pdf, byte_range, cms, cert = _signed_pdf()
+
+        result = verify_byte_range_signature(parse_signed_data(cms), pdf, byte_range)
+
+        assert result['certificate'] == cert
+        assert result['digest_algorithm'] == 'sha256'
+
+    def test_valid_ec_signature_without_signed_attributes(self):
+        key = ec.generate_private_key(ec.SECP256R1())
+        pdf, byte_range, cms, cert = _signed_pdf(key, [pkcs7.PKCS7Options.NoAttributes])
+
+        signed_data = parse_signed_data(cms)
+        assert signed_data.signer_infos[0].signed_attrs == b''
+        assert verify_byte_range_signature(signed_data, pdf, byte_range)['certificate'] == cert
+
+    def test_padded_contents_parse(self):
+        """/Contents is zero padded after the DER structure."""
+        _, _, cms, cert = _signed_pdf()
+
+        signed_data = parse_signed_data(cms + b'\x00' * 64)
+
+        assert signed_data.certificates == [cert]
+
+    def test_tampered_document_rejected(self):
+        pdf, byte_range, cms, _ = _signed_pdf()
+        tampered = pdf.replace(b'peticao', b'Peticao')
+
+        with pytest.raises(CMSError, match='messageDigest'):
+            verify_byte_range_signature(parse_signed_data(cms), tampered, byte_range)
+
+    def test_tampered_document_rejected_without_signed_attributes(self):
+        pdf, byte_range, cms, _ = _signed_pdf(options=[pkcs7.PKCS7Options.NoAttributes])
+        tampered = pdf.replace(b'peticao', b'Peticao')
+
+        with pytest.raises(CMSError, match='does not verify'):
+            verify_byte_range_signature(parse_signed_data(cms), tampered, byte_range)
+
+    def test_other_signer_certificate_rejected(self):
+        pdf, byte_range, cms, _ = _signed_pdf()
+        other = _make_signer(rsa.generate_private_key(public_exponent=65537, key_size=2048))
+
+        with pytest.raises(CMSError, match='not found'):
+            verify_byte_range_signature(parse_signed_data(cms), pdf, byte_range, [other])
+
+    def test_incremental_update_reported(self):
+        pdf, byte_range, cms, cert = _signed_pdf()
+        update = b'2 0 obj\n<< /Type /Annot >>\nendobj\n%%EOF\n'
+
+        result = verify_byte_range_signature(parse_signed_data(cms), pdf + update, byte_range)
+
+        assert result['certificate'] == cert
+        assert result['signed_size'] == len(pdf)
+        assert result['appended_bytes'] == len(update)
+
+    def test_bytes_after_incomplete_revision_rejected(self):
+        with pytest.raises(CMSError, match='modified after signing'):
+            check_signed_revision(b'%PDF-1.7\n1 0 obj\n% extra\n', 20)
+        check_signed_revision(b'%PDF-1.7\n%%EOF\n% extra\n', 15)
+
+    def test_byte_range_must_start_at_zero(self):
+        with pytest.raises(CMSError):
+            check_byte_range([10, 100, 200, 50], 250)
+
+    def test_garbage_is_not_signed_data(self):
+        with pytest.raises(CMSError):
+            parse_signed_data(bytes.fromhex('3082010a0282010100'))
+
+    def test_file_and_buffer_digests_match(self):
+        """Files are hashed in fixed-size reads, buffers through memoryview slices."""
+        pdf, byte_range, _, _ = _signed_pdf()
+
+        from_buffer = digest_byte_ranges(pdf, byte_range, 'sha256', chunk_size=1000)
+        from_file = digest_byte_ranges(BytesIO(pdf), byte_range, 'sha256', chunk_size=1000)
+
+        assert from_buffer == from_file
+
+
+@pytest.mark.unit
+class TestVerifierIntegrityStage:
+    """The verifier rejects PDFs whose signed bytes changed."""
+
+    def _verify(self, pdf, byte_range, cms, petition_uuid='peticao'):
+        sig_field = Mock()
+        sig_field.get_object.return_value = {
+            '/FT': '/Sig',
+            '/V': {'/Contents': Mock(original_bytes=cms), '/ByteRange': byte_range},
+        }
+        reader = Mock(trailer={'/Root': {'/AcroForm': {'/Fields': [sig_field]}}})
+
+        verifier = PDFSignatureVerifier()
+        with patch('apps.signatures.verification_service.PdfReader', return_value=reader), \
+                patch.object(verifier, '_extract_certificate_type', return_value=('CPF', '12345678901')), \
+                patch.object(verifier, '_verify_certificate_chain', return_value=False) as chain:
+            result = verifier.verify_pdf_signature(BytesIO(pdf), Mock(uuid=petition_uuid))
+        return result, chain
+
+    def test_intact_signature_reaches_chain_validation(self):
+        pdf, byte_range, cms, _ = _signed_pdf()
+
+        result, chain = self._verify(pdf, byte_range, cms)
+
+        chain.assert_called_once()
+        assert result['error'] == 'Certificado não pertence à cadeia ICP-Brasil'
+
+    def test_tampered_pdf_rejected_before_chain_validation(self):
+        pdf, byte_range, cms, _ = _signed_pdf()
+
+        result, chain = self._verify(pdf.replace(b'peticao', b'Peticao'), byte_range, cms)
+
+        chain.assert_not_called()
+        assert result['verified'] is False
+        assert 'documento foi alterado' in result['error']
+
+    def test_content_checked_on_signed_revision(self):
+        pdf, byte_range, cms, _ = _signed_pdf()
+        update = b'BT (outra-peticao) Tj ET\n%%EOF\n'
+
+        result, chain = self._verify(pdf + update, byte_range, cms, petition_uuid='outra-peticao')
+
+        chain.assert_not_called()
+        assert result['appended_bytes'] == len(update)
+        assert result['rejection_code'] == 'CONTENT_MISMATCH'
@@ -12,6 +12,14 @@ from apps.petitions.tasks import generate_bulk_download_package
 from tests.factories import SignatureFactory, PetitionFactory, UserFactory
 
 
+def _downloads(data):
+    """side_effect for _download_file: write ``data`` into the destination."""
+    def download(url, destination):
+        destination.write(data)
+        return True
+    return download
+
+
 @pytest.mark.integration
 @pytest.mark.django_db
 class TestCustodyIntegration:
@@ -198,7 +206,7 @@ class TestBulkDownloadIntegration:
             signatures.append(sig)
         
         # Mock file downloads
-        mock_download_file.return_value = b'PDF content'
+        mock_download_file.side_effect = _downloads(b'PDF content')
         
         # Generate bulk download - should not raise errors
         try:
@@ -263,6 +271,325 @@ class TestBulkDownloadIntegration:
         assert 'signed_pdfs/' in readme
         assert 'custody_certificates/' in readme
 
+    @patch('apps.petitions.tasks._download_file')
+    def test_bulk_download_streams_zip_to_storage(self, mock_download_file, tmp_path):
+        """Test ZIP is streamed through a spooled file and uploaded intact"""
+        import zipfile
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import FileSystemStorage
+
+        storage = FileSystemStorage(location=str(tmp_path), base_url='/media/')
+        mock_download_file.side_effect = _downloads(b'%PDF-1.4 downloaded')
+
+        creator = UserFactory(email='creator@example.com')
+        petition = PetitionFactory(creator=creator)
+
+        local_sig = SignatureFactory(
+            petition=petition,
+            verification_status=Signature.STATUS_APPROVED,
+            verified_at=timezone.now(),
+        )
+        local_sig.signed_pdf.save('local.pdf', ContentFile(b'%PDF-1.4 local' * 1000))
+
+        SignatureFactory(
+            petition=petition,
+            verification_status=Signature.STATUS_APPROVED,
+            verified_at=timezone.now(),
+            signed_pdf_url='https://s3.amazonaws.com/remote.pdf',
+        )
+
+        # Force the spool to disk to exercise the large-package path
+        with patch('apps.petitions.tasks.BULK_DOWNLOAD_STORAGE', storage), \
+                patch('apps.petitions.tasks.BULK_DOWNLOAD_SPOOL_MAX_SIZE', 1024):
+            result = generate_bulk_download_package(
+                petition_id=petition.id,
+                user_id=creator.id,
+                user_email=creator.email
+            )
+
+        assert result['success'] is True
+        assert result['signature_count'] == 2
+
+        saved = list((tmp_path / 'bulk_downloads').iterdir())
+        assert len(saved) == 1
+        assert saved[0].stat().st_size == result['zip_size_bytes']
+
+        with zipfile.ZipFile(saved[0]) as archive:
+            names = archive.namelist()
+            assert 'MANIFEST.csv' in names
+            assert 'README.txt' in names
+            signed = sorted(n for n in names if n.startswith('signed_pdfs/'))
+            assert len(signed) == 2
+            assert archive.read(signed[0]) == b'%PDF-1.4 local' * 1000
+            assert archive.read(signed[1]) == b'%PDF-1.4 downloaded'
+            manifest = archive.read('MANIFEST.csv').decode('utf-8')
+            assert str(local_sig.uuid) in manifest
+
+        assert result['throughput']['files_fetched'] == 2
+        assert result['throughput']['bytes_fetched'] == (
+            len(b'%PDF-1.4 local' * 1000) + len(b'%PDF-1.4 downloaded')
+        )
+        assert len(mail.outbox) == 1
+
+    @patch('apps.petitions.tasks._download_file')
+    def test_bulk_download_delta_reuses_previous_parts(self, mock_download_file, tmp_path):
+        """Test delta export packages only new signatures and reuses stored parts"""
+        import zipfile
+        from datetime import timedelta
+        from django.core.files.storage import FileSystemStorage
+        from apps.petitions.models import BulkDownloadChunk
+
+        storage = FileSystemStorage(location=str(tmp_path), base_url='/media/')
+        mock_download_file.side_effect = _downloads(b'%PDF-1.4 downloaded')
+
+        creator = UserFactory(email='creator@example.com')
+        petition = PetitionFactory(creator=creator)
+        base_time = timezone.now() - timedelta(hours=2)
+
+        old_sigs = [
+            SignatureFactory(
+                petition=petition,
+                verification_status=Signature.STATUS_APPROVED,
+                verified_at=base_time + timedelta(minutes=i),
+                signed_pdf_url=f'https://s3.amazonaws.com/old_{i}.pdf',
+            )
+            for i in range(2)
+        ]
+
+        with patch('apps.petitions.tasks.BULK_DOWNLOAD_STORAGE', storage):
+            first = generate_bulk_download_package(
+                petition_id=petition.id,
+                user_id=creator.id,
+                user_email=creator.email
+            )
+
+            new_sig = SignatureFactory(
+                petition=petition,
+                verification_status=Signature.STATUS_APPROVED,
+                verified_at=base_time + timedelta(hours=1),
+                signed_pdf_url='https://s3.amazonaws.com/new.pdf',
+            )
+            mock_download_file.reset_mock()
+
+            second = generate_bulk_download_package(
+                petition_id=petition.id,
+                user_id=creator.id,
+                user_email=creator.email,
+                delta=True
+            )
+
+        assert first['new_signature_count'] == 2
+        assert second['signature_count'] == 3
+        assert second['new_signature_count'] == 1
+        assert second['part_count'] == 2
+        # Only the new signature's files were fetched
+        assert mock_download_file.call_count == 1
+
+        chunks = list(BulkDownloadChunk.objects.filter(petition=petition))
+        assert [c.sequence for c in chunks] == [1, 2]
+        assert chunks[1].last_signature_id == new_sig.id
+
+        with zipfile.ZipFile(storage.path(chunks[1].file_path)) as archive:
+            signed = [n for n in archive.namelist() if n.startswith('signed_pdfs/')]
+            assert signed == [f'signed_pdfs/0003_signed_{new_sig.uuid}.pdf']
+            # Manifest is cumulative
+            manifest = archive.read('MANIFEST.csv').decode('utf-8')
+            for sig in old_sigs + [new_sig]:
+                assert str(sig.uuid) in manifest
+
+        assert len(mail.outbox) == 2
+        assert 'Parte 2' in mail.outbox[1].alternatives[0][0]
+
+    @patch('apps.petitions.tasks._download_file')
+    def test_bulk_download_delta_includes_late_committed_signature(self, mock_download_file, tmp_path):
+        """Test a delta picks up an approval committed after a later one was packaged"""
+        import zipfile
+        from datetime import timedelta
+        from django.core.files.storage import FileSystemStorage
+        from apps.petitions.models import BulkDownloadChunk
+
+        storage = FileSystemStorage(location=str(tmp_path), base_url='/media/')
+        mock_download_file.side_effect = _downloads(b'%PDF-1.4 downloaded')
+
+        creator = UserFactory(email='creator@example.com')
+        petition = PetitionFactory(creator=creator)
+        base_time = timezone.now() - timedelta(hours=2)
+        packaged = [
+            SignatureFactory(
+                petition=petition,
+                verification_status=Signature.STATUS_APPROVED,
+                verified_at=base_time + timedelta(minutes=i * 10),
+                signed_pdf_url=f'https://s3.amazonaws.com/packaged_{i}.pdf',
+            )
+            for i in range(2)
+        ]
+
+        with patch('apps.petitions.tasks.BULK_DOWNLOAD_STORAGE', storage):
+            generate_bulk_download_package(
+                petition_id=petition.id,
+                user_id=creator.id,
+                user_email=creator.email
+            )
+
+            # Stamped before the last packaged row, committed after the export
+            late_sig = SignatureFactory(
+                petition=petition,
+                verification_status=Signature.STATUS_APPROVED,
+                verified_at=base_time + timedelta(minutes=5),
+                signed_pdf_url='https://s3.amazonaws.com/late.pdf',
+            )
+            mock_download_file.reset_mock()
+
+            result = generate_bulk_download_package(
+                petition_id=petition.id,
+                user_id=creator.id,
+                user_email=creator.email,
+                delta=True
+            )
+
+        assert result['new_signature_count'] == 1
+        assert mock_download_file.call_count == 1
+
+        chunks = list(BulkDownloadChunk.objects.filter(petition=petition))
+        assert chunks[0].recent_signature_ids == [sig.id for sig in packaged]
+        assert chunks[1].recent_signature_ids == [late_sig.id]
+        with zipfile.ZipFile(storage.path(chunks[1].file_path)) as archive:
+            signed = [n for n in archive.namelist() if n.startswith('signed_pdfs/')]
+            assert signed == [f'signed_pdfs/0003_signed_{late_sig.uuid}.pdf']
+
+    @patch('apps.petitions.tasks._download_file')
+    def test_bulk_download_full_export_replaces_previous_parts(self, mock_download_file, tmp_path):
+        """Test a full export deletes the superseded parts and their ZIPs"""
+        from django.core.files.storage import FileSystemStorage
+        from apps.petitions.models import BulkDownloadChunk
+
+        storage = FileSystemStorage(location=str(tmp_path), base_url='/media/')
+        mock_download_file.side_effect = _downloads(b'%PDF-1.4 downloaded')
+
+        creator = UserFactory(email='creator@example.com')
+        petition = PetitionFactory(creator=creator)
+        SignatureFactory(
+            petition=petition,
+            verification_status=Signature.STATUS_APPROVED,
+            verified_at=timezone.now(),
+            signed_pdf_url='https://s3.amazonaws.com/signed.pdf',
+        )
+
+        with patch('apps.petitions.tasks.BULK_DOWNLOAD_STORAGE', storage):
+            for _ in range(2):
+                generate_bulk_download_package(
+                    petition_id=petition.id,
+                    user_id=creator.id,
+                    user_email=creator.email
+                )
+
+        chunk = BulkDownloadChunk.objects.get(petition=petition)
+        assert chunk.sequence == 1
+        assert [p.name for p in (tmp_path / 'bulk_downloads').iterdir()] == [
+            chunk.file_path.split('/')[-1]
+        ]
+
+    @patch('apps.petitions.tasks._download_file')
+    def test_bulk_download_delta_discarded_on_concurrent_part(self, mock_download_file, tmp_path):
+        """Test a delta part is not recorded over a part added while it was built"""
+        from datetime import timedelta
+        from django.core.files.storage import FileSystemStorage
+        from apps.petitions.models import BulkDownloadChunk
+        from apps.petitions import tasks
+
+        storage = FileSystemStorage(location=str(tmp_path), base_url='/media/')
+        mock_download_file.side_effect = _downloads(b'%PDF-1.4 downloaded')
+
+        creator = UserFactory(email='creator@example.com')
+        petition = PetitionFactory(creator=creator)
+        base_time = timezone.now() - timedelta(hours=2)
+        signature = SignatureFactory(
+            petition=petition,
+            verification_status=Signature.STATUS_APPROVED,
+            verified_at=base_time,
+            signed_pdf_url='https://s3.amazonaws.com/old.pdf',
+        )
+
+        write_zip = tasks._write_bulk_download_zip
+
+        def write_zip_racing(*args, **kwargs):
+            # A concurrent delta records part 2 first
+            BulkDownloadChunk.objects.create(
+                petition=petition, sequence=2, file_path='bulk_downloads/other.zip',
+                last_verified_at=signature.verified_at, last_signature_id=signature.id,
+            )
+            return write_zip(*args, **kwargs)
+
+        with patch('apps.petitions.tasks.BULK_DOWNLOAD_STORAGE', storage):
+            generate_bulk_download_package(
+                petition_id=petition.id,
+                user_id=creator.id,
+                user_email=creator.email
+            )
+            SignatureFactory(
+                petition=petition,
+                verification_status=Signature.STATUS_APPROVED,
+                verified_at=base_time + timedelta(hours=1),
+                signed_pdf_url='https://s3.amazonaws.com/new.pdf',
+            )
+            with patch('apps.petitions.tasks._write_bulk_download_zip', write_zip_racing), \
+                    pytest.raises(Exception):
+                generate_bulk_download_package(
+                    petition_id=petition.id,
+                    user_id=creator.id,
+                    user_email=creator.email,
+                    delta=True
+                )
+
+        assert list(
+            BulkDownloadChunk.objects.filter(petition=petition).values_list('file_path', flat=True)
+        )[1] == 'bulk_downloads/other.zip'
+        assert len(list((tmp_path / 'bulk_downloads').iterdir())) == 1
+
+    def test_prefetch_preserves_order_with_bounded_read_ahead(self):
+        """Test prefetched fetches are yielded in input order"""
+        import threading
+        import time
+        from apps.petitions.tasks import _iter_prefetched
+
+        lock = threading.Lock()
+        state = {'started': 0, 'max_ahead': 0}
+        consumed = []
+
+        def fetch(item):
+            with lock:
+                state['started'] += 1
+                state['max_ahead'] = max(state['max_ahead'], state['started'] - len(consumed))
+            # Later items finish first
+            time.sleep((10 - item) * 0.001)
+            return item * 2
+
+        for item, future in _iter_prefetched(range(10), fetch, workers=4, depth=3):
+            consumed.append(item)
+            assert future.result() == item * 2
+
+        assert consumed == list(range(10))
+        assert state['max_ahead'] <= 3
+
+    def test_prefetched_files_spill_to_disk(self):
+        """Test large PDFs are spooled to disk instead of held in memory"""
+        from django.core.files.base import ContentFile
+        from apps.petitions.tasks import _fetch_signature_files
+
+        signature = SignatureFactory(verification_status=Signature.STATUS_APPROVED)
+        signature.signed_pdf.save('large.pdf', ContentFile(b'%PDF-1.4 large' * 1000))
+
+        with patch('apps.petitions.tasks.BULK_DOWNLOAD_FILE_SPOOL_SIZE', 1024):
+            fetched = _fetch_signature_files(signature)
+
+        spool = fetched['files']['signed']
+        try:
+            assert spool._rolled
+            assert fetched['sizes']['signed'] == len(b'%PDF-1.4 large' * 1000)
+            assert spool.read() == b'%PDF-1.4 large' * 1000
+        finally:
+            spool.close()
+
 
 @pytest.mark.integration
 @pytest.mark.django_db
@@ -432,7 +759,7 @@ class TestCertificateEmailNotifications:
         # Mock S3
         mock_save.return_value = 'bulk_downloads/test.zip'
         mock_url.return_value = 'https://s3.amazonaws.com/bulk.zip'
-        mock_download.return_value = b'PDF content'
+        mock_download.side_effect = _downloads(b'PDF content')
         
         creator = UserFactory(email='creator@example.com')
         petition = PetitionFactory(creator=creator)
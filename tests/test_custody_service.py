@@ -75,7 +75,26 @@ class TestCustodyService:
             assert 'step' in step
             assert 'status' in step
             assert 'timestamp' in step
-    
+
+    def test_build_verification_evidence_stage_timings(self, approved_signature):
+        """Test recorded stage timings date the verification steps"""
+        stage_timings = {
+            'chain': {'started_at': '2026-01-01T10:00:01+00:00', 'duration_ms': 12.5},
+            'revocation': {'started_at': '2026-01-01T10:00:02+00:00', 'duration_ms': 80.0, 'method': 'OCSP'},
+        }
+
+        evidence = build_verification_evidence(approved_signature, {'stage_timings': stage_timings})
+        steps = {step['step']: step for step in evidence['verification_steps']}
+
+        assert evidence['metadata']['stage_timings'] == stage_timings
+        assert steps['certificate_chain_validation']['timestamp'] == '2026-01-01T10:00:01+00:00'
+        assert steps['revocation_check']['timestamp'] == '2026-01-01T10:00:02+00:00'
+        # Steps without a recorded stage keep the processing timestamps
+        assert steps['file_validation']['timestamp'] == (
+            approved_signature.processing_started_at.isoformat()
+            if approved_signature.processing_started_at else None
+        )
+
     def test_calculate_verification_hash_deterministic(self):
         """Test hash calculation is deterministic"""
         evidence = {
@@ -167,6 +167,25 @@ class TestSignatureForm:
         # Should fail due to duplicate CPF
         assert not form.is_valid() or 'cpf' in form.errors
     
+    def test_resubmitted_pdf_same_petition(self, petition, signature, mock_pdf_file):
+        """Test a PDF already uploaded for the petition is left to verification"""
+        from apps.core.validators import calculate_file_hash
+        signature.file_hash = calculate_file_hash(mock_pdf_file)
+        signature.save(update_fields=['file_hash'])
+        data = {
+            'full_name': 'João Silva',
+            'cpf': '12345678909',
+            'email': 'joao@example.com',
+            'city': 'São Paulo',
+            'state': 'SP',
+            'accept_terms': True,
+        }
+        
+        form = SignatureSubmissionForm(data=data, files={'signed_pdf': mock_pdf_file}, petition=petition)
+        form.is_valid()
+        assert 'signed_pdf' not in form.errors
+        assert form.cleaned_data['file_hash'] == signature.file_hash
+    
     def test_invalid_email(self, petition):
         """Test form rejects invalid email"""
         data = {
@@ -164,3 +164,70 @@ class TestScalability:
         # Should calculate metrics efficiently
         assert petition.signature_count == 1000
         assert petition.progress_percentage <= 100
+
+
+@pytest.mark.performance
+class TestSignatureVerificationBenchmark:
+    """Test the offline signature verification benchmark"""
+    
+    def test_synthetic_pdf_passes_verification(self):
+        """Test synthetic signed PDFs are accepted by the real verifier"""
+        from io import BytesIO
+        from unittest.mock import Mock
+        from apps.signatures.benchmark import BenchmarkCA, build_signed_pdf
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        from apps.signatures.verification_service import PDFSignatureVerifier
+        
+        ca = BenchmarkCA()
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        pdf = build_signed_pdf('Peticao abc-123', key, ca.issue(key.public_key(), '12345678901'), [ca.certificate])
+        
+        result = PDFSignatureVerifier().verify_pdf_signature(
+            BytesIO(pdf), Mock(uuid='abc-123'), check_status=False
+        )
+        
+        assert result['error'] is None
+        assert result['status_check']['certificate_info']['certificate_type'] == 'CPF'
+        
+        # Any change to the signed bytes is caught
+        tampered = PDFSignatureVerifier().verify_pdf_signature(
+            BytesIO(pdf.replace(b'abc-123', b'abc-124')), Mock(uuid='abc-124'), check_status=False
+        )
+        assert tampered['rejection_code'] == 'SIGNATURE_INVALID'
+    
+    @pytest.mark.parametrize('revocation', ['crl', 'ocsp'])
+    def test_benchmark_report(self, revocation):
+        """Test the benchmark measures every stage offline"""
+        from apps.signatures.benchmark import run_benchmark
+        
+        report = run_benchmark(iterations=3, warmup=1, revocation=revocation, custody=(revocation == 'crl'))
+        
+        assert report['throughput']['verifications_per_second'] > 0
+        assert report['stages']['total']['count'] == 3
+        assert f'revocation:{"cached_crl" if revocation == "crl" else "ocsp"}' in report['stages']
+        assert {'parse', 'integrity', 'chain'} <= set(report['stages'])
+        assert report['ocsp_requests'] == (4 if revocation == 'ocsp' else 0)
+        if revocation == 'crl':
+            assert report['stages']['custody']['count'] == 3
+    
+    def test_compare_reports_flags_regressions(self):
+        """Test regressions beyond the tolerance are reported"""
+        from apps.signatures.benchmark import compare_reports
+        
+        baseline = {
+            'throughput': {'verifications_per_second': 40.0},
+            'stages': {'parse': {'p95_ms': 20.0}, 'read': {'p95_ms': 0.01}},
+            'peak_rss_kb': {'verification': 100000},
+        }
+        current = {
+            'throughput': {'verifications_per_second': 20.0},
+            'stages': {'parse': {'p95_ms': 30.0}, 'read': {'p95_ms': 0.1}},
+            'peak_rss_kb': {'verification': 110000},
+        }
+        
+        regressions = compare_reports(baseline, current, tolerance=0.25)
+        
+        assert len(regressions) == 2
+        assert regressions[0].startswith('verifications_per_second')
+        assert regressions[1].startswith('parse p95')
+        assert compare_reports(baseline, baseline) == []
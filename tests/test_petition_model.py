@@ -4,6 +4,7 @@ Unit tests for Petition model
 import pytest
 from django.utils import timezone
 from datetime import timedelta
+from apps.petitions.counters import flush_counters, fold_signature_counts
 from apps.petitions.models import Petition
 from tests.factories import PetitionFactory, UserFactory, CategoryFactory
 
@@ -91,6 +92,7 @@ class TestPetitionModel:
         initial_count = petition.view_count
         
         petition.increment_view_count()
+        flush_counters()
         petition.refresh_from_db()
         
         assert petition.view_count == initial_count + 1
@@ -158,3 +160,267 @@ class TestPetitionModel:
                 city="Rio de Janeiro",
                 state="RJ"
             )
+
+    def test_save_is_a_single_update(self, django_assert_num_queries):
+        """Test saving a loaded petition neither re-reads it nor writes the search vector"""
+        petition = Petition.objects.get(pk=PetitionFactory().pk)
+        petition.moderation_notes = "Revisada"
+
+        with django_assert_num_queries(1):
+            petition.save()
+
+    def test_status_change_detected_from_loaded_row(self):
+        """Test the homepage counter follows status changes of fetched petitions"""
+        from apps.petitions.site_stats import get_site_stats
+
+        petition = PetitionFactory(status=Petition.STATUS_ACTIVE)
+        assert get_site_stats()['total_petitions'] == 1
+
+        loaded = Petition.objects.get(pk=petition.pk)
+        loaded.status = Petition.STATUS_CLOSED
+        loaded.save()
+        loaded.save()
+
+        assert get_site_stats()['total_petitions'] == 0
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+class TestSiteStats:
+    """Test the cached homepage statistics"""
+    
+    def test_stats_computed_in_one_query(self, django_assert_num_queries):
+        """Test a cold read aggregates instead of loading petitions"""
+        from django.core.cache import cache
+        from apps.petitions.site_stats import get_site_stats
+        
+        PetitionFactory(status=Petition.STATUS_ACTIVE, signature_count=5)
+        PetitionFactory(status=Petition.STATUS_CLOSED, signature_count=7)
+        cache.clear()
+        
+        with django_assert_num_queries(1):
+            stats = get_site_stats()
+        with django_assert_num_queries(0):
+            assert get_site_stats() == stats
+        
+        assert stats == {'total_petitions': 1, 'total_signatures': 12}
+    
+    def test_counters_follow_signatures_and_status(self, django_assert_num_queries):
+        """Test counters are adjusted without recomputing"""
+        from apps.petitions.site_stats import get_site_stats
+        
+        petition = PetitionFactory(status=Petition.STATUS_ACTIVE, signature_count=0, signature_goal=100)
+        assert get_site_stats() == {'total_petitions': 1, 'total_signatures': 0}
+        
+        petition.increment_signature_count(3)
+        PetitionFactory(status=Petition.STATUS_DRAFT)
+        petition.status = Petition.STATUS_CLOSED
+        petition.save()
+        
+        with django_assert_num_queries(0):
+            assert get_site_stats() == {'total_petitions': 0, 'total_signatures': 3}
+    
+    def test_periodic_refresh_fixes_drift(self):
+        """Test the refresh task folds in bulk updates"""
+        from apps.petitions.site_stats import get_site_stats
+        from apps.petitions.tasks import refresh_site_stats
+        from apps.signatures.models import Signature
+        from tests.factories import SignatureFactory
+        
+        petition = PetitionFactory(status=Petition.STATUS_ACTIVE, signature_count=0)
+        get_site_stats()
+        # Approved without going through Signature.approve (e.g. lost buffered approvals)
+        SignatureFactory.create_batch(4, petition=petition, verification_status=Signature.STATUS_APPROVED)
+        
+        refresh_site_stats()
+        
+        assert get_site_stats() == {'total_petitions': 1, 'total_signatures': 4}
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+class TestBufferedCounters:
+    """Test view/share/signature counts buffered in the cache"""
+    
+    def test_increments_do_not_write(self, django_assert_num_queries):
+        """Test counting a view or share runs no query"""
+        petition = PetitionFactory(view_count=5, share_count=1)
+        
+        with django_assert_num_queries(0):
+            petition.increment_view_count()
+            petition.increment_view_count()
+            assert petition.increment_share_count() == 1
+        
+        petition.refresh_from_db()
+        assert (petition.view_count, petition.share_count) == (5, 1)
+    
+    def test_flush_writes_in_one_update(self, django_assert_num_queries):
+        """Test a flush applies every pending count with a single UPDATE"""
+        first = PetitionFactory(view_count=0, share_count=0)
+        second = PetitionFactory(view_count=10, share_count=0)
+        for _ in range(3):
+            first.increment_view_count()
+        second.increment_view_count()
+        second.increment_share_count()
+        
+        with django_assert_num_queries(1):
+            totals = flush_counters()
+        
+        assert totals == {'petitions': 2, 'view_count': 4, 'share_count': 1}
+        first.refresh_from_db()
+        second.refresh_from_db()
+        assert (first.view_count, first.share_count) == (3, 0)
+        assert (second.view_count, second.share_count) == (11, 1)
+    
+    def test_flush_is_not_repeated(self):
+        """Test flushed counts are not applied twice"""
+        from apps.petitions.tasks import flush_petition_counters
+        
+        petition = PetitionFactory(view_count=0)
+        petition.increment_view_count()
+        
+        flush_petition_counters()
+        petition.increment_view_count()
+        assert flush_petition_counters()['view_count'] == 1
+        
+        petition.refresh_from_db()
+        assert petition.view_count == 2
+    
+    def test_failed_update_keeps_counts(self):
+        """Test a failed flush leaves the counts pending"""
+        from unittest.mock import patch
+        from apps.petitions.counters import get_pending
+        
+        petition = PetitionFactory(view_count=0)
+        petition.increment_view_count()
+        
+        with patch('django.db.models.query.QuerySet.update', side_effect=RuntimeError('db down')):
+            with pytest.raises(RuntimeError):
+                flush_counters()
+        
+        assert get_pending('view_count', petition.pk) == 1
+        assert flush_counters()['view_count'] == 1
+    
+    def test_flush_reads_only_dirty_petitions(self, django_assert_num_queries):
+        """Test a flush leaves petitions without pending counts alone"""
+        PetitionFactory.create_batch(3)
+        petition = PetitionFactory(view_count=0)
+        petition.increment_view_count()
+        flush_counters()
+        
+        with django_assert_num_queries(0):
+            assert flush_counters() == {'petitions': 0, 'view_count': 0, 'share_count': 0}
+        
+        petition.increment_view_count()
+        assert flush_counters()['view_count'] == 1
+    
+    def test_missed_dirty_slot_is_logged_again(self):
+        """Test a petition whose dirty slot was lost is flushed once its marker expires"""
+        from django.core.cache import cache
+        from apps.petitions.counters import COUNTERS_PREFIX
+        
+        petition = PetitionFactory(view_count=0)
+        petition.increment_view_count()
+        cache.delete(f'{COUNTERS_PREFIX}:view_count:dirty:1')
+        assert flush_counters()['view_count'] == 0
+        
+        cache.delete(f'{COUNTERS_PREFIX}:view_count:dirty:pk:{petition.pk}')
+        petition.increment_view_count()
+        assert flush_counters()['view_count'] == 2
+    
+    def test_signature_approvals_do_not_write(self, settings, django_assert_num_queries):
+        """Test counting approvals leaves the petition row alone"""
+        settings.SIGNATURE_COUNT_BUFFERED = True
+        petition = PetitionFactory(signature_count=0)
+        
+        with django_assert_num_queries(0):
+            petition.increment_signature_count()
+            assert petition.increment_signature_count(2) == 3
+    
+    def test_fold_checks_milestones_once(self, settings):
+        """Test milestones are detected on the folded count"""
+        from unittest.mock import patch
+        from apps.petitions.tasks import fold_signature_counts as fold_task
+        
+        settings.SIGNATURE_COUNT_BUFFERED = True
+        petition = PetitionFactory(signature_count=20, signature_goal=100)
+        for _ in range(35):
+            petition.increment_signature_count()
+        
+        with patch('apps.core.tasks.send_milestone_notification.delay') as notify:
+            assert fold_task() == {'petitions': 1, 'signatures': 35}
+            petition.increment_signature_count()
+            fold_task()
+        
+        assert [call.args for call in notify.call_args_list] == [(petition.id, 25), (petition.id, 50)]
+        petition.refresh_from_db()
+        assert petition.signature_count == 56
+    
+    def test_fold_reports_counts_before_and_after(self, settings):
+        """Test the fold returns each changed petition's old and new count"""
+        settings.SIGNATURE_COUNT_BUFFERED = True
+        changed = PetitionFactory(signature_count=4)
+        PetitionFactory(signature_count=9)
+        changed.increment_signature_count(3)
+        
+        assert fold_signature_counts() == {changed.pk: (4, 7)}
+        assert fold_signature_counts() == {}
+    
+    def test_reconcile_restores_lost_approvals(self, settings):
+        """Test signature counts are recomputed from approved signatures"""
+        from django.core.cache import cache
+        from apps.petitions.counters import reconcile_signature_counts
+        from apps.signatures.models import Signature
+        from tests.factories import SignatureFactory
+        
+        settings.SIGNATURE_COUNT_BUFFERED = True
+        petition = PetitionFactory(signature_count=0)
+        SignatureFactory.create_batch(3, petition=petition, verification_status=Signature.STATUS_APPROVED)
+        petition.increment_signature_count(2)
+        
+        # One approval still pending is left to the fold
+        assert reconcile_signature_counts() == {petition.pk: (0, 1)}
+        
+        cache.clear()
+        assert reconcile_signature_counts() == {petition.pk: (1, 3)}
+        assert reconcile_signature_counts() == {}
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+class TestGeoStats:
+    """Test the precomputed state/city signature counts"""
+    
+    def test_approval_counts_state_and_city(self):
+        """Test approving signatures updates their city's row"""
+        from apps.petitions.models import PetitionGeoStat
+        from tests.factories import SignatureFactory
+        
+        petition = PetitionFactory()
+        for city in ('Campinas', 'Campinas ', 'Santos'):
+            SignatureFactory(petition=petition, state='SP', city=city).approve()
+        SignatureFactory(petition=petition, state='RJ', city='Niterói')
+        
+        rows = PetitionGeoStat.objects.filter(petition=petition)
+        assert set(rows.values_list('state', 'city', 'signature_count')) == {
+            ('SP', 'Campinas', 2), ('SP', 'Santos', 1),
+        }
+    
+    def test_rebuild_matches_approved_signatures(self):
+        """Test a rebuild replaces drifted counts"""
+        from apps.petitions.geo_stats import rebuild_geo_stats
+        from apps.petitions.models import PetitionGeoStat
+        from apps.signatures.models import Signature
+        from tests.factories import SignatureFactory
+        
+        petition = PetitionFactory()
+        other = PetitionFactory()
+        SignatureFactory.create_batch(3, petition=petition, state='MG', city='Uberaba',
+                                      verification_status=Signature.STATUS_APPROVED)
+        PetitionGeoStat.objects.create(petition=petition, state='BA', city='Salvador', signature_count=7)
+        PetitionGeoStat.objects.create(petition=other, state='BA', city='Salvador', signature_count=7)
+        
+        assert rebuild_geo_stats([petition.pk]) == 1
+        
+        assert list(petition.geo_stats.values_list('state', 'city', 'signature_count')) == [('MG', 'Uberaba', 3)]
+        assert other.geo_stats.get().signature_count == 7
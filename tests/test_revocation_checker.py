@@ -11,6 +11,7 @@ from cryptography.hazmat.primitives.asymmetric import rsa
 from cryptography.x509.oid import NameOID, ExtensionOID
 from django.core.cache import cache
 
+from apps.signatures.crl_index import clear_local_cache
 from apps.signatures.revocation_checker import (
     CertificateRevocationChecker,
     RevocationCheckError,
@@ -63,6 +64,7 @@ class TestCertificateRevocationChecker:
     def setup_method(self):
         """Clear cache before each test."""
         cache.clear()
+        clear_local_cache()
     
     def test_cached_crl_check_not_revoked(self, mock_certificate, mock_issuer_certificate):
         """Test cached CRL check for non-revoked certificate."""
@@ -222,6 +224,385 @@ class TestCertificateRevocationChecker:
         pass
 
 
+_CRL_SIGNING_KEY = rsa.generate_private_key(
+    public_exponent=65537,
+    key_size=2048,
+    backend=default_backend()
+)
+
+
+def _build_crl(revoked_serials, number=None, delta_base=None, freshest_url=None,
+               reason=x509.ReasonFlags.key_compromise):
+    """Build a signed CRL (or delta CRL, with ``delta_base``) revoking ``revoked_serials``."""
+    now = datetime.utcnow()
+    builder = x509.CertificateRevocationListBuilder().issuer_name(
+        x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "AC Test")])
+    ).last_update(
+        now
+    ).next_update(
+        now + timedelta(days=1)
+    )
+    if number is not None:
+        builder = builder.add_extension(x509.CRLNumber(number), critical=False)
+    if delta_base is not None:
+        builder = builder.add_extension(x509.DeltaCRLIndicator(delta_base), critical=True)
+    if freshest_url is not None:
+        builder = builder.add_extension(x509.FreshestCRL([
+            x509.DistributionPoint(
+                full_name=[x509.UniformResourceIdentifier(freshest_url)],
+                relative_name=None, reasons=None, crl_issuer=None,
+            )
+        ]), critical=False)
+    for serial in revoked_serials:
+        builder = builder.add_revoked_certificate(
+            x509.RevokedCertificateBuilder().serial_number(
+                serial
+            ).revocation_date(
+                now
+            ).add_extension(
+                x509.CRLReason(reason), critical=False
+            ).build(default_backend())
+        )
+    return builder.sign(_CRL_SIGNING_KEY, hashes.SHA256(), default_backend())
+
+
+def _crl_response(crl=None, status_code=200, headers=None):
+    from cryptography.hazmat.primitives import serialization
+    
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    if crl is not None:
+        response.content = crl.public_bytes(serialization.Encoding.DER)
+    return response
+
+
+@pytest.mark.unit
+class TestCRLIndex:
+    """Test the bucketed revoked-serial index."""
+    
+    def setup_method(self):
+        cache.clear()
+        clear_local_cache()
+    
+    def test_lookup_revoked_and_good_serials(self):
+        from apps.signatures import crl_index
+        
+        serials = list(range(1000, 1300))
+        meta = crl_index.store_crl_index('AC-Test', _build_crl(serials))
+        
+        assert meta['count'] == 300
+        assert meta['buckets'] == 5
+        
+        found_meta, details = crl_index.lookup_serial('AC-Test', 1150)
+        assert found_meta['generation'] == meta['generation']
+        assert details['reason'] == 'ReasonFlags.key_compromise'
+        
+        _, details = crl_index.lookup_serial('AC-Test', 999)
+        assert details is None
+    
+    def test_lookup_without_cached_crl(self):
+        from apps.signatures import crl_index
+        
+        assert crl_index.lookup_serial('AC-Missing', 1) is None
+    
+    def test_lookup_reads_single_bucket(self):
+        from apps.signatures import crl_index
+        
+        crl_index.store_crl_index('AC-Test', _build_crl(range(1, 1000)))
+        
+        with patch('apps.signatures.crl_index.cache.get', wraps=cache.get) as mock_get:
+            crl_index.lookup_serial('AC-Test', 500)
+        
+        # Version stamp, meta entry and exactly one bucket
+        assert mock_get.call_count == 3
+    
+    def test_repeat_lookups_served_in_process(self):
+        from apps.signatures import crl_index
+        
+        crl_index.store_crl_index('AC-Test', _build_crl([7]))
+        crl_index.lookup_serial('AC-Test', 7)
+        
+        with patch('apps.signatures.crl_index.cache.get', wraps=cache.get) as mock_get:
+            assert crl_index.lookup_serial('AC-Test', 7)[1] is not None
+            assert crl_index.lookup_serial('AC-Other', 7) is None
+            assert crl_index.lookup_serial('AC-Other', 7) is None
+        
+        # Only the unknown CA's meta entry was read, once
+        assert mock_get.call_count == 1
+    
+    def test_local_buckets_capped_across_cas(self):
+        from apps.signatures import crl_index
+        
+        crl_index.store_crl_index('AC-One', _build_crl(range(1, 640)))
+        crl_index.store_crl_index('AC-Two', _build_crl(range(1, 640)))
+        
+        with patch('apps.signatures.crl_index.CRL_INDEX_LOCAL_MAX_BUCKETS', 4):
+            for serial in range(3):
+                crl_index.lookup_serial('AC-One', serial)
+            for serial in range(3):
+                crl_index.lookup_serial('AC-Two', serial)
+        
+        # Least recently used buckets go first, whatever CA they belong to
+        assert len(crl_index._local_buckets) == 4
+        assert [key[0] for key in crl_index._local_buckets] == ['AC-One', 'AC-Two', 'AC-Two', 'AC-Two']
+        assert len(crl_index._local_indexes) == 2
+        
+        with patch('apps.signatures.crl_index.cache.get', wraps=cache.get) as mock_get:
+            assert crl_index.lookup_serial('AC-Two', 2)[1] is not None
+            crl_index.lookup_serial('AC-One', 0)
+        
+        # Only the evicted bucket is read again
+        assert mock_get.call_count == 1
+    
+    def test_version_bump_invalidates_local_entries(self):
+        from apps.signatures import crl_index
+        
+        assert crl_index.lookup_serial('AC-Test', 7) is None
+        
+        # Another worker caches the CRL and bumps the version
+        meta = crl_index.store_crl_index('AC-Test', _build_crl([7]))
+        crl_index._put_local('AC-Test', crl_index._LocalIndex(None, float('inf')))
+        crl_index.bump_crl_version()
+        
+        assert crl_index.lookup_serial('AC-Test', 7) is None  # Within the check interval
+        
+        with patch('apps.signatures.crl_index.CRL_INDEX_VERSION_CHECK_INTERVAL', 0):
+            found_meta, details = crl_index.lookup_serial('AC-Test', 7)
+        
+        assert found_meta['generation'] == meta['generation']
+        assert details is not None
+    
+    def test_local_entry_expires_at_next_update(self):
+        from apps.signatures import crl_index
+        
+        meta = crl_index.store_crl_index('AC-Test', _build_crl([7]))
+        expired = dict(meta, next_update=(datetime.utcnow() - timedelta(minutes=1)).isoformat())
+        
+        assert crl_index._expiry_for(expired) <= crl_index.time.monotonic()
+        assert crl_index._expiry_for(meta) > crl_index.time.monotonic() + 3600
+    
+    def test_evicted_bucket_is_not_reported_as_good(self):
+        from apps.signatures import crl_index
+        
+        meta = crl_index.store_crl_index('AC-Test', _build_crl([7]))
+        cache.delete(f"crl:AC-Test:{meta['generation']}:0")
+        
+        with pytest.raises(crl_index.CRLIndexUnavailable):
+            crl_index.lookup_serial('AC-Test', 7)
+    
+    def test_refresh_replaces_previous_index(self):
+        from apps.signatures import crl_index
+        
+        crl_index.store_crl_index('AC-Test', _build_crl([7]))
+        crl_index.store_crl_index('AC-Test', _build_crl([8]))
+        
+        assert crl_index.lookup_serial('AC-Test', 7)[1] is None
+        assert crl_index.lookup_serial('AC-Test', 8)[1] is not None
+
+    def test_refresh_deletes_previous_generation(self):
+        from apps.signatures import crl_index
+
+        old = crl_index.store_crl_index('AC-Test', _build_crl([7]))
+        crl_index.store_crl_index('AC-Test', _build_crl([8]))
+
+        assert cache.get(f"crl:AC-Test:{old['generation']}:0") is None
+
+    def test_touch_writes_only_meta(self):
+        from apps.signatures import crl_index
+
+        meta = crl_index.store_crl_index('AC-Test', _build_crl(range(1, 1000)))
+
+        with patch('apps.signatures.crl_index.cache.touch', wraps=cache.touch) as mock_touch:
+            assert crl_index.touch_crl_index('AC-Test', meta, etag='"v2"')
+
+        assert mock_touch.call_count == 0
+        assert cache.get('crl:AC-Test:meta')['etag'] == '"v2"'
+
+    def test_touch_extends_buckets_before_they_expire(self):
+        from apps.signatures import crl_index
+
+        meta = crl_index.store_crl_index('AC-Test', _build_crl(range(1, 1000)))
+        meta = dict(meta, buckets_expire_at=crl_index.time.time() + 3600)
+
+        with patch('apps.signatures.crl_index.cache.touch', wraps=cache.touch) as mock_touch:
+            assert crl_index.touch_crl_index('AC-Test', meta)
+
+        assert mock_touch.call_count == meta['buckets']
+        assert cache.get('crl:AC-Test:meta')['buckets_expire_at'] > crl_index.time.time() + 24 * 3600
+
+        cache.delete(f"crl:AC-Test:{meta['generation']}:0")
+        assert not crl_index.touch_crl_index('AC-Test', meta)
+
+    def test_checker_uses_index(self, mock_certificate, mock_issuer_certificate):
+        from apps.signatures import crl_index
+        
+        crl_index.store_crl_index('AC-Raiz', _build_crl([mock_certificate.serial_number]))
+        
+        checker = CertificateRevocationChecker(
+            certificate=mock_certificate,
+            issuer_certificate=mock_issuer_certificate
+        )
+        is_revoked, details = checker.is_revoked()
+        
+        assert is_revoked is True
+        assert details['method'] == 'CACHED_CRL'
+        assert details['crl_issuer'] == 'CN=AC Test'
+    
+    @patch('apps.signatures.revocation_checker.requests.get')
+    def test_on_demand_download_keeps_other_local_entries(self, mock_get, mock_certificate,
+                                                          mock_issuer_certificate):
+        from apps.signatures import crl_index
+        
+        crl_index.store_crl_index('AC-Other', _build_crl([7]))
+        crl_index.lookup_serial('AC-Other', 7)
+        assert crl_index.lookup_serial('AC-Test', mock_certificate.serial_number) is None
+        mock_get.return_value = _crl_response(_build_crl([mock_certificate.serial_number]))
+        
+        checker = CertificateRevocationChecker(
+            certificate=mock_certificate,
+            issuer_certificate=mock_issuer_certificate
+        )
+        with patch.object(checker, '_get_crl_urls', return_value=['http://crl.example/ac.crl']):
+            is_revoked, _ = checker._download_and_check_crl()
+        
+        assert is_revoked is True
+        # No global bump: other CAs stay cached in every worker
+        assert cache.get(crl_index.CRL_VERSION_KEY) is None
+        assert 'AC-Other' in crl_index._local_indexes
+        # The stale "no CRL" entry for this CA was dropped
+        assert crl_index.lookup_serial('AC-Test', mock_certificate.serial_number)[1] is not None
+
+
+def _ocsp_response(certificate, status, next_update=None):
+    """Signed OCSP response for ``certificate`` (self-issued) with ``status``."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.x509 import ocsp
+    
+    key = _CRL_SIGNING_KEY
+    now = datetime.utcnow()
+    responder_name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "OCSP Responder")])
+    responder = x509.CertificateBuilder().subject_name(
+        responder_name
+    ).issuer_name(
+        responder_name
+    ).public_key(
+        key.public_key()
+    ).serial_number(
+        1
+    ).not_valid_before(
+        now - timedelta(days=1)
+    ).not_valid_after(
+        now + timedelta(days=1)
+    ).sign(key, hashes.SHA256(), default_backend())
+    revoked = status == ocsp.OCSPCertStatus.REVOKED
+    builder = ocsp.OCSPResponseBuilder().add_response(
+        cert=certificate,
+        issuer=certificate,
+        algorithm=hashes.SHA256(),
+        cert_status=status,
+        this_update=now,
+        next_update=next_update or now + timedelta(hours=4),
+        revocation_time=now if revoked else None,
+        revocation_reason=x509.ReasonFlags.key_compromise if revoked else None,
+    ).responder_id(ocsp.OCSPResponderEncoding.HASH, responder)
+    response = MagicMock()
+    response.content = builder.sign(key, hashes.SHA256()).public_bytes(serialization.Encoding.DER)
+    return response
+
+
+@pytest.mark.unit
+class TestOCSPCache:
+    """Test OCSP response caching and request coalescing."""
+    
+    OCSP_URL = 'http://ocsp.example.com/'
+    
+    def setup_method(self):
+        cache.clear()
+    
+    def _checker(self, certificate):
+        checker = CertificateRevocationChecker(
+            certificate=certificate,
+            issuer_certificate=certificate
+        )
+        checker._get_ocsp_url = lambda: self.OCSP_URL
+        return checker
+    
+    @patch('apps.signatures.revocation_checker._get_ocsp_session')
+    def test_response_cached_until_next_update(self, mock_session, mock_certificate):
+        from cryptography.x509 import ocsp
+        
+        mock_session.return_value.post.return_value = _ocsp_response(
+            mock_certificate, ocsp.OCSPCertStatus.GOOD
+        )
+        
+        first = self._checker(mock_certificate)._check_ocsp()
+        second = self._checker(mock_certificate)._check_ocsp()
+        
+        assert first == second
+        assert first[0] is False
+        assert mock_session.return_value.post.call_count == 1
+    
+    @patch('apps.signatures.revocation_checker._get_ocsp_session')
+    def test_revoked_response(self, mock_session, mock_certificate):
+        from cryptography.x509 import ocsp
+        
+        mock_session.return_value.post.return_value = _ocsp_response(
+            mock_certificate, ocsp.OCSPCertStatus.REVOKED
+        )
+        
+        is_revoked, details = self._checker(mock_certificate)._check_ocsp()
+        
+        assert is_revoked is True
+        assert details['reason'] == 'ReasonFlags.key_compromise'
+    
+    @patch('apps.signatures.revocation_checker._get_ocsp_session')
+    def test_expired_response_not_cached(self, mock_session, mock_certificate):
+        from cryptography.x509 import ocsp
+        
+        mock_session.return_value.post.return_value = _ocsp_response(
+            mock_certificate, ocsp.OCSPCertStatus.GOOD,
+            next_update=datetime.utcnow() - timedelta(minutes=1)
+        )
+        
+        self._checker(mock_certificate)._check_ocsp()
+        self._checker(mock_certificate)._check_ocsp()
+        
+        assert mock_session.return_value.post.call_count == 2
+    
+    @patch('apps.signatures.revocation_checker.time.sleep')
+    @patch('apps.signatures.revocation_checker._get_ocsp_session')
+    def test_concurrent_lookup_waits_for_lock_holder(self, mock_session, mock_sleep, mock_certificate):
+        from cryptography.x509 import ocsp
+        
+        checker = self._checker(mock_certificate)
+        mock_session.return_value.post.return_value = _ocsp_response(
+            mock_certificate, ocsp.OCSPCertStatus.GOOD
+        )
+        
+        # Another worker holds the lock and publishes its answer while we wait
+        holder = self._checker(mock_certificate)
+        request = ocsp.OCSPRequestBuilder().add_certificate(
+            mock_certificate, mock_certificate, hashes.SHA256()
+        ).build()
+        cache_key = f"ocsp:{request.issuer_key_hash.hex()}:{mock_certificate.serial_number:x}"
+        cache.add(f"{cache_key}:lock", 1, 15)
+        mock_sleep.side_effect = lambda _: holder._query_ocsp(self.OCSP_URL, request, cache_key)
+        
+        is_revoked, details = checker._check_ocsp()
+        
+        assert is_revoked is False
+        assert mock_sleep.call_count == 1
+        assert mock_session.return_value.post.call_count == 1
+    
+    def test_session_pooled_per_responder(self):
+        from apps.signatures.revocation_checker import _get_ocsp_session
+        
+        first = _get_ocsp_session('http://ocsp.example.com/a')
+        assert _get_ocsp_session('http://ocsp.example.com/b') is first
+        assert _get_ocsp_session('http://other.example.com/') is not first
+
+
 @pytest.mark.unit
 @pytest.mark.django_db
 class TestCRLDownloadTask:
@@ -230,6 +611,7 @@ class TestCRLDownloadTask:
     def setup_method(self):
         """Clear cache before each test."""
         cache.clear()
+        clear_local_cache()
     
     @patch('requests.get')
     @patch('cryptography.x509.load_der_x509_crl')
@@ -241,6 +623,7 @@ class TestCRLDownloadTask:
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.content = b'mock_crl_data'
+        mock_response.headers = {}
         mock_response.raise_for_status = MagicMock()
         mock_get.return_value = mock_response
         
@@ -259,8 +642,10 @@ class TestCRLDownloadTask:
         assert 'AC-Raiz' in result['success']
         
         # Verify cache was populated
-        assert cache.get('crl:AC-Raiz:serials') is not None
-        assert cache.get('crl:AC-Raiz:meta') is not None
+        meta = cache.get('crl:AC-Raiz:meta')
+        assert meta is not None
+        assert meta['count'] == 0
+        assert cache.get(f"crl:AC-Raiz:{meta['generation']}:0") == {}
     
     @patch('requests.get')
     def test_download_handles_network_errors(self, mock_get):
@@ -292,6 +677,118 @@ class TestCRLDownloadTask:
         pass
 
 
+@pytest.mark.unit
+class TestCRLRefresh:
+    """Test conditional, delta-aware CRL refresh."""
+    
+    URL = 'http://example.com/ac.crl'
+    DELTA_URL = 'http://example.com/ac-delta.crl'
+    
+    def setup_method(self):
+        cache.clear()
+        clear_local_cache()
+    
+    @patch('apps.signatures.crl_refresh.requests.get')
+    def test_not_modified_keeps_index(self, mock_get):
+        from apps.signatures.crl_index import lookup_serial
+        from apps.signatures.crl_refresh import refresh_crl
+        
+        mock_get.return_value = _crl_response(_build_crl([7], number=1), headers={'ETag': '"v1"'})
+        assert refresh_crl('AC-Test', self.URL)['status'] == 'updated'
+        generation = cache.get('crl:AC-Test:meta')['generation']
+        
+        mock_get.return_value = _crl_response(status_code=304)
+        outcome = refresh_crl('AC-Test', self.URL)
+        
+        assert outcome['status'] == 'unchanged'
+        assert mock_get.call_args.kwargs['headers'] == {'If-None-Match': '"v1"'}
+        assert cache.get('crl:AC-Test:meta')['generation'] == generation
+        assert lookup_serial('AC-Test', 7)[1] is not None
+    
+    @patch('apps.signatures.crl_refresh.requests.get')
+    def test_reindexes_only_when_crl_number_advances(self, mock_get):
+        from apps.signatures.crl_index import lookup_serial
+        from apps.signatures.crl_refresh import refresh_crl
+        
+        mock_get.return_value = _crl_response(_build_crl([7], number=5))
+        refresh_crl('AC-Test', self.URL)
+        generation = cache.get('crl:AC-Test:meta')['generation']
+        
+        # Same CRL number served again without validators
+        mock_get.return_value = _crl_response(_build_crl([7], number=5))
+        assert refresh_crl('AC-Test', self.URL)['status'] == 'unchanged'
+        assert cache.get('crl:AC-Test:meta')['generation'] == generation
+        
+        mock_get.return_value = _crl_response(_build_crl([8], number=6))
+        outcome = refresh_crl('AC-Test', self.URL)
+        
+        assert outcome['status'] == 'updated'
+        assert outcome['crl_number'] == 6
+        assert lookup_serial('AC-Test', 7)[1] is None
+        assert lookup_serial('AC-Test', 8)[1] is not None
+    
+    @patch('apps.signatures.crl_refresh.requests.get')
+    def test_delta_crl_merged_into_base(self, mock_get):
+        from apps.signatures.crl_index import lookup_serial
+        from apps.signatures.crl_refresh import refresh_crl
+        
+        base = _build_crl([7, 8], number=10, freshest_url=self.DELTA_URL)
+        delta = _build_crl([9], number=11, delta_base=10)
+        removal = _build_crl([8], number=11, delta_base=10, reason=x509.ReasonFlags.remove_from_crl)
+        
+        def serve(url, **kwargs):
+            if url == self.URL:
+                return _crl_response(base)
+            return _crl_response(delta_responses.pop(0))
+        
+        delta_responses = [delta]
+        mock_get.side_effect = serve
+        outcome = refresh_crl('AC-Test', self.URL)
+        
+        assert outcome['delta'] == {'status': 'updated', 'crl_number': 11}
+        assert outcome['count'] == 3
+        assert lookup_serial('AC-Test', 9)[1] is not None
+        
+        # A delta with a stale CRL number is not applied again
+        delta_responses = [removal]
+        assert refresh_crl('AC-Test', self.URL)['delta']['status'] == 'unchanged'
+        assert lookup_serial('AC-Test', 8)[1] is not None
+    
+    def test_delta_removes_entries(self):
+        from apps.signatures import crl_index
+        
+        crl_index.store_crl_index('AC-Test', _build_crl([7, 8], number=10), crl_number=10)
+        meta = crl_index.apply_crl_delta(
+            'AC-Test',
+            _build_crl([8], number=11, delta_base=10, reason=x509.ReasonFlags.remove_from_crl)
+        )
+        
+        assert meta['count'] == 1
+        assert crl_index.lookup_serial('AC-Test', 8)[1] is None
+        assert crl_index.lookup_serial('AC-Test', 7)[1] is not None
+    
+    @patch('apps.signatures.crl_refresh.requests.get')
+    def test_refresh_crls_reports_failures_per_endpoint(self, mock_get):
+        import requests
+        from apps.signatures.crl_refresh import refresh_crls
+        
+        def serve(url, **kwargs):
+            if 'broken' in url:
+                raise requests.RequestException('Network error')
+            return _crl_response(_build_crl([1], number=1))
+        
+        mock_get.side_effect = serve
+        outcomes = refresh_crls({
+            'AC-A': 'http://example.com/a.crl',
+            'AC-B': 'http://example.com/broken.crl',
+            'AC-C': 'http://example.com/c.crl',
+        })
+        
+        assert outcomes['AC-A']['status'] == 'updated'
+        assert outcomes['AC-C']['count'] == 1
+        assert isinstance(outcomes['AC-B'], requests.RequestException)
+
+
 @pytest.mark.integration
 @pytest.mark.django_db
 class TestRevocationIntegration:
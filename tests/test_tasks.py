@@ -4,7 +4,13 @@ Tests for Celery tasks
 import pytest
 from unittest.mock import patch, MagicMock
 from apps.petitions.tasks import generate_petition_pdf
-from apps.signatures.tasks import verify_signature
+from apps.signatures.models import Signature
+from apps.signatures.tasks import (
+    check_signature_status_batch,
+    verify_pending_signatures,
+    verify_signature,
+    verify_signature_batch,
+)
 from tests.factories import PetitionFactory, SignatureFactory
 
 
@@ -116,6 +122,337 @@ class TestSignatureTasks:
         assert signature.verification_status in ['pending', 'manual_review']
 
 
+@pytest.mark.unit
+@pytest.mark.django_db
+class TestSignatureBatchTasks:
+    """Test batch signature verification"""
+    
+    def _signature_with_pdf(self, petition, content):
+        from django.core.files.base import ContentFile
+        signature = SignatureFactory(petition=petition)
+        signature.signed_pdf.save('signed.pdf', ContentFile(content))
+        return signature
+    
+    @patch('apps.signatures.tasks._notify_signature_rejected')
+    @patch('apps.signatures.tasks._notify_signature_verified')
+    @patch('apps.signatures.tasks._generate_custody_certificate')
+    @patch('apps.signatures.verification_service.PDFSignatureVerifier.trust_store',
+           MagicMock(version='test'), create=True)
+    @patch('apps.signatures.verification_service.PDFSignatureVerifier.__init__', return_value=None)
+    @patch('apps.signatures.verification_service.PDFSignatureVerifier.verify_pdf_signature')
+    def test_batch_verifies_and_bulk_updates(self, mock_verify, mock_init, mock_certificate,
+                                             mock_verified_email, mock_rejected_email):
+        """Test a batch shares one verifier and writes each outcome"""
+        petition = PetitionFactory(signature_count=0)
+        good = [self._signature_with_pdf(petition, b'%%PDF good %d' % i) for i in range(3)]
+        bad = self._signature_with_pdf(petition, b'%PDF bad')
+        
+        def verify(pdf_file, petition, check_status=True):
+            if pdf_file.read().startswith(b'%PDF good'):
+                return {'verified': True, 'certificate_info': {'subject': 'CN=Signer', 'serial_number': '1'}}
+            return {'verified': False, 'error': 'Assinatura inválida'}
+        
+        mock_verify.side_effect = verify
+        
+        result = verify_signature_batch(batch_size=10)
+        
+        assert result['claimed_count'] == 4
+        assert result['approved_count'] == 3
+        assert result['rejected_count'] == 1
+        assert mock_init.call_count == 1
+        
+        for signature in good:
+            signature.refresh_from_db()
+            assert signature.verification_status == Signature.STATUS_APPROVED
+            assert signature.verified_at is not None
+            assert signature.certificate_subject == 'CN=Signer'
+        bad.refresh_from_db()
+        assert bad.verification_status == Signature.STATUS_REJECTED
+        assert bad.rejection_reason == 'Assinatura inválida'
+        
+        petition.refresh_from_db()
+        assert petition.signature_count == 3
+        assert mock_certificate.call_count == 3
+        assert mock_verified_email.call_count == 3
+        assert mock_rejected_email.call_count == 1
+    
+    @patch('apps.signatures.tasks._notify_signature_verified')
+    @patch('apps.signatures.tasks._generate_custody_certificate')
+    @patch('apps.signatures.verification_service.PDFSignatureVerifier.trust_store',
+           MagicMock(version='test'), create=True)
+    @patch('apps.signatures.verification_service.PDFSignatureVerifier.__init__', return_value=None)
+    @patch('apps.signatures.verification_service.PDFSignatureVerifier.verify_pdf_signature')
+    def test_resubmitted_file_reuses_cached_result(self, mock_verify, mock_init,
+                                                   mock_certificate, mock_verified_email):
+        """Test a byte-identical PDF is verified once and its copy goes to manual review"""
+        from django.core.cache import cache
+        from apps.signatures.tasks import VERIFICATION_DUPLICATES_CACHE_KEY
+        cache.clear()
+        petition = PetitionFactory(signature_count=0)
+        first = self._signature_with_pdf(petition, b'%PDF same bytes')
+        second = self._signature_with_pdf(petition, b'%PDF same bytes')
+        mock_verify.return_value = {
+            'verified': True, 'certificate_info': {'subject': 'CN=Signer', 'serial_number': '1'}
+        }
+        
+        result = verify_signature_batch(batch_size=10)
+        
+        assert result['approved_count'] == 1
+        assert result['manual_review_count'] == 1
+        assert mock_verify.call_count == 1
+        first.refresh_from_db()
+        second.refresh_from_db()
+        assert len(first.file_hash) == 64
+        assert first.file_hash == second.file_hash
+        assert first.verification_status == Signature.STATUS_APPROVED
+        assert second.verification_status == Signature.STATUS_MANUAL_REVIEW
+        assert cache.get(VERIFICATION_DUPLICATES_CACHE_KEY) == 1
+        petition.refresh_from_db()
+        assert petition.signature_count == 1
+    
+    @patch('apps.signatures.verification_service.PDFSignatureVerifier.trust_store',
+           MagicMock(version='test'), create=True)
+    @patch('apps.signatures.verification_service.PDFSignatureVerifier.__init__', return_value=None)
+    @patch('apps.signatures.verification_service.PDFSignatureVerifier.verify_pdf_signature')
+    def test_resubmitted_file_after_approval_not_served_from_cache(self, mock_verify, mock_init):
+        """Test a copy of an approved PDF is held for review by the per-upload task"""
+        import hashlib
+        petition = PetitionFactory(signature_count=0)
+        first = self._signature_with_pdf(petition, b'%PDF same bytes')
+        first.file_hash = hashlib.sha256(b'%PDF same bytes').hexdigest()
+        first.verification_status = Signature.STATUS_APPROVED
+        first.save()
+        copy = self._signature_with_pdf(petition, b'%PDF same bytes')
+        
+        result = verify_signature(copy.id)
+        
+        assert result['status'] == Signature.STATUS_MANUAL_REVIEW
+        assert mock_verify.call_count == 0
+        copy.refresh_from_db()
+        assert copy.verification_status == Signature.STATUS_MANUAL_REVIEW
+    
+    @patch('apps.signatures.tasks._notify_signature_rejected')
+    @patch('apps.signatures.tasks._notify_signature_verified')
+    @patch('apps.signatures.tasks._generate_custody_certificate')
+    @patch('apps.signatures.verification_service.PDFSignatureVerifier.trust_store',
+           MagicMock(version='test'), create=True)
+    @patch('apps.signatures.verification_service.PDFSignatureVerifier.__init__', return_value=None)
+    @patch('apps.signatures.verification_service.PDFSignatureVerifier.check_certificate_status')
+    @patch('apps.signatures.verification_service.PDFSignatureVerifier.verify_pdf_signature')
+    def test_batch_hands_status_checks_to_io_stage(self, mock_verify, mock_status, mock_init,
+                                                   mock_certificate, mock_verified_email,
+                                                   mock_rejected_email):
+        """Test rows passing the document checks finish in check_signature_status_batch"""
+        petition = PetitionFactory(signature_count=0)
+        good = self._signature_with_pdf(petition, b'%PDF good')
+        revoked = self._signature_with_pdf(petition, b'%PDF revoked')
+        
+        def verify(pdf_file, petition, check_status=True):
+            assert check_status is False
+            return {
+                'verified': False, 'certificate_info': None, 'error': None,
+                'status_check': {'certificate_chain': [], 'name': pdf_file.read().decode()},
+            }
+        
+        def status(stage_result):
+            if stage_result['status_check']['name'] == '%PDF good':
+                return {'verified': True, 'certificate_info': {'subject': 'CN=Signer'}}
+            return {'verified': False, 'error': 'Certificado não pertence à cadeia ICP-Brasil'}
+        
+        mock_verify.side_effect = verify
+        mock_status.side_effect = status
+        
+        with patch('apps.signatures.tasks.check_signature_status_batch.delay',
+                   side_effect=lambda items: check_signature_status_batch(items)):
+            result = verify_signature_batch(batch_size=10)
+        
+        assert result['status_check_count'] == 2
+        assert result['approved_count'] == 0
+        assert mock_status.call_count == 2
+        good.refresh_from_db()
+        revoked.refresh_from_db()
+        assert good.verification_status == Signature.STATUS_APPROVED
+        assert revoked.verification_status == Signature.STATUS_REJECTED
+        petition.refresh_from_db()
+        assert petition.signature_count == 1
+    
+    @patch('apps.signatures.tasks._notify_signature_verified')
+    @patch('apps.signatures.tasks._generate_custody_certificate')
+    @patch('apps.signatures.verification_service.PDFSignatureVerifier.trust_store',
+           MagicMock(version='test'), create=True)
+    @patch('apps.signatures.verification_service.PDFSignatureVerifier.__init__', return_value=None)
+    @patch('apps.signatures.verification_service.PDFSignatureVerifier.verify_pdf_signature')
+    def test_verify_signature_skips_row_claimed_by_batch(self, mock_verify, mock_init,
+                                                         mock_certificate, mock_verified_email):
+        """Test the per-upload task leaves a row the batch is verifying alone"""
+        petition = PetitionFactory(signature_count=0)
+        signature = self._signature_with_pdf(petition, b'%PDF claimed by batch')
+        skipped = []
+        
+        def verify(pdf_file, petition, check_status=True):
+            skipped.append(verify_signature(signature.id))
+            return {'verified': True, 'certificate_info': {'subject': 'CN=Signer', 'serial_number': '1'}}
+        
+        mock_verify.side_effect = verify
+        
+        result = verify_signature_batch(batch_size=10)
+        
+        assert result['approved_count'] == 1
+        assert skipped[0]['skipped'] is True
+        assert mock_verify.call_count == 1
+        assert mock_verified_email.call_count == 1
+        signature.refresh_from_db()
+        assert signature.verification_status == Signature.STATUS_APPROVED
+        petition.refresh_from_db()
+        assert petition.signature_count == 1
+    
+    @patch('apps.signatures.tasks._notify_signature_verified')
+    @patch('apps.signatures.tasks._generate_custody_certificate')
+    @patch('apps.signatures.verification_service.PDFSignatureVerifier.trust_store',
+           MagicMock(version='test'), create=True)
+    @patch('apps.signatures.verification_service.PDFSignatureVerifier.__init__', return_value=None)
+    @patch('apps.signatures.verification_service.PDFSignatureVerifier.verify_pdf_signature')
+    def test_batch_skips_row_claimed_by_verify_signature(self, mock_verify, mock_init,
+                                                         mock_certificate, mock_verified_email):
+        """Test a batch dispatched while the per-upload task runs does not verify the row again"""
+        petition = PetitionFactory(signature_count=0)
+        signature = self._signature_with_pdf(petition, b'%PDF claimed by task')
+        batches = []
+        
+        def verify(pdf_file, petition, check_status=True):
+            batches.append(verify_signature_batch(batch_size=10))
+            return {'verified': True, 'certificate_info': {'subject': 'CN=Signer', 'serial_number': '1'}}
+        
+        mock_verify.side_effect = verify
+        
+        result = verify_signature(signature.id)
+        
+        assert result['status'] == 'approved'
+        assert batches[0]['claimed_count'] == 0
+        assert mock_verify.call_count == 1
+        assert mock_verified_email.call_count == 1
+        signature.refresh_from_db()
+        assert signature.verification_status == Signature.STATUS_APPROVED
+        petition.refresh_from_db()
+        assert petition.signature_count == 1
+    
+    @patch('apps.signatures.tasks._notify_signature_verified')
+    @patch('apps.signatures.verification_service.PDFSignatureVerifier.trust_store',
+           MagicMock(version='test'), create=True)
+    @patch('apps.signatures.verification_service.PDFSignatureVerifier.__init__', return_value=None)
+    @patch('apps.signatures.verification_service.PDFSignatureVerifier.check_certificate_status')
+    def test_status_check_skips_finished_row(self, mock_status, mock_init, mock_verified_email):
+        """Test check_signature_status does not approve a row finished elsewhere"""
+        from apps.signatures.tasks import check_signature_status
+        petition = PetitionFactory(signature_count=1)
+        signature = SignatureFactory(petition=petition, verification_status=Signature.STATUS_APPROVED)
+        
+        result = check_signature_status(signature.id, {'status_check': {}})
+        
+        assert result['skipped'] is True
+        assert result['status'] == Signature.STATUS_APPROVED
+        assert mock_status.call_count == 0
+        assert mock_verified_email.call_count == 0
+        petition.refresh_from_db()
+        assert petition.signature_count == 1
+    
+    @patch('apps.signatures.verification_service.PDFSignatureVerifier.__init__', return_value=None)
+    def test_batch_claims_only_pending_rows(self, mock_init):
+        """Test rows already claimed are left alone and missing files go to manual review"""
+        petition = PetitionFactory()
+        SignatureFactory(petition=petition, verification_status=Signature.STATUS_PROCESSING)
+        pending = SignatureFactory(petition=petition)
+        
+        result = verify_signature_batch(batch_size=10)
+        
+        assert result['claimed_count'] == 1
+        assert result['manual_review_count'] == 1
+        pending.refresh_from_db()
+        assert pending.verification_status == Signature.STATUS_MANUAL_REVIEW
+        assert verify_signature_batch()['claimed_count'] == 0
+    
+    @patch('apps.signatures.tasks.verify_signature_batch.delay')
+    def test_pending_signatures_dispatch_batches(self, mock_delay):
+        """Test the scheduler dispatches batches and marks rows enqueued"""
+        petition = PetitionFactory()
+        SignatureFactory.create_batch(5, petition=petition)
+        
+        with patch('apps.signatures.tasks.VERIFICATION_BATCH_SIZE', 2):
+            result = verify_pending_signatures()
+        
+        assert result['pending_count'] == 5
+        assert result['dispatched_count'] == 5
+        assert result['batch_count'] == 3
+        assert mock_delay.call_count == 3
+        assert not Signature.objects.filter(enqueued_at__isnull=True).exists()
+        
+        # Rows already queued are not dispatched again
+        mock_delay.reset_mock()
+        result = verify_pending_signatures()
+        assert result['dispatched_count'] == 0
+        assert result['queued_count'] == 5
+        assert mock_delay.call_count == 0
+    
+    @patch('apps.signatures.tasks.verify_signature_batch.delay')
+    def test_dispatch_adapts_to_measured_latency(self, mock_delay, settings):
+        """Test slow verifications reduce how many rows are dispatched per run"""
+        from django.core.cache import cache
+        from apps.signatures.tasks import VERIFICATION_LATENCY_CACHE_KEY, get_verification_backlog
+        
+        settings.SIGNATURE_VERIFICATION_CONCURRENCY = 1
+        settings.SIGNATURE_VERIFICATION_SCHEDULE_SECONDS = 10
+        cache.set(VERIFICATION_LATENCY_CACHE_KEY, 5.0)
+        SignatureFactory.create_batch(6, petition=PetitionFactory())
+        
+        try:
+            result = verify_pending_signatures()
+        finally:
+            cache.delete(VERIFICATION_LATENCY_CACHE_KEY)
+        
+        # 1 worker x 2 intervals x 10s / 5s per signature
+        assert result['dispatched_count'] == 4
+        assert result['backlog_age_seconds'] >= 0
+        assert get_verification_backlog()['pending_count'] == 6
+    
+    @patch('apps.signatures.tasks.verify_signature_batch.delay')
+    def test_stale_enqueued_rows_are_redispatched(self, mock_delay):
+        """Test rows enqueued long ago but never claimed are dispatched again"""
+        from datetime import timedelta
+        from django.utils import timezone
+        
+        signature = SignatureFactory(enqueued_at=timezone.now() - timedelta(hours=1))
+        
+        result = verify_pending_signatures()
+        
+        assert result['dispatched_count'] == 1
+        mock_delay.assert_called_once_with(signature_ids=[signature.id])
+
+    @patch('apps.signatures.tasks.verify_signature_batch.delay')
+    def test_stale_processing_rows_are_released(self, mock_delay):
+        """Test rows claimed by a batch that never finished go back to pending"""
+        from datetime import timedelta
+        from django.utils import timezone
+
+        petition = PetitionFactory()
+        stuck = SignatureFactory(
+            petition=petition,
+            verification_status=Signature.STATUS_PROCESSING,
+            processing_started_at=timezone.now() - timedelta(hours=2)
+        )
+        in_flight = SignatureFactory(
+            petition=petition,
+            verification_status=Signature.STATUS_PROCESSING,
+            processing_started_at=timezone.now()
+        )
+
+        result = verify_pending_signatures()
+
+        assert result['recovered_count'] == 1
+        mock_delay.assert_called_once_with(signature_ids=[stuck.id])
+        in_flight.refresh_from_db()
+        assert in_flight.verification_status == Signature.STATUS_PROCESSING
+
+
 @pytest.mark.slow
 @pytest.mark.django_db
 class TestTaskPerformance:
@@ -0,0 +1,121 @@
+"""
+Tests for the process-wide ICP-Brasil trust store.
+"""
+import pytest
+from datetime import datetime, timedelta
+from cryptography import x509
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from apps.signatures.trust_store import (
+    TrustStoreError,
+    get_trust_store,
+    load_trust_store,
+    reload_trust_store,
+)
+from apps.signatures.verification_service import PDFSignatureVerifier
+
+
+def _make_cert(common_name, issuer_cert=None, issuer_key=None):
+    """Build a small EC certificate, self-signed unless an issuer is given."""
+    key = ec.generate_private_key(ec.SECP256R1(), default_backend())
+    subject = x509.Name([
+        x509.NameAttribute(NameOID.COUNTRY_NAME, "BR"),
+        x509.NameAttribute(NameOID.ORGANIZATION_NAME, "ICP-Brasil"),
+        x509.NameAttribute(NameOID.COMMON_NAME, common_name),
+    ])
+    issuer_name = issuer_cert.subject if issuer_cert else subject
+    signing_key = issuer_key or key
+
+    builder = x509.CertificateBuilder().subject_name(
+        subject
+    ).issuer_name(
+        issuer_name
+    ).public_key(
+        key.public_key()
+    ).serial_number(
+        x509.random_serial_number()
+    ).not_valid_before(
+        datetime.utcnow() - timedelta(days=1)
+    ).not_valid_after(
+        datetime.utcnow() + timedelta(days=365)
+    ).add_extension(
+        x509.SubjectKeyIdentifier.from_public_key(key.public_key()), critical=False
+    )
+    if issuer_cert is not None:
+        builder = builder.add_extension(
+            x509.AuthorityKeyIdentifier.from_issuer_public_key(issuer_key.public_key()),
+            critical=False,
+        )
+
+    cert = builder.sign(signing_key, hashes.SHA256(), default_backend())
+    return cert, key
+
+
+def _write_cert(directory, filename, cert):
+    path = directory / filename
+    path.write_bytes(cert.public_bytes(serialization.Encoding.DER))
+    return path
+
+
+@pytest.mark.unit
+class TestTrustStore:
+    """Test trust anchor loading and indexed lookups."""
+
+    def test_loads_bundled_certificates(self):
+        """The shipped ICP-Brasil roots load into the shared store."""
+        store = get_trust_store()
+        assert len(store) >= 1
+        assert all(entry['filename'].endswith('.crt') for entry in store)
+
+    def test_store_is_shared_between_verifiers(self):
+        """Verifiers reuse one parsed store instead of re-reading files."""
+        first = PDFSignatureVerifier()
+        second = PDFSignatureVerifier()
+        assert first.trust_store is second.trust_store
+        assert len(first.trusted_certs) == len(first.trust_store)
+
+    def test_missing_directory_raises(self, tmp_path):
+        with pytest.raises(TrustStoreError):
+            load_trust_store(str(tmp_path / 'missing'))
+
+    def test_empty_directory_raises(self, tmp_path):
+        with pytest.raises(TrustStoreError):
+            load_trust_store(str(tmp_path))
+
+    def test_find_issuer_by_key_identifier_and_subject(self, tmp_path):
+        root, root_key = _make_cert("AC Raiz Teste")
+        leaf, _ = _make_cert("Signer", issuer_cert=root, issuer_key=root_key)
+        _write_cert(tmp_path, 'root.crt', root)
+
+        store = load_trust_store(str(tmp_path))
+
+        assert store.find_issuer(leaf) == root
+        assert store.is_trusted_subject(leaf.issuer)
+        assert store.is_trusted_subject(root.subject)
+        assert not store.is_trusted_subject(leaf.subject)
+
+    def test_reloads_when_directory_changes(self, tmp_path):
+        root_a, _ = _make_cert("AC Raiz A")
+        root_b, _ = _make_cert("AC Raiz B")
+        _write_cert(tmp_path, 'a.crt', root_a)
+
+        store = get_trust_store(str(tmp_path))
+        assert get_trust_store(str(tmp_path)) is store
+        assert not store.is_trusted_subject(root_b.subject)
+
+        _write_cert(tmp_path, 'b.crt', root_b)
+        refreshed = get_trust_store(str(tmp_path))
+
+        assert refreshed is not store
+        assert refreshed.version != store.version
+        assert refreshed.is_trusted_subject(root_b.subject)
+
+    def test_forced_reload_builds_new_store(self, tmp_path):
+        root, _ = _make_cert("AC Raiz C")
+        _write_cert(tmp_path, 'c.crt', root)
+
+        store = get_trust_store(str(tmp_path))
+        assert reload_trust_store(str(tmp_path)) is not store
@@ -0,0 +1,235 @@
+"""
+Unit tests for the PDF verification pipeline.
+"""
+import pytest
+from io import BytesIO
+from unittest.mock import Mock, patch
+
+from apps.signatures.crl_index import bump_crl_version
+from apps.signatures.verification_cache import cache_result, get_cached_result
+from apps.signatures.verification_metrics import (
+    StageTimings,
+    flush_stage_histograms,
+    get_stage_histograms,
+    observe_stage_timings,
+    stage_label,
+)
+from apps.signatures.verification_service import PDFSignatureVerifier
+
+
+PETITION_UUID = '12345678-1234-1234-1234-123456789012'
+
+
+def _page(text):
+    page = Mock()
+    page.extract_text.return_value = text
+    return page
+
+
+@pytest.mark.unit
+class TestPDFContentCheck:
+    """Tests for the petition UUID check on the signed PDF."""
+
+    def setup_method(self):
+        self.verifier = PDFSignatureVerifier()
+        self.petition = Mock(uuid=PETITION_UUID)
+
+    def test_uuid_in_raw_bytes_skips_text_extraction(self):
+        page = _page('')
+        pdf_data = f'%PDF-1.4\n{PETITION_UUID}\n'.encode()
+
+        assert self.verifier._verify_pdf_content(pdf_data, self.petition, Mock(pages=[page])) is True
+        page.extract_text.assert_not_called()
+
+    def test_stops_at_first_page_with_uuid(self):
+        pages = [_page('Abaixo-assinado'), _page(f'ID: {PETITION_UUID}'), _page('fim')]
+        reader = Mock(pages=pages)
+
+        assert self.verifier._verify_pdf_content(b'%PDF-1.4', self.petition, reader) is True
+        pages[2].extract_text.assert_not_called()
+
+    def test_uuid_split_across_pages(self):
+        reader = Mock(pages=[_page(f'ID: {PETITION_UUID[:10]}'), _page(PETITION_UUID[10:])])
+
+        assert self.verifier._verify_pdf_content(b'%PDF-1.4', self.petition, reader) is True
+
+    def test_uuid_missing(self):
+        reader = Mock(pages=[_page('outra petição'), _page('')])
+
+        assert self.verifier._verify_pdf_content(b'%PDF-1.4', self.petition, reader) is False
+
+    def test_reuses_reader_from_signature_check(self):
+        """verify_pdf_signature parses the PDF only once."""
+        pdf_file = BytesIO(b'%PDF-1.4\nsem assinatura')
+
+        with patch('apps.signatures.verification_service.PdfReader') as mock_reader_class:
+            mock_reader_class.return_value = Mock(trailer={'/Root': {}})
+            self.verifier.verify_pdf_signature(pdf_file, self.petition)
+
+        assert mock_reader_class.call_count == 1
+
+    def test_read_pdf_data_from_buffer(self):
+        buffer = BytesIO(b'%PDF-1.4 conteudo')
+        buffer.read()
+
+        assert PDFSignatureVerifier._read_pdf_data(buffer) == b'%PDF-1.4 conteudo'
+
+
+@pytest.mark.unit
+class TestVerificationResultCache:
+    """Tests for the content-addressed verification result cache."""
+
+    FILE_HASH = 'a' * 64
+
+    def setup_method(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.petition = Mock(uuid=PETITION_UUID)
+
+    def test_identical_pdf_hits(self):
+        result = {'verified': True, 'certificate_info': {'serial_number': '1'}}
+
+        assert cache_result(self.FILE_HASH, self.petition, 'v1', result) is True
+        cached = get_cached_result(self.FILE_HASH, self.petition, 'v1')
+
+        assert cached['verified'] is True
+        assert cached['cached'] is True
+
+    def test_trust_store_and_crl_changes_miss(self):
+        cache_result(self.FILE_HASH, self.petition, 'v1', {'verified': True})
+
+        assert get_cached_result(self.FILE_HASH, self.petition, 'v2') is None
+        bump_crl_version()
+        assert get_cached_result(self.FILE_HASH, self.petition, 'v1') is None
+
+    def test_other_petition_misses(self):
+        cache_result(self.FILE_HASH, self.petition, 'v1', {'verified': True})
+
+        assert get_cached_result(self.FILE_HASH, Mock(uuid='outra'), 'v1') is None
+
+    def test_transient_errors_not_cached(self):
+        result = {'verified': False, 'error': 'Certificado não pertence à cadeia ICP-Brasil'}
+
+        assert cache_result(self.FILE_HASH, self.petition, 'v1', result) is False
+        assert get_cached_result(self.FILE_HASH, self.petition, 'v1') is None
+
+    def test_deterministic_rejection_cached(self):
+        result = {'verified': False, 'error': 'CNPJ', 'rejection_code': 'CNPJ_NOT_ACCEPTED'}
+
+        assert cache_result(self.FILE_HASH, self.petition, 'v1', result) is True
+
+    def test_hit_drops_stage_timings(self):
+        result = {'verified': True, 'stage_timings': {'read': {'duration_ms': 1.0}}}
+        cache_result(self.FILE_HASH, self.petition, 'v1', result)
+
+        assert 'stage_timings' not in get_cached_result(self.FILE_HASH, self.petition, 'v1')
+
+
+@pytest.mark.unit
+class TestStageTimings:
+    """Tests for verification stage timing and histograms."""
+
+    def setup_method(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_begin_ends_previous_stage(self):
+        timings = StageTimings()
+
+        timings.begin('read')
+        timings.begin('parse')
+        timings.end()
+
+        assert list(timings.stages) == ['read', 'parse']
+        assert all(entry['duration_ms'] >= 0 for entry in timings.stages.values())
+        assert all('started_at' in entry for entry in timings.stages.values())
+
+    def test_stage_records_labels_set_inside_block(self):
+        timings = StageTimings({'read': {'duration_ms': 2.0}})
+
+        with timings.stage('revocation') as stage:
+            stage['method'] = 'OCSP'
+
+        assert timings.stages['read'] == {'duration_ms': 2.0}
+        assert timings.stages['revocation']['method'] == 'OCSP'
+        assert stage_label('revocation', timings.stages['revocation']) == 'revocation:ocsp'
+
+    def test_stage_recorded_when_block_raises(self):
+        timings = StageTimings()
+
+        with pytest.raises(ValueError):
+            with timings.stage('chain'):
+                raise ValueError
+
+        assert 'duration_ms' in timings.stages['chain']
+
+    def test_histograms_flushed_to_cache(self):
+        for duration_ms in (3, 40, 40, 2000):
+            observe_stage_timings({
+                'parse': {'duration_ms': duration_ms},
+                'revocation': {'duration_ms': duration_ms, 'method': 'CRL'},
+            })
+        flush_stage_histograms()
+
+        histograms = get_stage_histograms()
+
+        assert set(histograms) == {'parse', 'revocation:crl'}
+        parse = histograms['parse']
+        assert parse['count'] == 4
+        assert parse['sum_seconds'] == pytest.approx(2.083)
+        assert parse['buckets'][0] == ('0.005', 1)
+        assert parse['buckets'][-1] == ('+Inf', 4)
+        assert parse['p50'] == '0.05'
+        assert parse['p99'] == '2.5'
+
+    def test_flush_accumulates_across_calls(self):
+        observe_stage_timings({'read': {'duration_ms': 1}})
+        flush_stage_histograms()
+        observe_stage_timings({'read': {'duration_ms': 1}})
+        flush_stage_histograms()
+        flush_stage_histograms()
+
+        assert get_stage_histograms()['read']['count'] == 2
+
+    def test_flush_throttled_by_interval_and_count(self):
+        from apps.signatures import verification_metrics
+
+        flush_stage_histograms()
+        with patch.object(verification_metrics, 'STAGE_HISTOGRAM_FLUSH_OBSERVATIONS', 3):
+            for _ in range(2):
+                observe_stage_timings({'read': {'duration_ms': 1}})
+                assert verification_metrics.maybe_flush_stage_histograms() is False
+            assert get_stage_histograms() == {}
+
+            observe_stage_timings({'read': {'duration_ms': 1}})
+            assert verification_metrics.maybe_flush_stage_histograms() is True
+        assert get_stage_histograms()['read']['count'] == 3
+
+        observe_stage_timings({'read': {'duration_ms': 1}})
+        with patch.object(verification_metrics, 'STAGE_HISTOGRAM_FLUSH_SECONDS', 0):
+            assert verification_metrics.maybe_flush_stage_histograms() is True
+        assert get_stage_histograms()['read']['count'] == 4
+
+    def test_repeat_flush_only_increments(self):
+        from django.core.cache import cache
+
+        observe_stage_timings({'parse': {'duration_ms': 3}})
+        flush_stage_histograms()
+        observe_stage_timings({'parse': {'duration_ms': 3}})
+
+        with patch.object(cache, 'add', wraps=cache.add) as add, \
+                patch.object(cache, 'get', wraps=cache.get) as get:
+            flush_stage_histograms()
+
+        assert add.call_count == 0
+        assert get.call_count == 0
+        assert get_stage_histograms()['parse']['count'] == 2
+
+    def test_verifier_records_document_stages(self):
+        verifier = PDFSignatureVerifier()
+
+        result = verifier.verify_pdf_signature(BytesIO(b'not a pdf'), Mock(uuid=PETITION_UUID))
+
+        assert result['verified'] is False
+        assert 'read' in result['stage_timings']
+        assert 'duration_ms' in result['stage_timings']['read']
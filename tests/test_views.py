@@ -5,6 +5,7 @@ import pytest
 from unittest.mock import patch
 from django.urls import reverse
 from django.contrib.auth.models import User
+from apps.petitions.counters import flush_counters
 from apps.petitions.models import Petition
 from apps.signatures.models import Signature
 from tests.factories import UserFactory, PetitionFactory, SignatureFactory, CategoryFactory
@@ -21,6 +22,32 @@ class TestPetitionViews:
         response = api_client.get(url)
         assert response.status_code == 200
     
+    def test_home_page_served_from_cache(self, api_client, django_assert_max_num_queries):
+        """Test repeat home page hits don't query petitions"""
+        PetitionFactory.create_batch(3, status='active', signature_count=10)
+        url = reverse('petitions:home')
+        
+        first = api_client.get(url)
+        with django_assert_max_num_queries(0):
+            second = api_client.get(url)
+        
+        assert first.context['total_petitions'] == second.context['total_petitions'] == 3
+        assert second.context['total_signatures'] == 30
+        assert len(second.context['featured_petitions']) == 3
+    
+    def test_home_page_lists_refresh_on_status_change(self, api_client):
+        """Test a petition leaving the active status leaves the cached lists"""
+        petition = PetitionFactory(status='active')
+        url = reverse('petitions:home')
+        assert petition in api_client.get(url).context['recent_petitions']
+        
+        petition.status = 'closed'
+        petition.save()
+        
+        response = api_client.get(url)
+        assert petition not in response.context['recent_petitions']
+        assert response.context['total_petitions'] == 0
+    
     def test_petition_list_shows_active_petitions(self, api_client):
         """Test petition list shows only active petitions"""
         active_petition = PetitionFactory(status='active')
@@ -42,6 +69,69 @@ class TestPetitionViews:
         assert petition.title in response.content.decode()
         assert petition.description in response.content.decode()
     
+    def test_petition_detail_served_from_cache(self, api_client, petition, django_assert_max_num_queries):
+        """Test repeat anonymous hits run no query"""
+        url = reverse('petitions:detail', args=[petition.uuid, petition.slug])
+        first = api_client.get(url)
+        
+        with django_assert_max_num_queries(0):
+            second = api_client.get(url)
+        
+        assert second.status_code == 200
+        assert second.content == first.content
+        flush_counters()
+        petition.refresh_from_db()
+        assert petition.view_count == 2
+    
+    def test_petition_detail_cache_invalidated_on_edit(self, api_client, petition):
+        """Test saving a petition drops its cached page"""
+        url = reverse('petitions:detail', args=[petition.uuid, petition.slug])
+        api_client.get(url)
+        
+        petition.description = 'Descrição atualizada com conteúdo suficiente para a página.'
+        petition.save()
+        
+        assert petition.description in api_client.get(url).content.decode()
+    
+    def test_petition_detail_cache_invalidated_on_goal_change(self, api_client, petition):
+        """Test editing the goal refreshes the cached progress bar"""
+        url = reverse('petitions:detail', args=[petition.uuid, petition.slug])
+        api_client.get(url)
+        
+        petition.signature_goal = 987654
+        petition.save()
+        
+        assert 'Meta: 987654' in api_client.get(url).content.decode()
+    
+    def test_petition_detail_cache_invalidated_on_signature(self, api_client, petition):
+        """Test an approved signature refreshes the cached signature count"""
+        url = reverse('petitions:detail', args=[petition.uuid, petition.slug])
+        assert f'{petition.signature_count} assinaturas' in api_client.get(url).content.decode()
+        
+        petition.increment_signature_count()
+        
+        assert f'{petition.signature_count} assinaturas' in api_client.get(url).content.decode()
+    
+    def test_petition_detail_not_page_cached_for_users(self, authenticated_client, petition):
+        """Test authenticated users always get a fresh rendering"""
+        url = reverse('petitions:detail', args=[petition.uuid, petition.slug])
+        authenticated_client.get(url)
+        
+        with patch('apps.petitions.views.get_cached_page') as get_cached_page:
+            response = authenticated_client.get(url)
+        
+        assert response.status_code == 200
+        assert 'petition' in response.context
+        get_cached_page.assert_not_called()
+    
+    def test_petition_share_counts_pending_shares(self, api_client, petition):
+        """Test the share endpoint reports buffered shares"""
+        url = reverse('petitions:share', args=[petition.uuid])
+        api_client.get(url)
+        response = api_client.get(url)
+        
+        assert response.json()['share_count'] == petition.share_count + 2
+    
     def test_create_petition_requires_authentication(self, api_client):
         """Test creating petition requires login"""
         url = reverse('petitions:create')
@@ -186,3 +276,185 @@ class TestSearchFunctionality:
         assert response.status_code == 200
         content = response.content.decode()
         assert petition1.title in content
+    
+    def test_petition_filter_by_state_and_city(self, api_client):
+        """Test location filters match petitions with approved signatures from there"""
+        recife = PetitionFactory(status='active')
+        pending_only = PetitionFactory(status='active')
+        SignatureFactory(petition=recife, state='PE', city='Recife').approve()
+        SignatureFactory(petition=recife, state='PE', city='Olinda').approve()
+        SignatureFactory(petition=pending_only, state='PE', city='Recife')
+        url = reverse('petitions:list')
+        
+        by_state = api_client.get(url, {'state': 'PE'}).context['petitions']
+        by_city = api_client.get(url, {'state': 'PE', 'city': 'recif'}).context['petitions']
+        
+        assert [p.pk for p in by_state] == [recife.pk]
+        assert by_state[0].signature_from_state == 2
+        assert [p.pk for p in by_city] == [recife.pk]
+    
+    def test_repeat_search_served_from_cache(self, api_client):
+        """Test a repeated search doesn't run the search query again"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        category = CategoryFactory(name='Meio Ambiente')
+        PetitionFactory.create_batch(3, title='Proteger a Amazônia', category=category, status='active')
+        PetitionFactory(title='Transporte público', status='active')
+        url = reverse('petitions:list')
+        
+        api_client.get(url, {'q': 'Amazônia'})
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(url, {'q': '  amazônia '})
+        
+        assert len(response.context['petitions']) == 3
+        assert response.context['search_total'] == 3
+        assert not any('LIKE' in query['sql'].upper() for query in queries.captured_queries)
+        facets = {c.pk: c.result_count for c in response.context['categories']}
+        assert facets[category.pk] == 3
+    
+    def test_search_cache_invalidated_by_petition_save(self, api_client):
+        """Test creating or editing a petition refreshes cached searches"""
+        url = reverse('petitions:list')
+        PetitionFactory(title='Ciclovias em Curitiba', status='active')
+        assert api_client.get(url, {'q': 'Ciclovias'}).context['search_total'] == 1
+        
+        PetitionFactory(title='Mais ciclovias', status='active')
+        
+        assert api_client.get(url, {'q': 'Ciclovias'}).context['search_total'] == 2
+    
+    def test_search_pages_through_cached_ids(self, api_client):
+        """Test every page of a search comes from one cached result list"""
+        PetitionFactory.create_batch(25, title='Saneamento básico', status='active')
+        url = reverse('petitions:list')
+        
+        first = api_client.get(url, {'q': 'Saneamento'})
+        second = api_client.get(url, {'q': 'Saneamento', 'page': 2})
+        
+        assert first.context['page_obj'].paginator.num_pages == 2
+        shown = [p.pk for p in first.context['petitions']] + [p.pk for p in second.context['petitions']]
+        assert len(set(shown)) == 25
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestAutocomplete:
+    """Test petition title autocomplete"""
+    
+    @pytest.fixture(autouse=True)
+    def clear_local_suggestions(self):
+        from apps.petitions.autocomplete import clear_local_cache
+        clear_local_cache()
+        yield
+        clear_local_cache()
+    
+    def test_matches_unaccented_prefixes_and_words(self, api_client):
+        """Test partial, unaccented input matches titles, title prefixes first"""
+        inside = PetitionFactory(title='Proteger a Amazônia', status='active', signature_count=500, signature_goal=1000)
+        prefix = PetitionFactory(title='Amazônia sem queimadas', status='active', signature_count=10)
+        PetitionFactory(title='Amazonas limpo', status='draft')
+        url = reverse('petitions:autocomplete')
+        
+        results = api_client.get(url, {'q': 'AMAZONI'}).json()['results']
+        
+        assert [r['id'] for r in results] == [str(prefix.uuid), str(inside.uuid)]
+        assert results[0]['url'] == prefix.get_absolute_url()
+        assert api_client.get(url, {'q': 'am'}).json()['results'][0]['id'] == str(prefix.uuid)
+        assert api_client.get(url, {'q': 'a'}).json()['results'] == []
+    
+    def test_hot_queries_served_in_process(self, api_client, django_assert_num_queries):
+        """Test a repeated query reads neither the database nor the cache"""
+        PetitionFactory(title='Merenda escolar', status='active')
+        url = reverse('petitions:autocomplete')
+        api_client.get(url, {'q': 'merenda'})
+        
+        with patch('apps.petitions.autocomplete.cache') as cache:
+            with django_assert_num_queries(0):
+                results = api_client.get(url, {'q': 'Merenda '}).json()['results']
+        
+        assert len(results) == 1
+        cache.get.assert_not_called()
+    
+    def test_query_over_budget_returns_nothing(self, api_client):
+        """Test a failed or cancelled query returns no (uncached) suggestions"""
+        from django.db import OperationalError
+        
+        PetitionFactory(title='Saúde pública', status='active')
+        url = reverse('petitions:autocomplete')
+        
+        with patch('apps.petitions.autocomplete._query_suggestions', side_effect=OperationalError('canceling statement due to statement timeout')):
+            assert api_client.get(url, {'q': 'saude'}).json()['results'] == []
+        
+        assert len(api_client.get(url, {'q': 'saude'}).json()['results']) == 1
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestCursorPagination:
+    """Test keyset pagination of the petition and signature lists"""
+    
+    def test_petition_list_walks_pages_by_cursor(self, api_client):
+        """Test next/previous cursors visit every petition once, in order"""
+        PetitionFactory.create_batch(45, status='active')
+        url = reverse('petitions:list')
+        
+        pages = [api_client.get(url).context['page_obj']]
+        while pages[-1].has_next():
+            pages.append(api_client.get(f'{url}?{pages[-1].next_query}').context['page_obj'])
+        
+        seen = [petition.pk for page in pages for petition in page]
+        assert [len(page) for page in pages] == [20, 20, 5]
+        assert seen == list(Petition.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+        assert pages[0].paginator.count == 45
+        
+        back = api_client.get(f'{url}?{pages[-1].previous_query}').context['page_obj']
+        assert [p.pk for p in back] == [p.pk for p in pages[1]]
+        assert back.has_next() and back.has_previous()
+    
+    def test_cursor_keeps_filters(self, api_client):
+        """Test cursor links carry the other query parameters"""
+        PetitionFactory.create_batch(21, status='active')
+        url = reverse('petitions:list')
+        
+        page = api_client.get(url, {'sort': '-created_at'}).context['page_obj']
+        
+        assert 'sort=-created_at' in page.next_query
+    
+    def test_tampered_cursor_is_not_found(self, api_client):
+        """Test an invalid cursor returns 404"""
+        url = reverse('petitions:list')
+        
+        assert api_client.get(url, {'cursor': 'not-a-cursor'}).status_code == 404
+    
+    def test_numbered_pages_still_work(self, api_client):
+        """Test ?page=N keeps the OFFSET paginator"""
+        PetitionFactory.create_batch(21, status='active')
+        url = reverse('petitions:list')
+        
+        response = api_client.get(url, {'page': 2})
+        
+        assert response.context['page_obj'].number == 2
+        assert len(response.context['petitions']) == 1
+    
+    def test_deep_signature_page_costs_the_same(self, authenticated_client, user):
+        """Test later signature pages run the same queries as the first"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        petition = PetitionFactory(creator=user)
+        SignatureFactory.create_batch(120, petition=petition)
+        url = reverse('signatures:petition_signatures', args=[petition.uuid])
+        
+        with CaptureQueriesContext(connection) as first_queries:
+            first = authenticated_client.get(url)
+        second = authenticated_client.get(f'{url}?{first.context["page_obj"].next_query}')
+        with CaptureQueriesContext(connection) as third_queries:
+            third = authenticated_client.get(f'{url}?{second.context["page_obj"].next_query}')
+        
+        assert len(third_queries) == len(first_queries)
+        assert not any('OFFSET' in query['sql'] for query in third_queries.captured_queries)
+        assert first.context['total_signatures'] == 120
+        assert len(third.context['signatures']) == 20
+        assert not third.context['page_obj'].has_next()
+        listed = {s.pk for response in (first, second, third) for s in response.context['signatures']}
+        assert len(listed) == 120